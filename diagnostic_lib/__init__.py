@@ -0,0 +1,7 @@
+"""
+AI File Sorter - Shared Diagnostic Support Library
+
+Building blocks shared by diagnostic_tool.py and thorough_diagnostic.py.
+Submodules are imported on demand by the tools; this package intentionally
+imports nothing at load time.
+"""
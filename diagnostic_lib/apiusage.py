@@ -0,0 +1,208 @@
+"""
+AI File Sorter - API Usage Analytics
+
+api_usage_tracking holds one row per provider per UTC day (record_api_usage()
+upserts on DATE('now')). This module turns it into:
+
+- daily and weekly series per provider (requests, tokens, cost, tokens per
+  request), with the files categorized on the same days taken from
+  file_categorization.timestamp
+- a comparison of the last RECENT_DAYS days against the BASELINE_DAYS
+  before them: tokens per request, LLM requests per 1,000 files and cost
+  per 1,000 files, flagged when one got REGRESSION_RATIO worse
+- a quota forecast for today: when the daily limit runs out at today's
+  request rate. The app never fills daily_limit, so Gemini falls back to the
+  free tier's 1,500 requests per day (APIUsageTracker::GEMINI_FREE_RPD)
+
+All aggregation is done by SQLite in a few GROUP BY statements, so years of
+history cost one pass over a few hundred rows per provider; Python only
+handles the per-day results.
+"""
+
+import datetime
+import sqlite3
+from typing import Dict, List, Optional
+
+RECENT_DAYS = 7
+BASELINE_DAYS = 28
+REGRESSION_RATIO = 1.25
+
+# Days of daily series kept in the report (weekly series cover everything)
+SERIES_DAYS = 90
+
+# APIUsageTracker::GEMINI_FREE_RPD, used when a row has no daily_limit
+DEFAULT_DAILY_LIMITS = {"gemini": 1500}
+
+# Warn when the busiest days come this close to the daily limit
+QUOTA_WARNING_RATIO = 0.8
+
+_DAILY = """
+    WITH usage AS (
+        SELECT provider, DATE(date) AS day, SUM(requests_made) AS requests, SUM(tokens_used) AS tokens,
+               SUM(cost_estimate) AS cost, MAX(daily_limit) AS daily_limit, MIN(remaining) AS remaining
+        FROM api_usage_tracking
+        GROUP BY provider, DATE(date)
+    ), files AS (
+        SELECT DATE(timestamp) AS day, COUNT(*) AS files
+        FROM file_categorization
+        WHERE timestamp >= (SELECT MIN(day) FROM usage)
+        GROUP BY DATE(timestamp)
+    )
+    SELECT u.provider, u.day, IFNULL(u.requests, 0), IFNULL(u.tokens, 0), IFNULL(u.cost, 0.0),
+           u.daily_limit, u.remaining, IFNULL(f.files, 0)
+    FROM usage u LEFT JOIN files f ON f.day = u.day
+    ORDER BY u.provider, u.day
+"""
+
+_WEEKLY = """
+    SELECT provider, STRFTIME('%Y-W%W', date) AS week, MIN(DATE(date)), SUM(requests_made),
+           SUM(tokens_used), SUM(cost_estimate), COUNT(*)
+    FROM api_usage_tracking
+    GROUP BY provider, week
+    ORDER BY provider, week
+"""
+
+# Recent window vs. the baseline window before it, per provider; the window
+# bounds come from analyze_api_usage()'s `now`, so rows after it are ignored
+_PERIODS = """
+    WITH bounds AS (
+        SELECT ? AS recent_start, ? AS baseline_start, ? AS today
+    ), files AS (
+        SELECT SUM(DATE(timestamp) >= recent_start) AS recent_files,
+               SUM(DATE(timestamp) < recent_start) AS baseline_files
+        FROM file_categorization, bounds
+        WHERE timestamp >= baseline_start AND DATE(timestamp) <= today
+    )
+    SELECT provider,
+           SUM(CASE WHEN DATE(date) >= recent_start THEN requests_made END),
+           SUM(CASE WHEN DATE(date) >= recent_start THEN tokens_used END),
+           SUM(CASE WHEN DATE(date) >= recent_start THEN cost_estimate END),
+           SUM(CASE WHEN DATE(date) < recent_start THEN requests_made END),
+           SUM(CASE WHEN DATE(date) < recent_start THEN tokens_used END),
+           SUM(CASE WHEN DATE(date) < recent_start THEN cost_estimate END),
+           (SELECT recent_files FROM files), (SELECT baseline_files FROM files)
+    FROM api_usage_tracking, bounds
+    WHERE DATE(date) >= baseline_start AND DATE(date) <= today
+    GROUP BY provider
+"""
+
+
+def _ratio(numerator, denominator, scale: float = 1.0) -> Optional[float]:
+    return round(numerator * scale / denominator, 4) if numerator is not None and denominator else None
+
+
+def _period(requests, tokens, cost, files) -> dict:
+    return {
+        "requests": requests or 0,
+        "tokens": tokens or 0,
+        "cost": round(cost or 0.0, 4),
+        "files": files or 0,
+        "tokens_per_request": _ratio(tokens, requests),
+        "requests_per_1k_files": _ratio(requests, files, 1000),
+        "cost_per_1k_files": _ratio(cost, files, 1000),
+    }
+
+
+def _regressions(recent: dict, baseline: dict) -> List[str]:
+    """Metrics that got REGRESSION_RATIO worse in the recent window"""
+    found = []
+    labels = {
+        "tokens_per_request": "tokens per request",
+        "requests_per_1k_files": "LLM requests per 1,000 files",
+        "cost_per_1k_files": "cost per 1,000 files",
+    }
+    for key, label in labels.items():
+        now, before = recent[key], baseline[key]
+        if now is not None and before and now > before * REGRESSION_RATIO:
+            found.append(f"{label}: {before:,.2f} -> {now:,.2f} (+{(now / before - 1) * 100:.0f}%)")
+    return found
+
+
+def _forecast(provider: str, today: Optional[dict], busiest: int, now: datetime.datetime) -> Optional[dict]:
+    """When today's quota runs out at today's rate (days are UTC, like DATE('now'))"""
+    limit = (today or {}).get("daily_limit") or DEFAULT_DAILY_LIMITS.get(provider)
+    if not limit:
+        return None
+    used = (today or {}).get("requests", 0)
+    remaining = (today or {}).get("remaining")
+    if remaining is None:
+        remaining = max(0, limit - used)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = max((now - midnight).total_seconds(), 900.0)  # Ignore the noisy first minutes
+    rate = used / elapsed * 3600  # Requests per hour
+    exhausted_at = None
+    if remaining == 0:
+        exhausted_at = now
+    elif rate > 0:
+        eta = now + datetime.timedelta(hours=remaining / rate)
+        if eta < midnight + datetime.timedelta(days=1):
+            exhausted_at = eta
+    return {
+        "daily_limit": limit,
+        "limit_source": "database" if (today or {}).get("daily_limit") else "default",
+        "used_today": used,
+        "remaining_today": remaining,
+        "requests_per_hour": round(rate, 1),
+        "exhausted_at_utc": exhausted_at.strftime("%Y-%m-%d %H:%M") if exhausted_at else None,
+        "busiest_day_requests": busiest,
+        "busiest_day_share": round(busiest / limit, 3),
+    }
+
+
+def analyze_api_usage(conn: sqlite3.Connection, now: Optional[datetime.datetime] = None) -> dict:
+    """Series, recent-vs-baseline comparison, regressions and quota forecast per provider"""
+    now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    today = now.strftime("%Y-%m-%d")
+    series_start = (now - datetime.timedelta(days=SERIES_DAYS - 1)).strftime("%Y-%m-%d")
+    recent_start = (now - datetime.timedelta(days=RECENT_DAYS - 1)).strftime("%Y-%m-%d")
+    baseline_start = (now - datetime.timedelta(days=RECENT_DAYS + BASELINE_DAYS - 1)).strftime("%Y-%m-%d")
+
+    providers: Dict[str, dict] = {}
+    for provider, day, requests, tokens, cost, limit, remaining, files in conn.execute(_DAILY):
+        entry = providers.setdefault(provider, {
+            "days": 0, "requests": 0, "tokens": 0, "cost": 0.0, "first_day": day,
+            "busiest_day_requests": 0, "today": None, "daily": [], "weekly": [],
+        })
+        entry["days"] += 1
+        entry["requests"] += requests
+        entry["tokens"] += tokens
+        entry["cost"] += cost
+        entry["last_day"] = day
+        entry["busiest_day_requests"] = max(entry["busiest_day_requests"], requests)
+        point = {"date": day, "requests": requests, "tokens": tokens, "cost": round(cost, 4),
+                 "tokens_per_request": _ratio(tokens, requests), "files_categorized": files}
+        if day >= series_start:
+            entry["daily"].append(point)
+        if day == today:
+            entry["today"] = dict(point, daily_limit=limit, remaining=remaining)
+
+    for provider, week, start, requests, tokens, cost, days in conn.execute(_WEEKLY):
+        if provider in providers:
+            providers[provider]["weekly"].append({
+                "week": week, "start": start, "days": days, "requests": requests or 0,
+                "tokens": tokens or 0, "cost": round(cost or 0.0, 4),
+                "tokens_per_request": _ratio(tokens, requests),
+            })
+
+    for row in conn.execute(_PERIODS, (recent_start, baseline_start, today)):
+        provider, r_req, r_tok, r_cost, b_req, b_tok, b_cost, r_files, b_files = row
+        if provider not in providers:
+            continue
+        recent = _period(r_req, r_tok, r_cost, r_files)
+        baseline = _period(b_req, b_tok, b_cost, b_files)
+        providers[provider]["recent"] = recent
+        providers[provider]["baseline"] = baseline
+        providers[provider]["regressions"] = _regressions(recent, baseline) if b_req else []
+
+    for provider, entry in providers.items():
+        entry["cost"] = round(entry["cost"], 4)
+        entry["tokens_per_request"] = _ratio(entry["tokens"], entry["requests"])
+        entry.setdefault("recent", None)
+        entry.setdefault("baseline", None)
+        entry.setdefault("regressions", [])
+        entry["quota"] = _forecast(provider, entry["today"], entry["busiest_day_requests"], now)
+    return {
+        "recent_days": RECENT_DAYS,
+        "baseline_days": BASELINE_DAYS,
+        "providers": providers,
+    }
@@ -0,0 +1,168 @@
+"""
+AI File Sorter - Application Paths
+
+Where the application itself keeps its files, mirroring the C++ code so the
+diagnostics look at the same files the app uses:
+
+- Settings::define_config_path(): the config directory is
+  $AI_FILE_SORTER_CONFIG_DIR/AIFileSorter when set, otherwise
+  %APPDATA%\\AIFileSorter (Windows), ~/Library/Application Support/AIFileSorter
+  (macOS) or ~/.config/AIFileSorter
+- DatabaseManager::DatabaseManager(): the categorization database is
+  config_dir + "/" + ($CATEGORIZATION_CACHE_FILE or "categorization_results.db");
+  the override is always appended to the config directory, even when it
+  looks like an absolute path
+
+- Settings::load(): config.ini in the config directory, booleans written
+  as "true"/"false"
+- Logger::get_log_directory(): %APPDATA%\\AIFileSorter\\logs (Windows),
+  otherwise $XDG_CACHE_HOME/AIFileSorter/my_app/logs when XDG_CACHE_HOME is
+  set (the "my_app" component is in the C++ too) or ~/.cache/AIFileSorter/logs,
+  on macOS as well. Logger::setup_loggers() writes core.log, db.log and ui.log
+  there and ErrorReporter::initialize() errors.log, all spdlog rotating files
+
+Older builds kept aifilesorter.db and logs/ in the per-platform data
+directory; those locations are still checked as fallbacks. The diagnostic
+tools keep their own state (probe cache, incremental results, snapshots) in
+its diagnostics/ subdirectory.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+APP_NAME = "AIFileSorter"
+CONFIG_DIR_ENV = "AI_FILE_SORTER_CONFIG_DIR"
+DATABASE_FILE_ENV = "CATEGORIZATION_CACHE_FILE"
+DEFAULT_DATABASE_FILE = "categorization_results.db"
+LEGACY_DATABASE_FILE = "aifilesorter.db"
+CONFIG_FILE = "config.ini"
+LEGACY_DIR_NAME = "aifilesorter"
+STATE_DIR_NAME = "diagnostics"
+LOG_CACHE_ENV = "XDG_CACHE_HOME"
+
+# Log file -> (spdlog logger, rotated files kept by its rotating sink)
+LOG_FILES = {
+    "core.log": ("core_logger", 3),
+    "db.log": ("db_logger", 3),
+    "ui.log": ("ui_logger", 3),
+    "errors.log": ("error_reporter", 5),
+}
+
+
+def app_config_dir() -> Path:
+    """The directory Settings::define_config_path() puts config.ini in"""
+    override = os.environ.get(CONFIG_DIR_ENV)
+    if override:
+        return Path(override) / APP_NAME
+    if sys.platform == "win32":
+        return Path(os.environ.get("APPDATA", "")) / APP_NAME
+    home = os.environ.get("HOME") or str(Path.home())
+    if sys.platform == "darwin":
+        return Path(home) / "Library" / "Application Support" / APP_NAME
+    return Path(home) / ".config" / APP_NAME
+
+
+def app_database_path() -> Path:
+    """The database file DatabaseManager opens"""
+    name = os.environ.get(DATABASE_FILE_ENV) or DEFAULT_DATABASE_FILE
+    # String concatenation, exactly like the C++ (an absolute override is not honoured)
+    return Path(str(app_config_dir()) + "/" + name)
+
+
+def database_candidates(legacy_dir: Path) -> List[Path]:
+    """Database locations in lookup order: the app's own, then the legacy one"""
+    return [app_database_path(), Path(legacy_dir) / LEGACY_DATABASE_FILE]
+
+
+def resolve_database(legacy_dir: Path) -> Path:
+    """First existing candidate, or the app's location when none exists yet"""
+    candidates = database_candidates(legacy_dir)
+    for path in candidates:
+        if path.is_file():
+            return path
+    return candidates[0]
+
+
+def legacy_data_dir() -> Path:
+    """The per-platform data directory older builds kept the database and logs in"""
+    if sys.platform == "win32":
+        return Path(os.path.expandvars("%APPDATA%")) / LEGACY_DIR_NAME
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / LEGACY_DIR_NAME
+    return Path.home() / ".local" / "share" / LEGACY_DIR_NAME
+
+
+def diagnostic_state_dir(override: Optional[Union[str, Path]] = None) -> Path:
+    """Where both diagnostic tools keep their state (override: --state-dir)"""
+    return Path(override) if override else legacy_data_dir() / STATE_DIR_NAME
+
+
+def read_app_settings(section: str = "Settings") -> Dict[str, str]:
+    """Keys of one section of the app's config.ini (case preserved); empty if unreadable"""
+    import configparser
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    parser.optionxform = str
+    try:
+        parser.read(app_config_dir() / CONFIG_FILE, encoding="utf-8")
+    except (configparser.Error, UnicodeDecodeError):
+        return {}
+    return dict(parser[section]) if parser.has_section(section) else {}
+
+
+def setting_enabled(settings: Dict[str, str], key: str, default: bool) -> bool:
+    """A boolean setting read like Settings::load_bool (only "true" is true)"""
+    return settings.get(key, "true" if default else "false") == "true"
+
+
+def app_log_dir() -> Optional[Path]:
+    """The directory Logger::get_log_directory() returns; None where the app would fail to start"""
+    if sys.platform == "win32":
+        appdata = os.environ.get("APPDATA")
+        return Path(appdata) / APP_NAME / "logs" if appdata else None
+    cache_home = os.environ.get(LOG_CACHE_ENV)
+    if cache_home:
+        return Path(cache_home) / APP_NAME / "my_app" / "logs"
+    home = os.environ.get("HOME")
+    return Path(home) / ".cache" / APP_NAME / "logs" if home else None
+
+
+def resolve_log_dir(legacy_dir: Path) -> Path:
+    """The app's log directory, or the legacy one when only that exists"""
+    current = app_log_dir()
+    if current is not None and current.is_dir():
+        return current
+    if Path(legacy_dir).is_dir():
+        return Path(legacy_dir)
+    return current or Path(legacy_dir)
+
+
+def rotated_names(name: str, keep: int) -> List[str]:
+    """A log file and spdlog's rotations of it, newest first (core.log, core.1.log, ...)"""
+    stem, ext = os.path.splitext(name)
+    return [name] + [f"{stem}.{i}{ext}" for i in range(1, keep + 1)]
+
+
+def log_sources(log_dir: Path) -> List[Tuple[str, Path]]:
+    """(logger, path) of every existing log file in log_dir, the app's own first
+
+    Files that are not one of the app's logs or their rotations are listed
+    with the logger name "other".
+    """
+    log_dir = Path(log_dir)
+    sources: List[Tuple[str, Path]] = []
+    known = set()
+    for name, (logger, keep) in LOG_FILES.items():
+        for candidate in rotated_names(name, keep):
+            known.add(candidate)
+            path = log_dir / candidate
+            if path.is_file():
+                sources.append((logger, path))
+    try:
+        others = sorted(p for p in log_dir.iterdir()
+                        if p.suffix in (".log", ".txt") and p.name not in known and p.is_file())
+    except OSError:
+        others = []
+    sources += [("other", p) for p in others]
+    return sources
@@ -0,0 +1,224 @@
+"""
+AI File Sorter - Content Analysis Cache Staleness
+
+content_analysis_cache keeps a content_hash per file_path, and nothing
+removes or re-checks an entry when the file changes or disappears. This
+module finds such entries without re-hashing the whole cache:
+
+- the table is streamed in id order, BATCH_ROWS rows at a time (keyset
+  pagination, so memory stays flat and a scan can resume after any batch)
+- every entry is stat()-ed first: a missing file is stale, a file whose
+  mtime is not newer than the entry's timestamp is assumed current
+- only the remaining candidates are re-hashed, on a bounded thread pool;
+  large files are read through mmap and fed to hashlib, which releases the
+  GIL, so the workers hash in parallel
+
+The app does not record which hash function produced content_hash, so it is
+inferred from the digest length (MD5, SHA-1, SHA-256, SHA-512). Candidates
+with any other digest are counted as unverified.
+
+A CacheScan can be saved with to_dict() and passed back (from_dict()) to
+continue a partial scan on the next run.
+"""
+
+import calendar
+import hashlib
+import mmap
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+BATCH_ROWS = 2000
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+SAMPLE_PATHS = 10
+
+# Files below this size are hashed with plain reads; mapping them costs more than it saves
+MMAP_MIN_BYTES = 1024 * 1024
+HASH_CHUNK = 8 * 1024 * 1024
+
+# mtime within this many seconds of the entry's timestamp counts as not newer
+MTIME_SLACK = 2.0
+
+DIGEST_ALGORITHMS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+
+# Approximate bytes an entry occupies: the row plus its file_path (UNIQUE) and content_hash index entries
+_BATCH = """
+    SELECT id, file_path, content_hash, timestamp,
+           2 * LENGTH(CAST(file_path AS BLOB)) + 2 * LENGTH(CAST(content_hash AS BLOB))
+           + IFNULL(LENGTH(CAST(mime_type AS BLOB)), 0) + IFNULL(LENGTH(CAST(keywords AS BLOB)), 0)
+           + IFNULL(LENGTH(CAST(detected_language AS BLOB)), 0) + IFNULL(LENGTH(CAST(metadata AS BLOB)), 0)
+           + IFNULL(LENGTH(CAST(analysis_summary AS BLOB)), 0) + IFNULL(LENGTH(CAST(timestamp AS BLOB)), 0)
+    FROM content_analysis_cache
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+# Entry states
+CURRENT = "current"        # mtime not newer than the entry
+UNCHANGED = "unchanged"    # mtime newer, but the content hash still matches
+STALE = "stale"            # content hash differs
+MISSING = "missing"        # file no longer exists
+UNVERIFIED = "unverified"  # mtime newer but the hash could not be recomputed
+
+
+def digest_algorithm(digest: str) -> Optional[str]:
+    """hashlib name for a hex digest, judged by its length"""
+    if not digest:
+        return None
+    try:
+        int(digest, 16)
+    except ValueError:
+        return None
+    return DIGEST_ALGORITHMS.get(len(digest))
+
+
+def hash_file(path: str, algorithm: str) -> str:
+    """Hex digest of a file's content; large files are read through mmap"""
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_MIN_BYTES:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, HASH_CHUNK):
+                    digest.update(view[offset:offset + HASH_CHUNK])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def _entry_time(timestamp) -> Optional[float]:
+    """Epoch seconds of a CURRENT_TIMESTAMP value (UTC)"""
+    try:
+        return float(calendar.timegm(time.strptime(str(timestamp)[:19], "%Y-%m-%d %H:%M:%S")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _stat_filter(path: str, recorded) -> Optional[str]:
+    """State decided by stat() alone, or None when the content has to be re-hashed"""
+    if not os.path.isabs(path):
+        return UNVERIFIED
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return MISSING
+    except OSError:
+        return UNVERIFIED
+    recorded_at = _entry_time(recorded)
+    if recorded_at is not None and st.st_mtime <= recorded_at + MTIME_SLACK:
+        return CURRENT
+    return None
+
+
+def _rehash(path: str, expected: str) -> Tuple[str, int]:
+    """(state, bytes hashed) after recomputing the digest"""
+    algorithm = digest_algorithm(expected)
+    if algorithm is None:
+        return UNVERIFIED, 0
+    try:
+        size = os.path.getsize(path)
+        actual = hash_file(path, algorithm)
+    except FileNotFoundError:
+        return MISSING, 0
+    except (OSError, ValueError):
+        return UNVERIFIED, 0
+    return (UNCHANGED if actual == expected.lower() else STALE), size
+
+
+class CacheScan:
+    """Running totals of one pass over content_analysis_cache"""
+    def __init__(self):
+        self.last_id = 0  # Highest id examined; the next batch starts after it
+        self.complete = False
+        self.rows = 0
+        self.counts: Dict[str, int] = {state: 0 for state in (CURRENT, UNCHANGED, STALE, MISSING, UNVERIFIED)}
+        self.rehashed = 0
+        self.hashed_bytes = 0
+        self.reclaimable_bytes = 0  # Entries for missing or changed files
+        self.samples: Dict[str, list] = {STALE: [], MISSING: []}
+        self.elapsed_s = 0.0
+
+    @property
+    def stale_ratio(self) -> float:
+        """Share of examined entries whose file is gone or changed"""
+        return (self.counts[STALE] + self.counts[MISSING]) / self.rows if self.rows else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "last_id": self.last_id,
+            "complete": self.complete,
+            "rows": self.rows,
+            "counts": dict(self.counts),
+            "rehashed": self.rehashed,
+            "hashed_bytes": self.hashed_bytes,
+            "reclaimable_bytes": self.reclaimable_bytes,
+            "stale_ratio": round(self.stale_ratio, 4),
+            "samples": {k: list(v) for k, v in self.samples.items()},
+            "elapsed_s": round(self.elapsed_s, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CacheScan":
+        scan = cls()
+        scan.last_id = int(data.get("last_id", 0))
+        scan.rows = int(data.get("rows", 0))
+        scan.counts.update({k: int(v) for k, v in data.get("counts", {}).items() if k in scan.counts})
+        scan.rehashed = int(data.get("rehashed", 0))
+        scan.hashed_bytes = int(data.get("hashed_bytes", 0))
+        scan.reclaimable_bytes = int(data.get("reclaimable_bytes", 0))
+        for state in scan.samples:
+            scan.samples[state] = list(data.get("samples", {}).get(state, []))[:SAMPLE_PATHS]
+        scan.elapsed_s = float(data.get("elapsed_s", 0.0))
+        return scan
+
+
+def scan_content_cache(conn: sqlite3.Connection, scan: Optional[CacheScan] = None,
+                       batch_rows: int = BATCH_ROWS, workers: int = HASH_WORKERS,
+                       time_budget: Optional[float] = None,
+                       cancelled: Optional[Callable[[], bool]] = None) -> CacheScan:
+    """Continue (or start) a pass over the cache until it ends, the budget runs out or cancelled()"""
+    scan = scan or CacheScan()
+    started = time.perf_counter()
+    deadline = None if time_budget is None else started + time_budget
+
+    def record(state: str, path: str, size: int):
+        scan.counts[state] += 1
+        if state in (STALE, MISSING):
+            scan.reclaimable_bytes += size
+            if len(scan.samples[state]) < SAMPLE_PATHS:
+                scan.samples[state].append(path)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cache-hash") as pool:
+        while True:
+            batch = conn.execute(_BATCH, (scan.last_id, batch_rows)).fetchall()
+            if not batch:
+                scan.complete = True
+                break
+            states = list(pool.map(lambda row: _stat_filter(row[1], row[3]), batch))
+            candidates = [row for row, state in zip(batch, states) if state is None]
+            rehashed = dict(zip((row[0] for row in candidates),
+                                pool.map(lambda row: _rehash(row[1], row[2]), candidates)))
+            for (entry_id, path, _, _, size), state in zip(batch, states):
+                if state is None:
+                    state, hashed = rehashed[entry_id]
+                    if state in (UNCHANGED, STALE):
+                        scan.rehashed += 1
+                        scan.hashed_bytes += hashed
+                record(state, path, size or 0)
+            scan.rows += len(batch)
+            scan.last_id = batch[-1][0]
+            if len(batch) < batch_rows:
+                scan.complete = True
+                break
+            if (deadline is not None and time.perf_counter() > deadline) or (cancelled and cancelled()):
+                break
+    scan.elapsed_s += time.perf_counter() - started
+    return scan
@@ -0,0 +1,302 @@
+"""
+AI File Sorter - Journal Mode and Lock Contention
+
+DatabaseManager opens the categorization database with a plain
+sqlite3_open(): no journal_mode, no busy timeout. The categorization workers
+and the UI share that file, so any lock held by one of them makes the other's
+statement fail with SQLITE_BUSY at once instead of waiting.
+
+journal_state() reports how the live database is set up without opening a
+write transaction: journal_mode, wal_autocheckpoint, the -wal/-shm/-journal
+files and, in WAL mode, how many frames are still waiting to be
+checkpointed (read from the WAL-index header in the -shm file, see
+https://www.sqlite.org/walformat.html).
+
+simulate_contention() measures what that setup costs on a copy of the
+database: READERS threads run the app's cache lookups while one writer
+commits file_categorization upserts in batches, all with the app's busy
+timeout. Every SQLITE_BUSY is counted and retried after a short pause, so
+latencies include the time lost to locks. In WAL mode the writer runs the
+automatic checkpoint itself (PASSIVE, once wal_autocheckpoint frames have
+accumulated, as SQLite does on commit) so each checkpoint can be timed and
+counted as a stall when it is slow or cannot finish because readers still
+need older frames.
+"""
+
+import os
+import random
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from diagnostic_lib.dbbench import FILE_CATEGORIZATION_UPSERT, READ_QUERIES, sample_keys
+from diagnostic_lib.dbutil import PathLike, connect_readonly, percentile
+from diagnostic_lib.snapshot import backup_database
+
+# DatabaseManager never calls sqlite3_busy_timeout()
+APP_BUSY_TIMEOUT_MS = 0
+
+READERS = 4
+DURATION_S = 3.0
+WRITE_BATCH = 50
+RETRY_PAUSE_S = 0.001
+
+# A checkpoint slower than this holds up the commit that triggered it
+CHECKPOINT_STALL_MS = 50.0
+
+# Reader query classes (see dbbench.READ_QUERIES)
+READER_QUERIES = ("categorization_lookup", "directory_listing")
+
+_WAL_INDEX_HEADER = 136  # Two copies of WalIndexHdr (48 bytes each) + WalCkptInfo
+
+
+def wal_index_frames(db_path: PathLike) -> Optional[dict]:
+    """Frames in the WAL and frames already checkpointed, from the -shm header"""
+    try:
+        with open(f"{db_path}-shm", "rb") as f:
+            header = f.read(_WAL_INDEX_HEADER)
+    except OSError:
+        return None
+    if len(header) < _WAL_INDEX_HEADER or header[12] != 1:  # isInit
+        return None
+    max_frame = struct.unpack_from("=I", header, 16)[0]
+    backfilled = struct.unpack_from("=I", header, 96)[0]
+    return {"frames": max_frame, "checkpointed": backfilled, "pending": max(0, max_frame - backfilled)}
+
+
+def _file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def journal_state(db_path: PathLike) -> dict:
+    """journal_mode, wal_autocheckpoint and the journal files of a database"""
+    conn = connect_readonly(db_path)
+    try:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        autocheckpoint = conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+    state = {
+        "journal_mode": str(journal_mode).lower(),
+        "wal_autocheckpoint": autocheckpoint,
+        "page_size": page_size,
+        "app_busy_timeout_ms": APP_BUSY_TIMEOUT_MS,
+        "wal_bytes": _file_size(f"{db_path}-wal"),
+        "shm_bytes": _file_size(f"{db_path}-shm"),
+        "journal_bytes": _file_size(f"{db_path}-journal"),  # A leftover one is a hot journal
+        "wal_index": wal_index_frames(db_path),
+    }
+    if state["wal_index"]:
+        state["pending_checkpoint_bytes"] = state["wal_index"]["pending"] * page_size
+    return state
+
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class RoleStats:
+    """Latency and lock waits of one simulated role (reader or writer)"""
+    def __init__(self, role: str):
+        self.role = role
+        self.latencies_ms: List[float] = []
+        self.busy = 0  # SQLITE_BUSY results; each one fails a statement in the app
+        self.busy_operations = 0  # Operations that hit at least one
+        self.errors: List[str] = []
+
+    def merge(self, other: "RoleStats"):
+        self.latencies_ms += other.latencies_ms
+        self.busy += other.busy
+        self.busy_operations += other.busy_operations
+        self.errors += other.errors
+
+    def summary(self, elapsed_s: float) -> dict:
+        ordered = sorted(self.latencies_ms)
+        operations = len(ordered)
+        return {
+            "role": self.role,
+            "operations": operations,
+            "ops_per_sec": round(operations / elapsed_s, 1) if elapsed_s else 0.0,
+            "busy": self.busy,
+            "busy_operations": self.busy_operations,
+            "busy_ratio": round(self.busy_operations / operations, 4) if operations else 0.0,
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+            "errors": self.errors[:5],
+        }
+
+
+def _retry(stats: RoleStats, stop: threading.Event, action):
+    """Run action until it gets past SQLITE_BUSY; returns False when stopped first"""
+    waited = False
+    while True:
+        try:
+            action()
+            if waited:
+                stats.busy_operations += 1
+            return True
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e):
+                raise
+            stats.busy += 1
+            waited = True
+            if stop.is_set():
+                return False
+            time.sleep(RETRY_PAUSE_S)
+
+
+def _reader(path: str, keys: List[tuple], timeout_s: float, seed: int, stop: threading.Event,
+            stats: RoleStats):
+    rng = random.Random(seed)
+    queries = dict(READ_QUERIES)
+    conn = sqlite3.connect(path, timeout=timeout_s, check_same_thread=False)
+    try:
+        while not stop.is_set():
+            name = READER_QUERIES[rng.randrange(len(READER_QUERIES))]
+            key = keys[rng.randrange(len(keys))] if keys else ("__missing__", "F", "/__missing__")
+            params = key if name == "categorization_lookup" else (key[2],)
+            t0 = time.perf_counter()
+            if _retry(stats, stop, lambda: conn.execute(queries[name], params).fetchall()):
+                stats.latencies_ms.append((time.perf_counter() - t0) * 1000)
+    except sqlite3.Error as e:
+        stats.errors.append(str(e))
+    finally:
+        conn.close()
+
+
+class _Checkpoints:
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.incomplete = 0  # Readers still needed frames the checkpoint could not copy back
+        self.wal_peak_bytes = 0
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies_ms)
+        stalls = [ms for ms in ordered if ms > CHECKPOINT_STALL_MS]
+        return {
+            "checkpoints": len(ordered),
+            "stalls": len(stalls),
+            "stall_ms_total": round(sum(stalls), 1),
+            "incomplete": self.incomplete,
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+            "wal_peak_bytes": self.wal_peak_bytes,
+        }
+
+
+def _writer(path: str, keys: List[tuple], timeout_s: float, autocheckpoint: int, seed: int,
+            stop: threading.Event, stats: RoleStats, checkpoints: _Checkpoints):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path, timeout=timeout_s, isolation_level=None, check_same_thread=False)
+    wal = conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    if wal:
+        conn.execute("PRAGMA wal_autocheckpoint=0")  # Run below, where it can be timed
+    batch = 0
+    try:
+        while not stop.is_set():
+            rows = []
+            for i in range(WRITE_BATCH):
+                if keys and rng.random() < 0.8:
+                    name, ftype, dir_path = keys[rng.randrange(len(keys))]
+                else:
+                    name, ftype, dir_path = f"__contention_{batch}_{i}.bin", "F", "/__diagnostic_contention__"
+                rows.append((name, ftype, dir_path, "Contention", "Probe", None, 0, 0))
+            batch += 1
+            t0 = time.perf_counter()
+
+            def transaction():
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(FILE_CATEGORIZATION_UPSERT, rows)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+
+            if not _retry(stats, stop, transaction):
+                break
+            if wal and autocheckpoint > 0:
+                frames = wal_index_frames(path)
+                if frames and frames["frames"] >= autocheckpoint:
+                    c0 = time.perf_counter()
+                    busy, log, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+                    checkpoints.latencies_ms.append((time.perf_counter() - c0) * 1000)
+                    if busy or (log >= 0 and done < log):
+                        checkpoints.incomplete += 1
+                checkpoints.wal_peak_bytes = max(checkpoints.wal_peak_bytes, _file_size(f"{path}-wal") or 0)
+            stats.latencies_ms.append((time.perf_counter() - t0) * 1000)
+    except sqlite3.Error as e:
+        stats.errors.append(str(e))
+    finally:
+        conn.close()
+
+
+def simulate_contention(db_path: PathLike, readers: int = READERS, duration: float = DURATION_S,
+                        busy_timeout_ms: int = APP_BUSY_TIMEOUT_MS, journal_mode: Optional[str] = None,
+                        seed: int = 0, cancelled: Optional[threading.Event] = None) -> dict:
+    """Readers and one writer on a copy of db_path for duration seconds
+
+    journal_mode defaults to the source's; wal_autocheckpoint is the value a
+    fresh connection gets, as the app's does.
+    """
+    state = journal_state(db_path)
+    mode = (journal_mode or state["journal_mode"]).lower()
+    timeout_s = busy_timeout_ms / 1000.0
+    with tempfile.TemporaryDirectory(prefix="aifs-contention-") as tmp:
+        target = os.path.join(tmp, "contention.db")
+        t0 = time.perf_counter()
+        backup_database(db_path, target)
+        copy_seconds = time.perf_counter() - t0
+        setup = sqlite3.connect(target)
+        try:
+            setup.execute(f"PRAGMA journal_mode={mode}")
+            keys, _ = sample_keys(setup, 1000, random.Random(seed))
+        finally:
+            setup.close()
+
+        stop = threading.Event()
+        reader_stats = [RoleStats("reader") for _ in range(max(1, readers))]
+        writer_stats = RoleStats("writer")
+        checkpoints = _Checkpoints()
+        threads = [threading.Thread(target=_reader, name=f"contention-reader-{i}",
+                                    args=(target, keys, timeout_s, seed + i + 1, stop, stats), daemon=True)
+                   for i, stats in enumerate(reader_stats)]
+        threads.append(threading.Thread(target=_writer, name="contention-writer",
+                                        args=(target, keys, timeout_s, state["wal_autocheckpoint"], seed,
+                                              stop, writer_stats, checkpoints), daemon=True))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        deadline = started + duration
+        while time.perf_counter() < deadline and not (cancelled is not None and cancelled.is_set()):
+            time.sleep(0.05)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=max(5.0, timeout_s + 1))
+        elapsed = time.perf_counter() - started
+
+    combined = RoleStats("reader")
+    for stats in reader_stats:
+        combined.merge(stats)
+    return {
+        "journal_mode": mode,
+        "busy_timeout_ms": busy_timeout_ms,
+        "readers": len(reader_stats),
+        "write_batch": WRITE_BATCH,
+        "duration_s": round(elapsed, 2),
+        "copy_seconds": round(copy_seconds, 3),
+        "sampled_keys": len(keys),
+        "reader": combined.summary(elapsed),
+        "writer": writer_stats.summary(elapsed),
+        "checkpoints": checkpoints.summary() if mode == "wal" else None,
+    }
@@ -0,0 +1,238 @@
+"""
+AI File Sorter - SQLite Workload Benchmark
+
+Replays the statement shapes DatabaseManager (app/lib/DatabaseManager.cpp)
+runs on the categorization database against a private copy of it, and
+reports p50/p95/p99 latency and throughput per query class:
+
+- categorization_lookup  cache lookup by (file_name, file_type, dir_path)
+- directory_listing      get_categorized_files(): all entries of one dir_path
+- alias_resolution       category_alias -> category_taxonomy join
+- confidence_join        file_categorization joined to confidence_scores
+- batched_upsert         insert_or_update_file_with_categorization() in
+                         transactions of batch_size rows
+
+Lookup keys are sampled from the database itself (by rowid, so sampling
+stays cheap on large tables) and mixed with keys that do not exist, since a
+categorization run sees both cache hits and misses. The copy is made with
+the online backup API, so the live database is never written to and a
+running application is not blocked for the whole copy (see snapshot.py).
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+from diagnostic_lib.dbutil import percentile
+from diagnostic_lib.snapshot import backup_database
+
+FILE_CATEGORIZATION_UPSERT = """
+    INSERT INTO file_categorization
+        (file_name, file_type, dir_path, category, subcategory, taxonomy_id, categorization_style, user_provided)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_name, file_type, dir_path)
+    DO UPDATE SET
+        category = excluded.category,
+        subcategory = excluded.subcategory,
+        taxonomy_id = excluded.taxonomy_id,
+        categorization_style = excluded.categorization_style,
+        user_provided = excluded.user_provided
+"""
+
+# (name, SQL) for every read query class; parameters come from the sampled keys
+READ_QUERIES = (
+    ("categorization_lookup",
+     "SELECT category, subcategory, taxonomy_id, categorization_style FROM file_categorization "
+     "WHERE file_name = ? AND file_type = ? AND dir_path = ?"),
+    ("directory_listing",
+     "SELECT dir_path, file_name, file_type, category, subcategory, taxonomy_id, categorization_style "
+     "FROM file_categorization WHERE dir_path = ?"),
+    ("alias_resolution",
+     "SELECT t.id, t.canonical_category, t.canonical_subcategory FROM category_alias a "
+     "JOIN category_taxonomy t ON t.id = a.taxonomy_id "
+     "WHERE a.alias_category_norm = ? AND a.alias_subcategory_norm = ?"),
+    ("confidence_join",
+     "SELECT f.category, f.subcategory, c.category_confidence, c.subcategory_confidence "
+     "FROM file_categorization f JOIN confidence_scores c "
+     "ON c.file_name = f.file_name AND c.file_type = f.file_type AND c.dir_path = f.dir_path "
+     "WHERE f.file_name = ? AND f.file_type = ? AND f.dir_path = ?"),
+)
+
+# Share of lookups that use keys which are not in the database
+MISS_RATIO = 0.2
+
+# p95 latency (ms) above which a query class deserves attention; for
+# batched_upsert one operation is a whole transaction
+P95_WARNING_MS = {
+    "categorization_lookup": 5.0,
+    "directory_listing": 50.0,
+    "alias_resolution": 5.0,
+    "confidence_join": 5.0,
+    "batched_upsert": 500.0,
+}
+
+
+class QueryClassResult:
+    """Latency distribution of one query class"""
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies_ms: List[float] = []
+        self.rows = 0  # Rows returned (reads) or written (upserts)
+        self.elapsed_s = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def operations(self) -> int:
+        return len(self.latencies_ms)
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies_ms)
+        return {
+            "query_class": self.name,
+            "operations": self.operations,
+            "rows": self.rows,
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "ops_per_sec": round(self.operations / self.elapsed_s, 1) if self.elapsed_s else 0.0,
+            "rows_per_sec": round(self.rows / self.elapsed_s, 1) if self.elapsed_s else 0.0,
+            "error": self.error,
+        }
+
+
+def _sample_rows(conn: sqlite3.Connection, table: str, columns: str, count: int,
+                 rng: random.Random) -> List[tuple]:
+    """Up to count rows picked at random rowids (no full-table ORDER BY RANDOM())"""
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if low is None:
+        return []
+    rows = []
+    statement = f"SELECT {columns} FROM {table} WHERE rowid >= ? LIMIT 1"
+    for _ in range(count):
+        row = conn.execute(statement, (rng.randint(low, high),)).fetchone()
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def _with_misses(keys: List[tuple], miss: Callable[[int], tuple], total: int,
+                 rng: random.Random) -> List[tuple]:
+    if not keys:
+        return [miss(i) for i in range(total)]
+    out = []
+    for i in range(total):
+        out.append(miss(i) if rng.random() < MISS_RATIO else keys[i % len(keys)])
+    return out
+
+
+def _time_reads(conn: sqlite3.Connection, result: QueryClassResult, sql: str,
+                params: List[tuple], deadline: float):
+    started = time.perf_counter()
+    try:
+        for p in params:
+            t0 = time.perf_counter()
+            result.rows += len(conn.execute(sql, p).fetchall())
+            result.latencies_ms.append((time.perf_counter() - t0) * 1000)
+            if t0 > deadline:
+                break
+    except sqlite3.Error as e:
+        result.error = str(e)
+    result.elapsed_s = time.perf_counter() - started
+
+
+def _time_upserts(conn: sqlite3.Connection, result: QueryClassResult, keys: List[tuple],
+                  batches: int, batch_size: int, rng: random.Random, deadline: float):
+    """Each latency sample is one committed transaction of batch_size upserts"""
+    started = time.perf_counter()
+    try:
+        for b in range(batches):
+            rows = []
+            for i in range(batch_size):
+                if keys and rng.random() >= MISS_RATIO:
+                    name, ftype, dir_path = keys[rng.randrange(len(keys))]
+                else:  # New file
+                    name, ftype, dir_path = f"__bench_{b}_{i}.bin", "F", "/__diagnostic_benchmark__"
+                rows.append((name, ftype, dir_path, "Benchmark", "Upsert", None, 0, 0))
+            t0 = time.perf_counter()
+            with conn:
+                conn.executemany(FILE_CATEGORIZATION_UPSERT, rows)
+            result.latencies_ms.append((time.perf_counter() - t0) * 1000)
+            result.rows += len(rows)
+            if t0 > deadline:
+                break
+    except sqlite3.Error as e:
+        result.error = str(e)
+    result.elapsed_s = time.perf_counter() - started
+
+
+def sample_keys(conn: sqlite3.Connection, count: int,
+                rng: random.Random) -> Tuple[List[tuple], List[tuple]]:
+    """(file keys, alias keys) sampled from the database for the read classes"""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    file_keys: List[tuple] = []
+    if "file_categorization" in tables:
+        file_keys = _sample_rows(conn, "file_categorization", "file_name, file_type, dir_path", count, rng)
+    alias_keys: List[tuple] = []
+    if "category_alias" in tables:
+        alias_keys = _sample_rows(conn, "category_alias",
+                                  "alias_category_norm, alias_subcategory_norm", count, rng)
+    return file_keys, alias_keys
+
+
+def run_reads(conn: sqlite3.Connection, file_keys: List[tuple], alias_keys: List[tuple],
+              operations: int, time_budget: float, rng: random.Random) -> List[dict]:
+    """Time every read query class; returns one summary per class"""
+    params = {
+        "categorization_lookup": _with_misses(
+            file_keys, lambda i: (f"__missing_{i}.txt", "F", "/__missing__"), operations, rng),
+        "directory_listing": [(k[2],) for k in _with_misses(
+            file_keys, lambda i: ("", "F", f"/__missing_dir_{i}"), operations, rng)],
+        "alias_resolution": _with_misses(
+            alias_keys, lambda i: (f"__missing_{i}", "__missing__"), operations, rng),
+        "confidence_join": _with_misses(
+            file_keys, lambda i: (f"__missing_{i}.txt", "F", "/__missing__"), operations, rng),
+    }
+    summaries = []
+    for name, sql in READ_QUERIES:
+        result = QueryClassResult(name)
+        _time_reads(conn, result, sql, params[name], time.perf_counter() + time_budget)
+        summaries.append(result.summary())
+    return summaries
+
+
+def run_workload(db_path: str, operations: int = 500, batch_size: int = 100,
+                 batches: int = 20, time_budget: float = 2.0, seed: int = 0,
+                 copy: bool = True) -> Tuple[List[dict], dict]:
+    """Benchmark every query class; returns (per-class summaries, run metadata)
+
+    time_budget bounds each class in seconds; operations and batches are
+    upper limits. With copy=False db_path is used directly (it must be a
+    disposable copy: the upsert class writes to it).
+    """
+    rng = random.Random(seed)
+    meta: dict = {"source": str(db_path), "operations": operations, "batch_size": batch_size}
+    with tempfile.TemporaryDirectory(prefix="aifs-dbbench-") as tmp:
+        target = str(db_path)
+        if copy:
+            target = os.path.join(tmp, "workload.db")
+            t0 = time.perf_counter()
+            backup_database(db_path, target)
+            meta["copy_seconds"] = round(time.perf_counter() - t0, 3)
+        meta["database_bytes"] = os.path.getsize(target)
+
+        conn = sqlite3.connect(target)
+        try:
+            file_keys, alias_keys = sample_keys(conn, min(operations, 1000), rng)
+            meta["sampled_keys"] = len(file_keys)
+            summaries = run_reads(conn, file_keys, alias_keys, operations, time_budget, rng)
+
+            result = QueryClassResult("batched_upsert")
+            _time_upserts(conn, result, file_keys, batches, batch_size, rng,
+                          time.perf_counter() + time_budget)
+            summaries.append(result.summary())
+        finally:
+            conn.close()
+    return summaries, meta
@@ -0,0 +1,36 @@
+"""
+AI File Sorter - SQLite Helpers
+
+Small helpers shared by the database analyses: read-only connections to a
+database that a running application may have open, identifier quoting and
+latency percentiles.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Sequence, Union
+
+PathLike = Union[str, Path]
+
+
+def readonly_uri(path: PathLike) -> str:
+    """file: URI opening path read-only (special characters are percent-encoded)"""
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+
+def connect_readonly(path: PathLike, timeout: float = 5.0) -> sqlite3.Connection:
+    """Open a database read-only, so diagnostics can never modify or create it"""
+    return sqlite3.connect(readonly_uri(path), uri=True, timeout=timeout)
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or index name taken from sqlite_master for use in SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
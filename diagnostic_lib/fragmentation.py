@@ -0,0 +1,269 @@
+"""
+AI File Sorter - Fragmentation and Maintenance Payoff
+
+The categorization cache churns (INSERT ... ON CONFLICT DO UPDATE and
+INSERT OR REPLACE on every re-sort), so over months the file collects free
+pages, half-empty B-tree pages and leaf pages scattered across the file.
+This module measures that and estimates what maintenance would buy:
+
+- file level: page_size, page_count, freelist_count, auto_vacuum
+- per B-tree (from dbstat, one aggregated pass under a time budget): pages,
+  unused bytes and the share of leaf-to-leaf steps that are not to the next
+  page on disk (fragmentation: what turns a sequential scan into random I/O)
+- VACUUM / VACUUM INTO: size after a rebuild, estimated as the used bytes of
+  every B-tree repacked into pages filled to VACUUM_FILL, and the share of
+  pages a full scan of each table would no longer read
+- ANALYZE / PRAGMA optimize: whether sqlite_stat1 exists and still matches
+  the table sizes
+- measure_maintenance() applies the actions to a backup-API snapshot and
+  times the benchmark read classes and full table scans before and after
+"""
+
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+
+from diagnostic_lib.dbutil import PathLike, quote_identifier
+
+# How full VACUUM leaves B-tree pages (measured ~97-99% on the app's tables)
+VACUUM_FILL = 0.95
+
+# Worth a WARNING when a VACUUM would reclaim this share of the file...
+RECLAIM_WARNING_RATIO = 0.2
+# ...and at least this many bytes
+RECLAIM_WARNING_BYTES = 8 * 1024 * 1024
+
+# sqlite_stat1 is stale when its row count is off by more than this factor
+STAT1_STALE_RATIO = 2.0
+
+MAINTENANCE_SQL = {
+    "vacuum": "VACUUM",
+    "analyze": "ANALYZE",
+    "optimize": "PRAGMA optimize",
+}
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+_PROGRESS_STEPS = 10000
+
+# Leaf pages are compared to the previous leaf of the same B-tree in key order
+_BTREE_PAGES = """
+    SELECT name, COUNT(*), SUM(pgsize), SUM(unused), SUM(pagetype = 'leaf'),
+           SUM(pagetype = 'leaf' AND prev_leaf IS NOT NULL AND pageno != prev_leaf + 1)
+    FROM (SELECT name, pagetype, pgsize, unused, pageno,
+                 LAG(pageno) OVER (PARTITION BY name, pagetype = 'leaf' ORDER BY path) AS prev_leaf
+          FROM dbstat)
+    GROUP BY name
+"""
+
+
+class BtreeUsage:
+    """Page usage of one table or index B-tree"""
+    def __init__(self, name: str, table: str, kind: str, pages: int, bytes_: int, unused: int,
+                 leaves: int, jumps: int, page_size: int):
+        self.name = name
+        self.table = table
+        self.kind = kind  # "table" or "index"
+        self.pages = pages
+        self.bytes = bytes_
+        self.unused = unused
+        self.leaves = leaves
+        self.jumps = jumps
+        self.pages_after_vacuum = min(pages, math.ceil((bytes_ - unused) / (page_size * VACUUM_FILL)))
+
+    @property
+    def fill(self) -> float:
+        return 1 - self.unused / self.bytes if self.bytes else 1.0
+
+    @property
+    def fragmentation(self) -> float:
+        """Share of leaf-to-leaf steps that are not to the adjacent page"""
+        return self.jumps / (self.leaves - 1) if self.leaves > 1 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "table": self.table,
+            "type": self.kind,
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "unused_bytes": self.unused,
+            "fill": round(self.fill, 3),
+            "fragmentation": round(self.fragmentation, 3),
+            "pages_after_vacuum": self.pages_after_vacuum,
+        }
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def btree_usage(conn: sqlite3.Connection, time_budget: float = 5.0) -> Optional[List[BtreeUsage]]:
+    """Per-B-tree usage from dbstat, largest first; None if dbstat is missing or too slow"""
+    owners = {name: (table, kind) for kind, name, table in conn.execute(
+        "SELECT type, name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')")}
+    page_size = _pragma(conn, "page_size")
+    deadline = time.perf_counter() + time_budget
+    conn.set_progress_handler(lambda: 1 if time.perf_counter() > deadline else 0, _PROGRESS_STEPS)
+    try:
+        rows = conn.execute(_BTREE_PAGES).fetchall()
+    except sqlite3.OperationalError:  # No dbstat, no window functions (< 3.25) or timed out
+        return None
+    finally:
+        conn.set_progress_handler(None, 0)
+    usage = []
+    for name, pages, size, unused, leaves, jumps in rows:
+        table, kind = owners.get(name, (name, "table"))  # sqlite_schema is not in sqlite_master
+        usage.append(BtreeUsage(name, table, kind, pages, size, unused, leaves, jumps, page_size))
+    return sorted(usage, key=lambda b: b.bytes, reverse=True)
+
+
+def _stat1_state(conn: sqlite3.Connection) -> dict:
+    """Whether the planner has statistics, and which tables they are stale for"""
+    indexed = []
+    for (table,) in conn.execute("SELECT DISTINCT tbl_name FROM sqlite_master "
+                                 "WHERE type = 'index' AND tbl_name NOT LIKE 'sqlite_%' ORDER BY 1"):
+        # ANALYZE records nothing for empty tables, so only tables with rows count
+        if conn.execute(f"SELECT 1 FROM {quote_identifier(table)} LIMIT 1").fetchone():
+            indexed.append(table)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        return {"present": False, "indexed_tables": indexed, "missing": indexed, "stale": []}
+    recorded: Dict[str, int] = {}
+    for table, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+        try:
+            recorded[table] = max(recorded.get(table, 0), int(str(stat).split()[0]))
+        except (ValueError, IndexError):
+            continue
+    stale = []
+    for table in indexed:
+        if table not in recorded:
+            continue
+        try:
+            low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {quote_identifier(table)}").fetchone()
+        except sqlite3.Error:  # WITHOUT ROWID
+            continue
+        actual = 0 if low is None else high - low + 1
+        small, large = sorted((max(actual, 1), max(recorded[table], 1)))
+        if large / small > STAT1_STALE_RATIO and large > 1000:
+            stale.append(table)
+    missing = [t for t in indexed if t not in recorded]
+    return {"present": True, "indexed_tables": indexed, "missing": missing, "stale": stale}
+
+
+def analyze_fragmentation(conn: sqlite3.Connection, time_budget: float = 5.0) -> dict:
+    """File-level and per-B-tree fragmentation plus maintenance payoff estimates"""
+    page_size = _pragma(conn, "page_size")
+    page_count = _pragma(conn, "page_count")
+    freelist = _pragma(conn, "freelist_count")
+    btrees = btree_usage(conn, time_budget)
+
+    report = {
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "database_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist,
+        "auto_vacuum": AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum"), "unknown"),
+        "btrees": None,
+        "vacuum": None,
+        "statistics": _stat1_state(conn),
+    }
+    if btrees is None:
+        # Without dbstat only the free pages are known to be reclaimable
+        report["vacuum"] = {
+            "bytes_after": page_size * (page_count - freelist),
+            "reclaimable_bytes": page_size * freelist,
+            "estimated_from": "freelist",
+            "tables": [],
+        }
+        return report
+
+    report["btrees"] = [b.to_dict() for b in btrees]
+    pages_after = sum(b.pages_after_vacuum for b in btrees)
+    tables = []
+    for b in btrees:
+        if b.kind != "table" or b.name.startswith("sqlite_") or b.pages < 8:
+            continue
+        tables.append({
+            "table": b.name,
+            "pages": b.pages,
+            "pages_after_vacuum": b.pages_after_vacuum,
+            "scan_pages_saved": round(1 - b.pages_after_vacuum / b.pages, 3),
+            "fragmentation": round(b.fragmentation, 3),
+        })
+    report["vacuum"] = {
+        "bytes_after": page_size * pages_after,
+        "reclaimable_bytes": max(0, page_size * (page_count - pages_after)),
+        "estimated_from": "dbstat",
+        "tables": tables,
+    }
+    return report
+
+
+def recommended_actions(report: dict) -> List[str]:
+    """Maintenance actions (keys of MAINTENANCE_SQL) worth running, cheapest first"""
+    actions = []
+    stats = report["statistics"]
+    if stats["missing"] or stats["stale"]:
+        actions.append("optimize" if stats["present"] else "analyze")
+    vacuum = report["vacuum"]
+    if vacuum and vacuum["reclaimable_bytes"] >= RECLAIM_WARNING_BYTES and \
+            vacuum["reclaimable_bytes"] >= RECLAIM_WARNING_RATIO * report["database_bytes"]:
+        actions.append("vacuum")
+    return actions
+
+
+def _time_scans(conn: sqlite3.Connection, tables: Sequence[str]) -> Dict[str, float]:
+    """Milliseconds for a full scan of each table's B-tree"""
+    timings = {}
+    for table in tables:
+        t0 = time.perf_counter()
+        conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)} NOT INDEXED").fetchone()
+        timings[table] = round((time.perf_counter() - t0) * 1000, 3)
+    return timings
+
+
+def measure_maintenance(db_path: PathLike, actions: Sequence[str], scan_tables: Sequence[str] = (),
+                        operations: int = 300, time_budget: float = 1.0, seed: int = 0) -> dict:
+    """Apply actions to a snapshot of db_path and compare size, query latency and scans"""
+    from diagnostic_lib.dbbench import run_reads, sample_keys
+    from diagnostic_lib.snapshot import backup_database
+
+    result: dict = {"actions": list(actions), "action_seconds": {}}
+    with tempfile.TemporaryDirectory(prefix="aifs-maintenance-") as tmp:
+        target = os.path.join(tmp, "maintenance.db")
+        backup_database(db_path, target)
+
+        def measure(keys) -> dict:
+            conn = sqlite3.connect(target)  # Fresh connection: no pages cached from before
+            try:
+                return {
+                    "bytes": os.path.getsize(target),
+                    "query_classes": run_reads(conn, keys[0], keys[1], operations,
+                                               time_budget, random.Random(seed)),
+                    "scan_ms": _time_scans(conn, scan_tables),
+                }
+            finally:
+                conn.close()
+
+        conn = sqlite3.connect(target)
+        try:
+            keys = sample_keys(conn, min(operations, 1000), random.Random(seed))
+        finally:
+            conn.close()
+        result["before"] = measure(keys)
+
+        conn = sqlite3.connect(target, isolation_level=None)  # VACUUM cannot run in a transaction
+        try:
+            for action in actions:
+                t0 = time.perf_counter()
+                conn.execute(MAINTENANCE_SQL[action])
+                result["action_seconds"][action] = round(time.perf_counter() - t0, 3)
+        finally:
+            conn.close()
+        result["after"] = measure(keys)
+    return result
@@ -0,0 +1,150 @@
+"""
+AI File Sorter - Shared Single-Pass Tree Walker
+
+One os.scandir() pass per directory collects file counts, byte totals and
+per-extension totals, reusing the stat information cached on each DirEntry.
+Results are memoized for every directory visited (not just the one asked
+for), so once app/lib has been walked, app/lib/ggml/* and
+app/lib/precompiled/* are answered from the cache by any later check.
+
+A TreeWalker is meant to live for one diagnostic run; create a new one to
+see fresh data. It is safe to share between check threads: concurrent
+requests for the same tree wait for a single walk, while walks of different
+trees run in parallel (no lock is held during I/O).
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+
+class TreeStats:
+    """Aggregated file statistics for one directory tree"""
+    def __init__(self, path: str):
+        self.path = path
+        self.exists = True
+        self.file_count = 0
+        self.total_bytes = 0
+        self.by_extension: Dict[str, List[int]] = {}         # ext -> [count, bytes], whole tree
+        self.direct_by_extension: Dict[str, List[int]] = {}  # ext -> [count, bytes], top level only
+        self.subdirs: List[str] = []  # Names of immediate subdirectories
+        self.errors = 0  # Entries that could not be read
+
+    def direct_files(self, *extensions: str) -> Tuple[int, int]:
+        """Count and total size of top-level files with the given extensions"""
+        count = size = 0
+        for ext in extensions:
+            totals = self.direct_by_extension.get(ext.lower())
+            if totals:
+                count += totals[0]
+                size += totals[1]
+        return count, size
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "files": self.file_count,
+            "bytes": self.total_bytes,
+            "by_extension": {ext: {"files": c, "bytes": b} for ext, (c, b) in sorted(self.by_extension.items())},
+        }
+
+
+def _add(totals: Dict[str, List[int]], ext: str, count: int, size: int):
+    entry = totals.get(ext)
+    if entry is None:
+        totals[ext] = [count, size]
+    else:
+        entry[0] += count
+        entry[1] += size
+
+
+def _merge(parent: TreeStats, child: TreeStats):
+    """Add a subdirectory's whole-tree totals to its parent"""
+    parent.file_count += child.file_count
+    parent.total_bytes += child.total_bytes
+    parent.errors += child.errors
+    for ext, (count, size) in child.by_extension.items():
+        _add(parent.by_extension, ext, count, size)
+
+
+class TreeWalker:
+    """Per-run memoizing os.scandir() tree walker shared by all checks"""
+
+    def __init__(self):
+        self._cache: Dict[str, TreeStats] = {}
+        self._walking: Dict[str, threading.Lock] = {}  # Requested root -> lock held while walking it
+        self._lock = threading.Lock()  # Guards the two dicts only, never held during I/O
+
+    def stats(self, path: PathLike) -> TreeStats:
+        """Return statistics for the tree rooted at path, walking it at most once"""
+        key = os.path.abspath(str(path))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            walking = self._walking.setdefault(key, threading.Lock())
+        # Threads asking for the same tree wait for one walk; other trees proceed
+        with walking:
+            cached = self._cached(key)
+            return cached if cached is not None else self._walk(key)
+
+    def _cached(self, key: str) -> Optional[TreeStats]:
+        with self._lock:
+            return self._cache.get(key)
+
+    def _publish(self, stats: TreeStats) -> TreeStats:
+        """Cache a finished directory; a concurrent walk that got there first wins"""
+        with self._lock:
+            return self._cache.setdefault(stats.path, stats)
+
+    def _walk(self, root: str) -> TreeStats:
+        """Post-order walk with an explicit stack, so tree depth is not bounded by recursion"""
+        stack = [self._scan(root)]
+        while True:
+            stats, pending = stack[-1]
+            child_path = next(pending, None)
+            if child_path is not None:
+                child = self._cached(child_path)
+                if child is None:
+                    stack.append(self._scan(child_path))
+                else:
+                    _merge(stats, child)
+                continue
+            stack.pop()
+            stats = self._publish(stats)
+            if not stack:
+                return stats
+            _merge(stack[-1][0], stats)
+
+    @staticmethod
+    def _scan(key: str) -> Tuple[TreeStats, Iterator[str]]:
+        """One directory's own files, plus the subdirectories still to be walked"""
+        stats = TreeStats(key)
+        children: List[str] = []
+        try:
+            with os.scandir(key) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            children.append(entry.path)
+                            stats.subdirs.append(entry.name)
+                        elif entry.is_file():
+                            size = entry.stat().st_size
+                            ext = os.path.splitext(entry.name)[1].lower()
+                            stats.file_count += 1
+                            stats.total_bytes += size
+                            _add(stats.by_extension, ext, 1, size)
+                            _add(stats.direct_by_extension, ext, 1, size)
+                    except OSError:
+                        stats.errors += 1
+        except FileNotFoundError:
+            stats.exists = False
+            children = []
+        except OSError:
+            stats.errors += 1
+            children = []
+        stats.subdirs.sort()
+        return stats, iter(children)
@@ -0,0 +1,159 @@
+"""
+AI File Sorter - Categorization Cache Hit-Rate Estimate
+
+Before sorting a folder, estimates how much of it the categorization cache
+already answers. The folder is listed the way FileScanner does (one level,
+junk files and hidden entries skipped, macOS bundles counted as files) and
+the listing is matched against file_categorization in bulk: it is loaded
+into a TEMP table and both cache lookups the app makes are answered by a
+single statement, each as an index probe on the UNIQUE(file_name,
+file_type, dir_path) index instead of one query per file.
+
+The two lookups, as MainApp::perform_analysis() makes them:
+
+- folder cache: a row for the same file_name in this dir_path with a
+  non-empty category and subcategory (rows with empty labels are pruned
+  first); the file is skipped entirely
+- name cache: CategorizationService::try_cached_categorization() reuses a
+  row with the same file_name and file_type from any directory
+
+Everything else needs an LLM call. Its cost is estimated from the last
+RATE_WINDOW_DAYS days of api_usage_tracking for the configured provider.
+The app does not record how long a call takes, so time uses
+SECONDS_PER_CALL. The app's whitelist validation of cached labels is not
+replayed, so the hit rate is an upper bound.
+"""
+
+import os
+import sqlite3
+import stat
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Mirrors FileScanner::is_junk_file() and is_file_bundle()
+JUNK_FILES = frozenset({".DS_Store", "Thumbs.db", "desktop.ini"})
+BUNDLE_EXTENSIONS = frozenset({
+    ".app", ".utm", ".vmwarevm", ".pvm", ".vbox", ".pkg", ".mpkg",
+    ".prefpane", ".plugin", ".framework", ".kext", ".qlgenerator",
+    ".mdimporter", ".wdgt", ".scptd", ".nib", ".xib",
+})
+
+RATE_WINDOW_DAYS = 30
+
+# Settings "LLMChoice" -> api_usage_tracking provider (None: local model, no API cost)
+PROVIDERS = {"Remote": "openai", "Gemini": "gemini", "Local_3b": None, "Local_7b": None, "Custom": None}
+
+# Rough wall-clock seconds per categorization call. GeminiClient throttles the
+# free tier to 15 requests per minute; local models depend on the hardware.
+SECONDS_PER_CALL = {"openai": 2.0, "gemini": 4.0, None: 6.0}
+
+_LOOKUP = """
+    SELECT COUNT(*),
+           IFNULL(SUM(folder_hit), 0),
+           IFNULL(SUM(NOT folder_hit AND name_hit), 0)
+    FROM (
+        SELECT EXISTS (SELECT 1 FROM file_categorization f
+                       WHERE f.file_name = l.file_name AND f.dir_path IN ({dirs})
+                         AND TRIM(IFNULL(f.category, '')) != ''
+                         AND TRIM(IFNULL(f.subcategory, '')) != '') AS folder_hit,
+               EXISTS (SELECT 1 FROM file_categorization f
+                       WHERE f.file_name = l.file_name AND f.file_type = l.file_type
+                         AND TRIM(IFNULL(f.category, '')) != ''
+                         AND TRIM(IFNULL(f.subcategory, '')) != '') AS name_hit
+        FROM temp.hit_rate_listing l
+    )
+"""
+
+_RATES = """
+    SELECT COUNT(*), SUM(requests_made), SUM(tokens_used), SUM(cost_estimate)
+    FROM api_usage_tracking
+    WHERE provider = ? AND date >= DATE('now', ?)
+"""
+
+
+def _is_hidden(entry: os.DirEntry) -> bool:
+    if sys.platform == "win32":
+        attributes = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+        return bool(attributes & stat.FILE_ATTRIBUTE_HIDDEN)
+    return entry.name.startswith(".")
+
+
+def list_folder(folder: str, files: bool = True, directories: bool = False,
+                hidden: bool = False) -> List[Tuple[str, str]]:
+    """(file_name, file_type) pairs FileScanner::get_directory_entries() would return"""
+    entries = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name in JUNK_FILES or (not hidden and _is_hidden(entry)):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                bundle = is_dir and os.path.splitext(entry.name)[1].lower() in BUNDLE_EXTENSIONS
+                if files and (bundle or entry.is_file()):
+                    entries.append((entry.name, "F"))
+                elif directories and is_dir and not bundle:
+                    entries.append((entry.name, "D"))
+            except OSError:
+                continue
+    return entries
+
+
+def folder_keys(folder: str) -> List[str]:
+    """dir_path values the app may have stored for this folder"""
+    keys = [folder, folder.rstrip("/\\") or folder, os.path.abspath(folder)]
+    return list(dict.fromkeys(keys))
+
+
+def usage_rates(conn: sqlite3.Connection, provider: str, days: int = RATE_WINDOW_DAYS) -> Optional[dict]:
+    """Per-request tokens and cost of a provider over the last days; None without usage"""
+    try:
+        row = conn.execute(_RATES, (provider, f"-{int(days)} days")).fetchone()
+    except sqlite3.OperationalError:  # Older database without api_usage_tracking
+        return None
+    usage_days, requests, tokens, cost = row
+    if not requests:
+        return None
+    return {
+        "provider": provider,
+        "days": usage_days,
+        "requests": requests,
+        "tokens_per_request": (tokens or 0) / requests,
+        "cost_per_request": (cost or 0.0) / requests,
+    }
+
+
+def estimate_hit_rate(conn: sqlite3.Connection, folder: str, entries: Sequence[Tuple[str, str]],
+                      llm_choice: Optional[str] = None) -> dict:
+    """Cache hits, LLM calls, time and cost of sorting the listed entries of folder"""
+    dirs = folder_keys(folder)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS hit_rate_listing (file_name TEXT, file_type TEXT)")
+    try:
+        conn.execute("DELETE FROM temp.hit_rate_listing")
+        conn.executemany("INSERT INTO temp.hit_rate_listing VALUES (?, ?)", entries)
+        total, folder_hits, name_hits = conn.execute(
+            _LOOKUP.format(dirs=", ".join("?" * len(dirs))), dirs).fetchone()
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.hit_rate_listing")
+
+    provider = PROVIDERS.get(llm_choice or "")
+    misses = total - folder_hits - name_hits
+    rates = usage_rates(conn, provider) if provider else None
+    estimate: Dict[str, object] = {
+        "folder": folder,
+        "entries": total,
+        "folder_cache_hits": folder_hits,
+        "name_cache_hits": name_hits,
+        "hit_rate": round((folder_hits + name_hits) / total, 4) if total else None,
+        "llm_calls": misses,
+        "llm_choice": llm_choice,
+        "provider": provider or "local",
+        "seconds_per_call": SECONDS_PER_CALL[provider],
+        "estimated_seconds": round(misses * SECONDS_PER_CALL[provider], 1),
+        "rates": rates,
+        "estimated_tokens": None,
+        "estimated_cost": 0.0 if provider is None else None,
+    }
+    if rates:
+        estimate["estimated_tokens"] = round(misses * rates["tokens_per_request"])
+        estimate["estimated_cost"] = round(misses * rates["cost_per_request"], 4)
+    return estimate
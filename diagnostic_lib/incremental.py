@@ -0,0 +1,135 @@
+"""
+AI File Sorter - Incremental Diagnostics State
+
+Fingerprints the inputs of each check (mtime/size/inode of files and
+directories) and remembers the results a check produced for that
+fingerprint. On the next run a check whose fingerprint is unchanged can
+replay its stored results instead of doing the work again.
+
+Input kinds:
+- FILE: stat of a single file
+- DIR:  stat of a directory plus every entry directly inside it
+- TREE: stat of every directory in a tree (detects added, removed or renamed
+        entries anywhere below it without stat-ing each file)
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+FILE = "file"
+DIR = "dir"
+TREE = "tree"
+
+STATE_VERSION = 2
+
+PathLike = Union[str, Path]
+
+
+def _stat_key(st: os.stat_result) -> Tuple[int, int, int, int]:
+    return (st.st_mtime_ns, st.st_size, st.st_ino, st.st_mode)
+
+
+def _fingerprint_dir(path: str, out: list):
+    with os.scandir(path) as entries:
+        items = []
+        for entry in entries:
+            try:
+                items.append((entry.name, _stat_key(entry.stat())))
+            except OSError:
+                items.append((entry.name, None))
+    out.extend(sorted(items))
+
+
+def _fingerprint_tree(root: str, out: list):
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            out.append((os.path.relpath(path, root), _stat_key(os.stat(path))))
+            with os.scandir(path) as entries:
+                stack.extend(sorted(
+                    (e.path for e in entries if e.is_dir(follow_symlinks=False)),
+                    reverse=True
+                ))
+        except OSError:
+            out.append((os.path.relpath(path, root), None))
+
+
+def fingerprint(inputs: Iterable[Tuple[str, PathLike]], context: str = "") -> str:
+    """Hash the current state of a check's inputs"""
+    parts: list = [context]
+    for kind, path in inputs:
+        path = str(path)
+        parts.append((kind, path))
+        try:
+            parts.append(_stat_key(os.stat(path)))
+        except OSError:
+            parts.append("missing")
+            continue
+        try:
+            if kind == DIR:
+                _fingerprint_dir(path, parts)
+            elif kind == TREE:
+                _fingerprint_tree(path, parts)
+        except OSError:
+            parts.append("unreadable")
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+class IncrementalState:
+    """Stored per-check fingerprints and results from earlier runs"""
+
+    def __init__(self, path: PathLike, max_age: Optional[datetime.timedelta] = None):
+        self.path = Path(path)
+        self.max_age = max_age  # Entries older than this are never reused
+        self._lock = threading.Lock()
+        self._checks: dict = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self._checks = data.get("checks", {})
+        except (OSError, ValueError):
+            pass
+
+    def lookup(self, name: str, fp: str) -> Optional[dict]:
+        """Stored entry for a check if its fingerprint still matches"""
+        with self._lock:
+            entry = self._checks.get(name)
+        if not entry or entry.get("fingerprint") != fp:
+            return None
+        if self.max_age is not None:
+            try:
+                recorded = datetime.datetime.fromisoformat(entry["recorded_at"])
+            except (KeyError, ValueError):
+                return None
+            if datetime.datetime.now() - recorded > self.max_age:
+                return None
+        return entry
+
+    def store(self, name: str, fp: str, lines: List[Tuple[str, str]], results: List[dict],
+              report: Optional[dict] = None):
+        """Remember a freshly computed check's output (and report sections) for its fingerprint"""
+        with self._lock:
+            self._checks[name] = {
+                "fingerprint": fp,
+                "recorded_at": datetime.datetime.now().isoformat(),
+                "lines": [list(line) for line in lines],
+                "results": results,
+                "report": report or {},
+            }
+
+    def save(self):
+        """Atomically write the state file"""
+        with self._lock:
+            data = {"version": STATE_VERSION, "checks": self._checks}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
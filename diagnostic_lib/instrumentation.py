@@ -0,0 +1,55 @@
+"""
+AI File Sorter - Check Instrumentation
+
+Measures how long each check takes. Wall time always comes from
+time.perf_counter(); CPU time (time.thread_time(), so it is attributed to
+the check's own worker thread) and peak RSS growth are optional because
+they cost extra system calls.
+
+Peak RSS is a process-wide high-water mark: the delta is only attributable
+to a single check when checks run one at a time (--jobs 1).
+"""
+
+import sys
+import time
+from typing import Optional
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Process peak resident set size in KiB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux/BSD report kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class CheckTimer:
+    """Context manager timing one check"""
+
+    def __init__(self, track_resources: bool = False):
+        self.track_resources = track_resources
+        self.wall_ms: Optional[float] = None
+        self.cpu_ms: Optional[float] = None
+        self.peak_rss_delta_kb: Optional[int] = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self._rss_start: Optional[int] = None
+
+    def __enter__(self) -> "CheckTimer":
+        if self.track_resources:
+            self._cpu_start = time.thread_time()
+            self._rss_start = peak_rss_kb()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        if self.track_resources:
+            self.cpu_ms = (time.thread_time() - self._cpu_start) * 1000
+            rss_end = peak_rss_kb()
+            if self._rss_start is not None and rss_end is not None:
+                self.peak_rss_delta_kb = rss_end - self._rss_start
+        return False
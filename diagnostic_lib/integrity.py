@@ -0,0 +1,145 @@
+"""
+AI File Sorter - Database Integrity Checks
+
+Tiered integrity checking that is safe next to a running sorter:
+
+- quick    PRAGMA quick_check(N): verifies B-tree structure and record
+           format but not that indexes match their tables; roughly linear
+           in the file size
+- bounded  PRAGMA integrity_check(N): the full set of checks, stopping
+           after N problems (SQLite bounds integrity_check by problems
+           found, not by pages)
+- full     PRAGMA integrity_check with no limit on reported problems
+
+Every mode runs over a read-only file: URI connection, so it never takes a
+write lock or creates a journal, and is interrupted through SQLite's
+progress handler once the time budget is spent or the caller asks to stop.
+With snapshot=True the check runs on a private copy made with the online
+backup API; the copy preserves page contents, so corruption is still found,
+while the live file is only read for as long as the copy takes.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable, List, Optional
+
+from diagnostic_lib.dbutil import PathLike, connect_readonly
+
+MODES = ("quick", "bounded", "full")
+DEFAULT_MAX_ERRORS = 100
+
+# Progress handler granularity (SQLite VM instructions between checks)
+_PROGRESS_STEPS = 20000
+
+
+class IntegrityReport:
+    """Outcome of one integrity check"""
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.ok: Optional[bool] = None  # None when the check did not finish
+        self.problems: List[str] = []
+        self.elapsed_s = 0.0
+        self.snapshot_s: Optional[float] = None  # Time spent copying, with snapshot=True
+        self.interrupted: Optional[str] = None  # "time budget" or "cancelled"
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "ok": self.ok,
+            "problems": list(self.problems),
+            "elapsed_s": round(self.elapsed_s, 3),
+            "snapshot_s": None if self.snapshot_s is None else round(self.snapshot_s, 3),
+            "interrupted": self.interrupted,
+            "error": self.error,
+        }
+
+
+def integrity_pragma(mode: str, max_errors: int = DEFAULT_MAX_ERRORS) -> str:
+    if mode == "quick":
+        return f"PRAGMA quick_check({int(max_errors)})"
+    if mode == "bounded":
+        return f"PRAGMA integrity_check({int(max_errors)})"
+    if mode == "full":
+        return "PRAGMA integrity_check(2147483647)"
+    raise ValueError(f"unknown integrity mode: {mode}")
+
+
+def _run(conn: sqlite3.Connection, report: IntegrityReport, max_errors: int,
+         deadline: Optional[float], progress: Optional[Callable[[float], Optional[bool]]],
+         progress_interval: float):
+    started = time.perf_counter()
+    next_report = started + progress_interval
+
+    def handler() -> int:
+        nonlocal next_report
+        now = time.perf_counter()
+        if deadline is not None and now > deadline:
+            report.interrupted = "time budget"
+            return 1
+        if progress is not None and now >= next_report:
+            next_report = now + progress_interval
+            if progress(now - started):
+                report.interrupted = "cancelled"
+                return 1
+        return 0
+
+    conn.set_progress_handler(handler, _PROGRESS_STEPS)
+    try:
+        rows = [row[0] for row in conn.execute(integrity_pragma(report.mode, max_errors))]
+    except sqlite3.OperationalError as e:
+        if report.interrupted is None:
+            report.error = str(e)
+        return
+    finally:
+        conn.set_progress_handler(None, 0)
+    report.ok = rows == ["ok"]
+    if not report.ok:
+        # A row can hold several newline-separated problems after a "*** in database ***" header
+        report.problems = [line for row in rows for line in str(row).splitlines()
+                           if line and not line.startswith("***")]
+
+
+def check_integrity(db_path: PathLike, mode: str = "quick", max_errors: int = DEFAULT_MAX_ERRORS,
+                    time_budget: Optional[float] = 30.0, snapshot: bool = False,
+                    progress: Optional[Callable[[float], Optional[bool]]] = None,
+                    progress_interval: float = 5.0) -> IntegrityReport:
+    """Run one integrity check tier against db_path (or a snapshot of it)
+
+    time_budget (seconds, None for unlimited) covers the snapshot copy and
+    the check. progress(elapsed_seconds) is called about every
+    progress_interval seconds while the check runs; returning True stops it.
+    """
+    report = IntegrityReport(mode)
+    integrity_pragma(mode)  # Reject unknown modes before touching the file
+    started = time.perf_counter()
+    deadline = None if time_budget is None else started + time_budget
+    try:
+        if snapshot:
+            from diagnostic_lib.snapshot import SnapshotTimeout, backup_database
+            with tempfile.TemporaryDirectory(prefix="aifs-integrity-") as tmp:
+                target = os.path.join(tmp, "snapshot.db")
+                try:
+                    backup_database(db_path, target, time_budget=time_budget)
+                except SnapshotTimeout:
+                    report.interrupted = "time budget"
+                    report.elapsed_s = time.perf_counter() - started
+                    return report
+                report.snapshot_s = time.perf_counter() - started
+                conn = connect_readonly(target)
+                try:
+                    _run(conn, report, max_errors, deadline, progress, progress_interval)
+                finally:
+                    conn.close()
+        else:
+            conn = connect_readonly(db_path)
+            try:
+                _run(conn, report, max_errors, deadline, progress, progress_interval)
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        report.error = str(e)
+    report.elapsed_s = time.perf_counter() - started
+    return report
@@ -0,0 +1,178 @@
+"""
+AI File Sorter - Reverse Log Tail
+
+Log previews only need the end of a file, and the app's logs can grow to
+gigabytes. This module reads a file backwards from its end in BLOCK_SIZE
+blocks, so the memory used depends on how many lines are returned, not on
+the size of the file:
+
+- lines are split on b"\\n" before decoding; that byte never occurs inside a
+  UTF-8 multi-byte sequence, so a character split across two blocks is
+  always rejoined before it is decoded. "\\r\\n" endings are handled
+- a single line longer than max_line_bytes keeps only its last
+  max_line_bytes (prefixed with "…") instead of growing without bound
+- tail_lines(..., min_level="error") keeps only spdlog entries at that level
+  or above; max_scan_bytes bounds how far back such a search goes
+- summarize_levels() counts the entries per level at the end of a file and
+  recent_entries() merges the newest matching entries of several files by
+  timestamp
+
+spdlog's default pattern, which the app's loggers use, is
+"[2025-01-31 12:00:00.000] [core_logger] [error] message"; ErrorReporter
+leaves out the logger name. Lines without a level are continuations of the
+entry above them and are not counted.
+"""
+
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from diagnostic_lib.dbutil import PathLike
+
+BLOCK_SIZE = 64 * 1024
+MAX_LINE_BYTES = 16 * 1024
+
+# spdlog level names, lowest first
+LEVELS = ("trace", "debug", "info", "warning", "error", "critical")
+_LEVEL_ALIASES = {"warn": "warning", "err": "error"}
+
+_LEVEL = re.compile(r"\[(trace|debug|info|warning|warn|error|err|critical)\]", re.I)
+_TIMESTAMP = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?)\]")
+
+
+def line_level(line: str) -> Optional[str]:
+    """spdlog level of a log line, or None for lines without one (continuations)"""
+    match = _LEVEL.search(line, 0, 128)  # The level is in the prefix
+    if match is None:
+        return None
+    name = match.group(1).lower()
+    return _LEVEL_ALIASES.get(name, name)
+
+
+def line_timestamp(line: str) -> Optional[str]:
+    """The "YYYY-MM-DD HH:MM:SS.mmm" prefix of an spdlog line (sortable as text)"""
+    match = _TIMESTAMP.match(line)
+    return match.group(1) if match else None
+
+
+def level_at_least(level: Optional[str], minimum: str) -> bool:
+    return level is not None and LEVELS.index(level) >= LEVELS.index(_LEVEL_ALIASES.get(minimum, minimum))
+
+
+def _decode(data: bytes, truncated: bool, encoding: str) -> str:
+    if truncated:
+        # The kept tail may start inside a multi-byte character
+        start = 0
+        while start < min(3, len(data)) and 0x80 <= data[start] < 0xC0:
+            start += 1
+        return "…" + data[start:].decode(encoding, errors="replace")
+    return data.decode(encoding, errors="replace")
+
+
+def iter_lines_reverse(path: PathLike, block_size: int = BLOCK_SIZE, max_line_bytes: int = MAX_LINE_BYTES,
+                       max_scan_bytes: Optional[int] = None, encoding: str = "utf-8") -> Iterator[str]:
+    """Lines of a file from the last to the first, without line endings"""
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        stop = 0 if max_scan_bytes is None else max(0, position - max_scan_bytes)
+        carry = b""  # End of the line whose start has not been read yet
+        truncated = False
+        last = True  # The text after the final newline; empty when the file ends with one
+        while position > stop:
+            size = min(block_size, position - stop)
+            position -= size
+            f.seek(position)
+            pieces = f.read(size).split(b"\n")
+            pieces[-1] += carry
+            for piece in reversed(pieces[1:]):
+                if last and not piece:
+                    last = False
+                    continue
+                last = False
+                if len(piece) > max_line_bytes:
+                    piece, truncated = piece[-max_line_bytes:], True
+                yield _decode(piece.rstrip(b"\r"), truncated, encoding)
+                truncated = False
+            carry = pieces[0]
+            if len(carry) > max_line_bytes:
+                carry, truncated = carry[-max_line_bytes:], True
+        if carry or (position == 0 and not last):
+            # First line of the file, or a line cut off by max_scan_bytes
+            yield _decode(carry.rstrip(b"\r"), truncated or position > 0, encoding)
+
+
+def tail_lines(path: PathLike, count: int, min_level: Optional[str] = None,
+               max_scan_bytes: Optional[int] = None, block_size: int = BLOCK_SIZE,
+               encoding: str = "utf-8") -> List[str]:
+    """Last count lines of a file (at min_level or above when given), oldest first"""
+    lines: List[str] = []
+    if count <= 0:
+        return lines
+    for line in iter_lines_reverse(path, block_size, max_scan_bytes=max_scan_bytes, encoding=encoding):
+        if min_level is not None and not level_at_least(line_level(line), min_level):
+            continue
+        lines.append(line)
+        if len(lines) >= count:
+            break
+    lines.reverse()
+    return lines
+
+
+def tail_bytes(path: PathLike, count: int, encoding: str = "utf-8") -> str:
+    """Last count bytes of a file, decoded; a character cut at the start is dropped"""
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        start = max(0, end - count)
+        f.seek(start)
+        data = f.read(end - start)
+    skip = 0
+    if start > 0:
+        while skip < min(3, len(data)) and 0x80 <= data[skip] < 0xC0:
+            skip += 1
+    return data[skip:].decode(encoding, errors="replace")
+
+
+class LevelSummary:
+    """Entries per spdlog level in (the end of) one log file"""
+    def __init__(self, path: PathLike):
+        self.path = str(path)
+        self.counts: Dict[str, int] = {level: 0 for level in LEVELS}
+        self.newest: Dict[str, Optional[str]] = {level: None for level in LEVELS}  # Timestamp per level
+        self.complete = True  # False when max_scan_bytes stopped before the start of the file
+
+    def at_least(self, minimum: str) -> int:
+        return sum(n for level, n in self.counts.items() if level_at_least(level, minimum))
+
+    def newest_at_least(self, minimum: str) -> Optional[str]:
+        stamps = [t for level, t in self.newest.items() if t and level_at_least(level, minimum)]
+        return max(stamps) if stamps else None
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "counts": dict(self.counts), "newest": dict(self.newest),
+                "complete": self.complete}
+
+
+def summarize_levels(path: PathLike, max_scan_bytes: Optional[int] = None) -> LevelSummary:
+    """Count the spdlog entries per level, reading backwards from the end"""
+    summary = LevelSummary(path)
+    if max_scan_bytes is not None:
+        summary.complete = os.path.getsize(path) <= max_scan_bytes
+    for line in iter_lines_reverse(path, max_scan_bytes=max_scan_bytes):
+        level = line_level(line)
+        if level is None:
+            continue
+        summary.counts[level] += 1
+        if summary.newest[level] is None:
+            summary.newest[level] = line_timestamp(line)
+    return summary
+
+
+def recent_entries(paths: Sequence[PathLike], count: int, min_level: Optional[str] = None,
+                   max_scan_bytes: Optional[int] = None) -> List[Tuple[str, str]]:
+    """(path, line) of the newest count entries across several logs, oldest first"""
+    found = []
+    for order, path in enumerate(paths):
+        for position, line in enumerate(tail_lines(path, count, min_level, max_scan_bytes)):
+            found.append((line_timestamp(line) or "", -order, position, str(path), line))
+    found.sort()
+    return [(path, line) for _, _, _, path, line in found[-count:]] if count > 0 else []
@@ -0,0 +1,150 @@
+"""
+AI File Sorter - Referential Consistency Scanner
+
+DatabaseManager declares foreign keys but never enables PRAGMA foreign_keys,
+and some relationships are not declared at all, so nothing stops rows from
+pointing at parents that no longer exist. This module finds such orphans
+with one set-based anti-join per relationship (NOT EXISTS against the
+parent's primary key or unique index, so each child row costs one index
+probe inside SQLite and nothing is looped over in Python), reports counts
+and sample keys, and can write a reviewable cleanup script built from the
+same anti-joins.
+"""
+
+import datetime
+import sqlite3
+import time
+from typing import List, Optional, Sequence
+
+from diagnostic_lib.dbutil import quote_identifier
+
+SAMPLE_KEYS = 5
+
+_PROGRESS_STEPS = 20000
+
+
+class Relationship:
+    """child(child_columns) must match a row of parent(parent_columns)"""
+    def __init__(self, name: str, child: str, child_columns: Sequence[str], parent: str,
+                 parent_columns: Sequence[str], cleanup: str = "delete"):
+        self.name = name
+        self.child = child
+        self.child_columns = tuple(child_columns)
+        self.parent = parent
+        self.parent_columns = tuple(parent_columns)
+        self.cleanup = cleanup  # "delete" the child row or "nullify" its reference
+
+    def orphan_condition(self, child_ref: str) -> str:
+        """WHERE clause selecting orphans; child_ref names the child table in the outer query"""
+        not_null = " AND ".join(f"{child_ref}.{c} IS NOT NULL" for c in self.child_columns)
+        match = " AND ".join(f"p.{pc} = {child_ref}.{cc}"
+                             for cc, pc in zip(self.child_columns, self.parent_columns))
+        return (f"{not_null} AND NOT EXISTS "
+                f"(SELECT 1 FROM {quote_identifier(self.parent)} p WHERE {match})")
+
+    def cleanup_sql(self) -> str:
+        table = quote_identifier(self.child)
+        if self.cleanup == "nullify":
+            assignments = ", ".join(f"{c} = NULL" for c in self.child_columns)
+            return f"UPDATE {table} SET {assignments} WHERE {self.orphan_condition(table)};"
+        return f"DELETE FROM {table} WHERE {self.orphan_condition(table)};"
+
+
+# Relationships the app relies on (see the CREATE TABLE statements in DatabaseManager.cpp)
+RELATIONSHIPS = (
+    Relationship("confidence_scores -> file_categorization", "confidence_scores",
+                 ("file_name", "file_type", "dir_path"), "file_categorization",
+                 ("file_name", "file_type", "dir_path")),
+    Relationship("category_alias -> category_taxonomy", "category_alias",
+                 ("taxonomy_id",), "category_taxonomy", ("id",)),
+    # A NULL taxonomy_id is valid (the entry is re-resolved), so dangling ids are cleared
+    Relationship("file_categorization -> category_taxonomy", "file_categorization",
+                 ("taxonomy_id",), "category_taxonomy", ("id",), cleanup="nullify"),
+    Relationship("user_corrections -> user_profiles", "user_corrections",
+                 ("profile_id",), "user_profiles", ("profile_id",), cleanup="nullify"),
+    Relationship("user_characteristics -> user_profile", "user_characteristics",
+                 ("user_id",), "user_profile", ("user_id",)),
+    Relationship("folder_insights -> user_profile", "folder_insights",
+                 ("user_id",), "user_profile", ("user_id",)),
+    Relationship("organizational_templates -> user_profile", "organizational_templates",
+                 ("user_id",), "user_profile", ("user_id",)),
+)
+
+
+class OrphanFinding:
+    """Orphans of one relationship"""
+    def __init__(self, relationship: Relationship):
+        self.relationship = relationship
+        self.orphans = 0
+        self.samples: List[tuple] = []
+        self.skipped: Optional[str] = None  # Why the relationship could not be checked
+
+    def to_dict(self) -> dict:
+        r = self.relationship
+        return {
+            "relationship": r.name,
+            "child": f"{r.child}({', '.join(r.child_columns)})",
+            "parent": f"{r.parent}({', '.join(r.parent_columns)})",
+            "orphans": self.orphans,
+            "samples": [list(s) for s in self.samples],
+            "cleanup": r.cleanup,
+            "skipped": self.skipped,
+        }
+
+
+def scan_orphans(conn: sqlite3.Connection, relationships: Sequence[Relationship] = RELATIONSHIPS,
+                 samples: int = SAMPLE_KEYS, time_budget: Optional[float] = 30.0) -> List[OrphanFinding]:
+    """Count orphans of every relationship whose tables exist"""
+    columns = {}
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+        columns[table] = {row[1] for row in conn.execute(
+            f"SELECT * FROM pragma_table_info({quote_identifier(table)})")}
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    if deadline is not None:
+        conn.set_progress_handler(lambda: 1 if time.perf_counter() > deadline else 0, _PROGRESS_STEPS)
+    findings = []
+    try:
+        for r in relationships:
+            finding = OrphanFinding(r)
+            findings.append(finding)
+            missing = [f"{t}.{c}" for t, cols in ((r.child, r.child_columns), (r.parent, r.parent_columns))
+                       for c in cols if c not in columns.get(t, ())]
+            if missing:
+                finding.skipped = f"not in this database: {', '.join(missing)}"
+                continue
+            child = quote_identifier(r.child)
+            where = r.orphan_condition("c")
+            try:
+                finding.orphans = conn.execute(
+                    f"SELECT COUNT(*) FROM {child} c WHERE {where}").fetchone()[0]
+                if finding.orphans and samples:
+                    keys = ", ".join(f"c.{col}" for col in r.child_columns)
+                    finding.samples = conn.execute(
+                        f"SELECT DISTINCT {keys} FROM {child} c WHERE {where} LIMIT {int(samples)}").fetchall()
+            except sqlite3.OperationalError as e:
+                finding.skipped = "time budget exhausted" if "interrupt" in str(e) else str(e)
+    finally:
+        conn.set_progress_handler(None, 0)
+    return findings
+
+
+def cleanup_script(findings: Sequence[OrphanFinding], db_path: str,
+                   script_path: str = "cleanup.sql") -> str:
+    """SQL that removes (or un-links) the orphans found; meant to be reviewed before running"""
+    lines = [
+        f"-- Orphan cleanup for {db_path}",
+        f"-- Generated {datetime.datetime.now().isoformat(timespec='seconds')} by thorough_diagnostic.py",
+        "-- Close AI File Sorter and back up the database before running:",
+        f"--   sqlite3 '{db_path}' < '{script_path}'",
+        "",
+        "BEGIN;",
+    ]
+    for f in findings:
+        if not f.orphans:
+            continue
+        action = "clear the reference of" if f.relationship.cleanup == "nullify" else "delete"
+        lines.append(f"-- {f.relationship.name}: {action} {f.orphans} row(s)")
+        lines.append(f.relationship.cleanup_sql())
+    lines += ["COMMIT;", ""]
+    return "\n".join(lines)
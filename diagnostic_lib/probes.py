@@ -0,0 +1,316 @@
+"""
+AI File Sorter - Concurrent External Probe Layer
+
+Launches external version/information commands (pkg-config, curl, sqlite3,
+sysctl, ...) concurrently with asyncio instead of one blocking
+subprocess.run() after another. Concurrency is bounded by a semaphore and
+the whole batch shares a single deadline, so the worst case is one timeout
+rather than the sum of every probe's timeout.
+
+Note: creating subprocesses from an event loop on a worker thread requires
+Python 3.8+ on POSIX (the default child watcher changed in 3.8).
+
+asyncio is only imported once a batch actually runs; it is the single most
+expensive import of the diagnostic tools.
+
+ProbeCache persists completed probe results between runs. An entry is keyed
+by the probe's argv plus the resolved executable's path, mtime and size (and,
+for pkg-config, the mtimes of the queried .pc files and their directories),
+so upgrading a tool or library invalidates it; entries also expire after a
+maximum age. A batch whose probes are all cached starts no processes.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import asyncio
+
+# ProbeResult.error values
+PROBE_NOT_FOUND = "not found"
+PROBE_TIMEOUT = "timed out"
+
+PROBE_CACHE_VERSION = 1
+PROBE_CACHE_FILE = "probe_cache.json"  # In the tools' state directory, shared by both
+
+# Cached external probe output is re-validated by running the probe after this long
+PROBE_CACHE_MAX_AGE_HOURS = 7 * 24
+
+# Searched when PKG_CONFIG_LIBDIR does not replace pkg-config's default path
+PKG_CONFIG_DEFAULT_DIRS = (
+    "/usr/lib/pkgconfig", "/usr/lib64/pkgconfig", "/usr/share/pkgconfig",
+    "/usr/local/lib/pkgconfig", "/usr/local/share/pkgconfig",
+    "/opt/homebrew/lib/pkgconfig", "/opt/homebrew/share/pkgconfig",
+)
+
+
+class ProbeResult:
+    """Structured outcome of one external probe"""
+    def __init__(self, name: str, argv: Sequence[str], exit_code: Optional[int] = None,
+                 stdout: str = "", stderr: str = "", elapsed_ms: float = 0.0,
+                 error: Optional[str] = None, cached: bool = False):
+        self.name = name
+        self.argv = list(argv)
+        self.exit_code = exit_code  # None when the process never finished
+        self.stdout = stdout
+        self.stderr = stderr
+        self.elapsed_ms = elapsed_ms
+        self.error = error  # PROBE_NOT_FOUND, PROBE_TIMEOUT or an OS error message
+        self.cached = cached  # Replayed from ProbeCache instead of being run
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.exit_code == 0
+
+    @property
+    def not_found(self) -> bool:
+        return self.error == PROBE_NOT_FOUND
+
+    @property
+    def timed_out(self) -> bool:
+        return self.error == PROBE_TIMEOUT
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "command": " ".join(self.argv),
+            "exit_code": self.exit_code,
+            "stdout": self.stdout,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+
+async def _run_probe(name: str, argv: Sequence[str], semaphore: "asyncio.Semaphore",
+                     deadline_at: float) -> ProbeResult:
+    """Run a single probe, respecting the shared deadline"""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        start = time.perf_counter()
+
+        def elapsed() -> float:
+            return (time.perf_counter() - start) * 1000
+
+        remaining = deadline_at - loop.time()
+        if remaining <= 0:
+            return ProbeResult(name, argv, error=PROBE_TIMEOUT)
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            return ProbeResult(name, argv, elapsed_ms=elapsed(), error=PROBE_NOT_FOUND)
+        except OSError as e:
+            return ProbeResult(name, argv, elapsed_ms=elapsed(), error=str(e))
+
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), remaining)
+        except asyncio.TimeoutError:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+            return ProbeResult(name, argv, elapsed_ms=elapsed(), error=PROBE_TIMEOUT)
+
+        return ProbeResult(
+            name, argv, proc.returncode,
+            out.decode("utf-8", errors="replace"),
+            err.decode("utf-8", errors="replace"),
+            elapsed()
+        )
+
+
+def run_probes(probes: Dict[str, Sequence[str]], deadline: float = 10.0,
+               concurrency: int = 4) -> Dict[str, ProbeResult]:
+    """Run all probes at once and return their results keyed by name"""
+    if not probes:
+        return {}
+    import asyncio
+
+    async def run_all():
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        deadline_at = loop.time() + deadline
+        return await asyncio.gather(*(
+            _run_probe(name, argv, semaphore, deadline_at) for name, argv in probes.items()
+        ))
+
+    return {result.name: result for result in asyncio.run(run_all())}
+
+
+def _pkg_config_dirs() -> List[str]:
+    dirs = os.environ.get("PKG_CONFIG_PATH", "").split(os.pathsep)
+    libdir = os.environ.get("PKG_CONFIG_LIBDIR")
+    if libdir is not None:
+        dirs += libdir.split(os.pathsep)
+    else:
+        import glob
+        dirs += list(PKG_CONFIG_DEFAULT_DIRS) + sorted(glob.glob("/usr/lib/*/pkgconfig"))
+    return [d for d in dirs if d]
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def probe_fingerprint(argv: Sequence[str]) -> Optional[list]:
+    """What a probe's output depends on, or None if its executable is missing"""
+    import shutil
+    binary = shutil.which(argv[0])
+    if binary is None:
+        return None
+    binary = os.path.realpath(binary)
+    parts: list = [binary, _stat_key(binary)]
+    if os.path.basename(argv[0]).startswith("pkg-config"):
+        modules = [arg for arg in argv[1:] if not arg.startswith("-")]
+        for directory in _pkg_config_dirs():
+            parts.append([directory, _stat_key(directory)])
+            parts.extend(_stat_key(os.path.join(directory, f"{m}.pc")) for m in modules)
+    return parts
+
+
+class ProbeCache:
+    """On-disk store of completed probe results, keyed by probe_fingerprint()"""
+
+    def __init__(self, path: Union[str, Path], max_age: Optional[float] = None):
+        self.path = Path(path)
+        self.max_age = max_age  # Seconds; older entries are evicted
+        self._entries: Optional[Dict[str, dict]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(argv: Sequence[str], fp: list) -> str:
+        import json
+        return json.dumps([list(argv), fp], separators=(",", ":"))
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            import json
+            self._entries = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == PROBE_CACHE_VERSION:
+                    self._entries = data.get("entries", {})
+            except (OSError, ValueError):
+                pass
+            if self.max_age is not None:
+                now = time.time()
+                expired = [k for k, e in self._entries.items()
+                           if now - e.get("recorded_at", 0) > self.max_age]
+                for k in expired:
+                    del self._entries[k]
+                self._dirty = bool(expired)
+        return self._entries
+
+    def lookup(self, name: str, argv: Sequence[str], key: str) -> Optional[ProbeResult]:
+        """Cached result for a probe, if its executable and inputs are unchanged"""
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None:
+            return None
+        return ProbeResult(name, argv, entry["exit_code"], entry["stdout"], entry["stderr"],
+                           entry["elapsed_ms"], cached=True)
+
+    def store(self, key: str, result: ProbeResult):
+        """Remember a probe that ran to completion (timeouts and errors are not cached)"""
+        if result.error is not None:
+            return
+        with self._lock:
+            self._load()[key] = {
+                "recorded_at": time.time(),
+                "exit_code": result.exit_code,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "elapsed_ms": result.elapsed_ms,
+            }
+            self._dirty = True
+
+    def save(self):
+        """Atomically write the cache file if anything changed"""
+        import json
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": PROBE_CACHE_VERSION, "entries": self._entries}
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+
+def default_probe_cache(state_dir: Union[str, Path]) -> "ProbeCache":
+    """The probe cache both diagnostic tools use in a state directory"""
+    return ProbeCache(Path(state_dir) / PROBE_CACHE_FILE, max_age=PROBE_CACHE_MAX_AGE_HOURS * 3600)
+
+
+class ProbeBatch:
+    """A fixed set of probes executed together on first demand"""
+
+    def __init__(self, probes: Dict[str, Sequence[str]], deadline: float = 10.0,
+                 concurrency: int = 4, cache: Optional[ProbeCache] = None):
+        self.probes = dict(probes)
+        self.deadline = deadline
+        self.concurrency = concurrency
+        self.cache = cache
+        self._results: Optional[Dict[str, ProbeResult]] = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> ProbeResult:
+        """Return one probe's result, launching the whole batch if needed"""
+        with self._lock:
+            if self._results is None:
+                self._results = self._run()
+        return self._results[name]
+
+    def _run(self) -> Dict[str, ProbeResult]:
+        if self.cache is None:
+            return run_probes(self.probes, self.deadline, self.concurrency)
+
+        results: Dict[str, ProbeResult] = {}
+        pending: Dict[str, Sequence[str]] = {}
+        keys: Dict[str, str] = {}
+        for name, argv in self.probes.items():
+            fp = probe_fingerprint(argv)
+            if fp is None:
+                results[name] = ProbeResult(name, argv, error=PROBE_NOT_FOUND)
+                continue
+            keys[name] = ProbeCache.key(argv, fp)
+            cached = self.cache.lookup(name, argv, keys[name])
+            if cached is not None:
+                results[name] = cached
+            else:
+                pending[name] = argv
+
+        for name, result in run_probes(pending, self.deadline, self.concurrency).items():
+            results[name] = result
+            self.cache.store(keys[name], result)
+        try:
+            self.cache.save()
+        except OSError:
+            pass  # The cache is only an optimization; never fail a check over it
+        return results
+
+    @property
+    def results(self) -> List[ProbeResult]:
+        """Results of the probes that have run so far (in declaration order)"""
+        if self._results is None:
+            return []
+        return [self._results[name] for name in self.probes if name in self._results]
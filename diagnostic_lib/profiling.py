@@ -0,0 +1,164 @@
+"""
+AI File Sorter - Check Profiler
+
+Runs individual checks under cProfile (and optionally tracemalloc) and
+writes, per check:
+- <check>.pstats      cProfile statistics (load with pstats or snakeviz)
+- <check>.alloc.txt   top allocation sites grown during the check
+plus one merged profile.collapsed file in the "folded stacks" format used by
+flamegraph.pl, speedscope and inferno, with each check as the root frame.
+
+cProfile only records caller/callee edges, so the collapsed stacks are
+reconstructed from the call graph, splitting a function's time across its
+callers in proportion to the time each caller spent in it. The number of
+call paths grows combinatorially with the graph's fan-out and depth, so at
+most _MAX_NODES paths are expanded per check; the time below a path that is
+not expanded is folded into a "[truncated]" frame, keeping totals right.
+
+Both profilers are process-wide on recent Pythons, so checks must run one
+at a time while profiling.
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+
+# Paths contributing less than this share of a root's time are dropped
+_MIN_WEIGHT = 1e-6
+_MAX_DEPTH = 200
+_MAX_NODES = 100_000
+_TRUNCATED = "[truncated]"
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "check"
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    filename, line, funcname = func
+    if filename == "~":  # Built-in functions
+        return funcname.replace(";", ":")
+    return f"{funcname} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def collapsed_stacks(stats: pstats.Stats, root: str, max_nodes: int = _MAX_NODES) -> Dict[str, int]:
+    """Folded stacks (frame;frame;... -> self time in microseconds) from cProfile stats"""
+    raw = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    children: Dict[tuple, List[tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            children.setdefault(caller, []).append(func)
+
+    folded: Dict[str, int] = {}
+    remaining = max_nodes
+
+    def add(frames: List[str], seconds: float):
+        us = int(seconds * 1_000_000)
+        if us > 0:
+            key = ";".join(frames)
+            folded[key] = folded.get(key, 0) + us
+
+    def walk(func, stack: List[str], on_stack: set, weight: float):
+        nonlocal remaining
+        remaining -= 1
+        _, _, tt, ct, _ = raw[func]
+        frames = stack + [_frame_label(func)]
+        add(frames, tt * weight)
+        if len(frames) >= _MAX_DEPTH or remaining <= 0:
+            add(frames + [_TRUNCATED], (ct - tt) * weight)
+            return
+        for child in children.get(func, ()):
+            if child in on_stack:
+                continue  # Recursion: its time is already counted higher up
+            child_ct = raw[child][3]
+            edge_ct = raw[child][4][func][3]
+            if child_ct <= 0:
+                continue
+            child_weight = weight * edge_ct / child_ct
+            if child_weight < _MIN_WEIGHT:
+                continue
+            on_stack.add(child)
+            walk(child, frames, on_stack, child_weight)
+            on_stack.discard(child)
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    for func in roots:
+        walk(func, [root], {func}, 1.0)
+    return folded
+
+
+class CheckProfiler:
+    """Profiles checks one at a time and writes per-check artifacts"""
+
+    def __init__(self, output_dir: Union[str, Path], trace_memory: bool = False,
+                 top_allocations: int = 15):
+        self.output_dir = Path(output_dir)
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self._folded: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def profile(self, name: str, func: Callable[[], None]):
+        """Run func under the profiler(s), saving artifacts even if it raises"""
+        slug = _slug(name)
+        profiler = cProfile.Profile()
+        started_tracing = False
+        before = None
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                started_tracing = True
+            before = tracemalloc.take_snapshot()
+
+        profiler.enable()
+        try:
+            return func()
+        finally:
+            profiler.disable()
+            after = tracemalloc.take_snapshot() if before is not None else None
+            if started_tracing:
+                tracemalloc.stop()
+
+            profiler.dump_stats(str(self.output_dir / f"{slug}.pstats"))
+            stacks = collapsed_stacks(pstats.Stats(profiler), slug)
+            with self._lock:
+                for key, value in stacks.items():
+                    self._folded[key] = self._folded.get(key, 0) + value
+            if after is not None:
+                self._write_allocations(slug, name, before, after)
+
+    def _write_allocations(self, slug: str, name: str, before, after):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        diff = [d for d in diff if d.size_diff > 0][:self.top_allocations]
+
+        lines = [
+            f"Top allocations during check: {name}",
+            "",
+            f"{'Size +KiB':>10}  {'Blocks +':>9}  Location",
+            f"{'-' * 10}  {'-' * 9}  {'-' * 40}",
+        ]
+        for stat in diff:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size_diff / 1024:10.1f}  {stat.count_diff:9d}  {frame.filename}:{frame.lineno}")
+        if not diff:
+            lines.append("(no net allocations)")
+
+        with open(self.output_dir / f"{slug}.alloc.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def write_collapsed(self, filename: str = "profile.collapsed") -> Path:
+        """Write the merged folded-stack file for flamegraph tools"""
+        path = self.output_dir / filename
+        with self._lock:
+            items = sorted(self._folded.items())
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, value in items:
+                f.write(f"{stack} {value}\n")
+        return path
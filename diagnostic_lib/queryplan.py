@@ -0,0 +1,265 @@
+"""
+AI File Sorter - Query Plan and Index Coverage Analyzer
+
+Runs EXPLAIN QUERY PLAN for the statement shapes issued by DatabaseManager
+(app/lib/DatabaseManager.cpp) and reports:
+
+- full table scans on the large, per-file tables (HOT_TABLES)
+- indexes DatabaseManager creates that are missing from the database
+- for every finding, a row-count-weighted cost: rows examined per call
+  times how often the statement runs while sorting 10,000 files
+
+EXPLAIN QUERY PLAN only prepares the statements, so it is safe on a
+read-only connection and costs no table I/O. Statements that reference a
+table the database does not have (older schema) are reported as skipped.
+"""
+
+import math
+import re
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from diagnostic_lib.schema_manifest import INDEXES
+
+# Tables that grow with the number of files sorted; scans on these hurt
+HOT_TABLES = (
+    "file_categorization", "confidence_scores", "user_corrections",
+    "content_analysis_cache", "file_tinder_state",
+)
+
+# How often a statement runs while sorting WORKLOAD_FILES files
+WORKLOAD_FILES = 10000
+CALLS_PER_WORKLOAD = {
+    "per_file": WORKLOAD_FILES,
+    "per_dir": WORKLOAD_FILES // 100,  # Assumes ~100 files per directory
+    "per_run": 1,
+}
+
+# Indexes DatabaseManager creates: name -> (table, columns)
+EXPECTED_INDEXES = {name: (table, columns) for name, (table, columns, _) in INDEXES.items()}
+
+
+class Statement:
+    """One statement shape from DatabaseManager"""
+    def __init__(self, name: str, table: str, sql: str, frequency: str,
+                 lookup_columns: Sequence[str] = (), index: Optional[str] = None):
+        self.name = name
+        self.table = table
+        self.sql = sql
+        self.frequency = frequency  # Key of CALLS_PER_WORKLOAD
+        self.lookup_columns = tuple(lookup_columns)  # Equality columns an index should cover
+        self.index = index  # The EXPECTED_INDEXES entry this statement relies on, if any
+
+    @property
+    def parameter_count(self) -> int:
+        return self.sql.count("?")
+
+
+STATEMENTS = (
+    Statement("categorization_lookup", "file_categorization",
+              "SELECT category, subcategory, taxonomy_id FROM file_categorization "
+              "WHERE file_name = ? AND file_type = ? AND dir_path = ?",
+              "per_file", ("file_name", "file_type", "dir_path")),
+    Statement("categorized_files_in_dir", "file_categorization",
+              "SELECT dir_path, file_name, file_type, category, subcategory, taxonomy_id, "
+              "categorization_style FROM file_categorization WHERE dir_path = ?",
+              "per_dir", ("dir_path",)),
+    Statement("dir_categorization_style", "file_categorization",
+              "SELECT categorization_style FROM file_categorization WHERE dir_path = ? LIMIT 1",
+              "per_dir", ("dir_path",)),
+    Statement("file_names_in_dir", "file_categorization",
+              "SELECT file_name FROM file_categorization WHERE dir_path = ?",
+              "per_dir", ("dir_path",)),
+    Statement("remove_file_categorization", "file_categorization",
+              "DELETE FROM file_categorization WHERE dir_path = ? AND file_name = ? AND file_type = ?",
+              "per_file", ("file_name", "file_type", "dir_path")),
+    Statement("category_by_name_and_type", "file_categorization",
+              "SELECT category, subcategory FROM file_categorization WHERE file_name = ? AND file_type = ?",
+              "per_file", ("file_name", "file_type")),
+    Statement("file_name_exists", "file_categorization",
+              "SELECT 1 FROM file_categorization WHERE file_name = ? LIMIT 1",
+              "per_file", ("file_name",)),
+    Statement("file_in_dir_exists", "file_categorization",
+              "SELECT 1 FROM file_categorization WHERE file_name = ? AND dir_path = ? LIMIT 1",
+              "per_file", ("file_name", "dir_path")),
+    Statement("taxonomy_frequency_update", "file_categorization",
+              "UPDATE category_taxonomy SET frequency = "
+              "(SELECT COUNT(*) FROM file_categorization WHERE taxonomy_id = ?) WHERE id = ?",
+              "per_file", ("taxonomy_id",), index="idx_file_categorization_taxonomy"),
+    Statement("recent_categories_by_type", "file_categorization",
+              "SELECT file_name, category, subcategory FROM file_categorization "
+              "WHERE file_type = ? ORDER BY timestamp DESC LIMIT ?",
+              "per_run", ("file_type",)),
+    Statement("clear_old_categorizations", "file_categorization",
+              "DELETE FROM file_categorization WHERE timestamp < datetime('now', '-' || ? || ' days')",
+              "per_run"),
+    Statement("confidence_lookup", "confidence_scores",
+              "SELECT category_confidence, subcategory_confidence, confidence_factors, model_version "
+              "FROM confidence_scores WHERE file_name = ? AND file_type = ? AND dir_path = ?",
+              "per_file", ("file_name", "file_type", "dir_path"), index="idx_confidence_scores_file"),
+    Statement("content_by_path", "content_analysis_cache",
+              "SELECT content_hash, mime_type, keywords FROM content_analysis_cache WHERE file_path = ?",
+              "per_file", ("file_path",)),
+    Statement("content_by_hash", "content_analysis_cache",
+              "SELECT content_hash, mime_type, keywords FROM content_analysis_cache "
+              "WHERE content_hash = ? LIMIT 1",
+              "per_file", ("content_hash",), index="idx_content_analysis_hash"),
+    Statement("clear_old_content_analysis", "content_analysis_cache",
+              "DELETE FROM content_analysis_cache WHERE timestamp < datetime('now', '-' || ? || ' days')",
+              "per_run"),
+    Statement("corrections_by_profile", "user_corrections",
+              "SELECT file_path, file_name, original_category, corrected_category FROM user_corrections "
+              "WHERE profile_id = ? ORDER BY timestamp DESC LIMIT ?",
+              "per_run", ("profile_id",), index="idx_user_corrections_profile"),
+    Statement("file_tinder_by_folder", "file_tinder_state",
+              "SELECT folder_path, file_path, decision, timestamp FROM file_tinder_state "
+              "WHERE folder_path = ? ORDER BY timestamp DESC",
+              "per_run", ("folder_path",)),
+    Statement("alias_lookup", "category_alias",
+              "SELECT t.id FROM category_alias a JOIN category_taxonomy t ON t.id = a.taxonomy_id "
+              "WHERE a.alias_category_norm = ? AND a.alias_subcategory_norm = ?",
+              "per_file", ("alias_category_norm", "alias_subcategory_norm")),
+    Statement("api_usage_today", "api_usage_tracking",
+              "SELECT tokens_used, requests_made, remaining FROM api_usage_tracking "
+              "WHERE provider = ? AND date = DATE('now')",
+              "per_file", ("provider", "date"), index="idx_api_usage_date"),
+)
+
+# "SCAN t", "SCAN TABLE t" (SQLite < 3.36), optionally "AS x" and "USING [COVERING] INDEX i"
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?")
+_SEARCH = re.compile(r"^SEARCH (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+)"
+                     r"| USING (?:INTEGER )?PRIMARY KEY)?")
+
+
+class PlanFinding:
+    """Plan of one statement and its estimated cost"""
+    def __init__(self, statement: Statement):
+        self.statement = statement
+        self.plan: List[str] = []
+        self.scanned_tables: List[str] = []  # Hot tables read in full
+        self.indexes_used: List[str] = []
+        self.table_rows = 0
+        self.error: Optional[str] = None
+
+    @property
+    def rows_per_call(self) -> int:
+        """Estimated rows examined by one execution"""
+        if self.scanned_tables:
+            return self.table_rows
+        return max(1, int(math.log2(self.table_rows + 1)))
+
+    @property
+    def weighted_cost(self) -> int:
+        """Rows examined while sorting WORKLOAD_FILES files"""
+        return self.rows_per_call * CALLS_PER_WORKLOAD[self.statement.frequency]
+
+    def suggested_index(self) -> Optional[str]:
+        s = self.statement
+        if not self.scanned_tables or not s.lookup_columns or s.frequency == "per_run":
+            return None  # Occasional maintenance queries do not justify an index
+        if s.index:
+            table, columns = EXPECTED_INDEXES[s.index]
+            return f"CREATE INDEX {s.index} ON {table}({', '.join(columns)});"
+        name = f"idx_{s.table}_{'_'.join(s.lookup_columns)}"
+        return f"CREATE INDEX {name} ON {s.table}({', '.join(s.lookup_columns)});"
+
+    def to_dict(self) -> dict:
+        return {
+            "statement": self.statement.name,
+            "table": self.statement.table,
+            "frequency": self.statement.frequency,
+            "plan": self.plan,
+            "full_scan": bool(self.scanned_tables),
+            "indexes_used": self.indexes_used,
+            "table_rows": self.table_rows,
+            "rows_per_call": self.rows_per_call,
+            "weighted_cost": self.weighted_cost,
+            "suggested_index": self.suggested_index(),
+            "error": self.error,
+        }
+
+
+def estimate_rows(conn: sqlite3.Connection, table: str) -> int:
+    """Cheap row estimate: sqlite_stat1 if ANALYZE has run, else the rowid span"""
+    try:
+        row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table,)).fetchone()
+        if row is None:
+            row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+        if row is not None:
+            return int(str(row[0]).split()[0])
+    except (sqlite3.Error, ValueError):
+        pass  # No sqlite_stat1 (ANALYZE never ran)
+    try:
+        low, high = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{table}"').fetchone()
+    except sqlite3.Error:
+        return 0
+    return 0 if low is None else high - low + 1
+
+
+def explain(conn: sqlite3.Connection, statement: Statement) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, indented by depth"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {statement.sql}",
+                        (None,) * statement.parameter_count).fetchall()
+    depth: Dict[int, int] = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def analyze(conn: sqlite3.Connection,
+            statements: Sequence[Statement] = STATEMENTS) -> Tuple[List[PlanFinding], List[dict]]:
+    """Plan every statement; returns (findings, missing expected indexes)"""
+    existing = {name: tbl for name, tbl in conn.execute(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'")}
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    row_cache: Dict[str, int] = {}
+
+    def rows(table: str) -> int:
+        if table not in row_cache:
+            row_cache[table] = estimate_rows(conn, table) if table in tables else 0
+        return row_cache[table]
+
+    findings = []
+    for statement in statements:
+        finding = PlanFinding(statement)
+        finding.table_rows = rows(statement.table)
+        try:
+            finding.plan = explain(conn, statement)
+        except sqlite3.Error as e:
+            finding.error = str(e)
+            findings.append(finding)
+            continue
+        for line in finding.plan:
+            detail = line.strip()
+            scan = _SCAN.match(detail)
+            if scan:
+                if scan.group(1) in HOT_TABLES and scan.group(1) not in finding.scanned_tables:
+                    finding.scanned_tables.append(scan.group(1))
+                if scan.group(2):
+                    finding.indexes_used.append(scan.group(2))
+                continue
+            search = _SEARCH.match(detail)
+            if search and search.group(2):
+                finding.indexes_used.append(search.group(2))
+        findings.append(finding)
+
+    missing = []
+    for name, (table, columns) in EXPECTED_INDEXES.items():
+        if name in existing or table not in tables:
+            continue
+        dependents = [f for f in findings if f.statement.index == name]
+        missing.append({
+            "index": name,
+            "table": table,
+            "columns": list(columns),
+            "create_sql": f"CREATE INDEX {name} ON {table}({', '.join(columns)});",
+            "table_rows": rows(table),
+            "statements": [f.statement.name for f in dependents],
+            # Still served by another index (e.g. a UNIQUE constraint's autoindex)?
+            "covered_by": sorted({i for f in dependents for i in f.indexes_used}),
+            "weighted_cost": sum(f.weighted_cost for f in dependents),
+        })
+    missing.sort(key=lambda m: m["weighted_cost"], reverse=True)
+    return findings, missing
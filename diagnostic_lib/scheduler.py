@@ -0,0 +1,174 @@
+"""
+AI File Sorter - Concurrent Check Scheduler
+
+Runs diagnostic checks on a bounded pool of worker threads. Checks declare
+the checks they depend on and only start once those have finished
+successfully (a failed dependency skips them), or checks they merely run
+after, whatever the outcome. Outcomes are released strictly in declaration
+order, so reports look the same no matter which check happens to finish
+first.
+
+Worker threads are daemon threads: a check that hangs past its timeout is
+abandoned (and asked to stop via its cancel event) instead of keeping the
+process alive at exit.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+# Outcome states
+PENDING = "PENDING"
+DONE = "DONE"
+ERROR = "ERROR"
+TIMEOUT = "TIMEOUT"
+CANCELLED = "CANCELLED"
+SKIPPED = "SKIPPED"
+
+
+class CheckCancelled(Exception):
+    """Raised inside a check to unwind it after the scheduler cancelled it"""
+
+
+class CheckSpec:
+    """Declaration of a single schedulable check"""
+    def __init__(self, name: str, func: Callable[[threading.Event], None],
+                 depends_on: Sequence[str] = (), timeout: Optional[float] = None,
+                 after: Sequence[str] = ()):
+        self.name = name
+        self.func = func  # Called with the check's cancel event
+        self.depends_on = tuple(depends_on)
+        self.after = tuple(after)  # Ordering only: started once these settle, however they end
+        self.timeout = timeout
+
+
+class CheckOutcome:
+    """Final state of a scheduled check"""
+    def __init__(self, spec: CheckSpec):
+        self.spec = spec
+        self.name = spec.name
+        self.state = PENDING
+        self.error: Optional[BaseException] = None
+        self.traceback: Optional[str] = None
+        self.elapsed = 0.0
+        self.blocked_by: Optional[str] = None  # Dependency that caused a skip
+        self.cancel_event = threading.Event()
+
+
+class CheckScheduler:
+    """Dependency-aware thread-pool scheduler with ordered result release"""
+
+    # Upper bound on a single wait so Ctrl+C is noticed promptly
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, max_workers: int = 4, default_timeout: Optional[float] = None):
+        self.max_workers = max(1, max_workers)
+        self.default_timeout = default_timeout
+        self.specs: List[CheckSpec] = []
+        self._outcomes: Dict[str, CheckOutcome] = {}
+        self._cancelled = threading.Event()
+
+    def add(self, name: str, func: Callable[[threading.Event], None],
+            depends_on: Sequence[str] = (), timeout: Optional[float] = None,
+            after: Sequence[str] = ()) -> CheckSpec:
+        """Declare a check; dependencies must already be declared"""
+        if name in self._outcomes:
+            raise ValueError(f"Duplicate check name: {name}")
+        for dep in tuple(depends_on) + tuple(after):
+            if dep not in self._outcomes:
+                raise ValueError(f"Check '{name}' depends on undeclared check '{dep}'")
+
+        spec = CheckSpec(name, func, depends_on, timeout, after)
+        self.specs.append(spec)
+        self._outcomes[name] = CheckOutcome(spec)
+        return spec
+
+    def cancel(self):
+        """Cancel every running check and skip everything not yet started"""
+        self._cancelled.set()
+        for outcome in self._outcomes.values():
+            outcome.cancel_event.set()
+
+    def _worker(self, outcome: CheckOutcome, done: "queue.Queue"):
+        """Execute one check and report back to the scheduler thread"""
+        start = time.perf_counter()
+        state, error, tb = DONE, None, None
+        try:
+            outcome.spec.func(outcome.cancel_event)
+        except CheckCancelled:
+            state = CANCELLED
+        except Exception as e:
+            import traceback
+            state, error, tb = ERROR, e, traceback.format_exc()
+        done.put((outcome.name, state, error, tb, time.perf_counter() - start))
+
+    def run(self) -> Iterator[CheckOutcome]:
+        """Run all declared checks, yielding outcomes in declaration order"""
+        done: "queue.Queue" = queue.Queue()
+        pending = list(self.specs)
+        running: Dict[str, float] = {}  # name -> deadline (or inf)
+        finished = set()
+        next_release = 0
+
+        while next_release < len(self.specs):
+            # Start (or skip) everything whose dependencies have settled.
+            # Declaration order is topological, so one pass resolves cascades.
+            for spec in list(pending):
+                outcome = self._outcomes[spec.name]
+                if self._cancelled.is_set():
+                    outcome.state = CANCELLED
+                elif any(dep not in finished for dep in spec.depends_on + spec.after):
+                    continue
+                else:
+                    failed = [d for d in spec.depends_on if self._outcomes[d].state != DONE]
+                    if failed:
+                        outcome.state = SKIPPED
+                        outcome.blocked_by = failed[0]
+                    elif len(running) >= self.max_workers:
+                        continue
+                    else:
+                        timeout = spec.timeout if spec.timeout is not None else self.default_timeout
+                        running[spec.name] = (time.monotonic() + timeout) if timeout else float("inf")
+                        thread = threading.Thread(
+                            target=self._worker, args=(outcome, done),
+                            name=f"check-{spec.name}", daemon=True
+                        )
+                        pending.remove(spec)
+                        thread.start()
+                        continue
+                pending.remove(spec)
+                finished.add(spec.name)
+
+            while next_release < len(self.specs) and self.specs[next_release].name in finished:
+                yield self._outcomes[self.specs[next_release].name]
+                next_release += 1
+
+            if not running:
+                continue
+
+            wait = min(running.values()) - time.monotonic()
+            try:
+                name, state, error, tb, elapsed = done.get(
+                    timeout=max(0.0, min(wait, self.POLL_INTERVAL))
+                )
+                # Late completions from abandoned (timed out) checks are ignored
+                if name in running:
+                    outcome = self._outcomes[name]
+                    outcome.state, outcome.error, outcome.traceback = state, error, tb
+                    outcome.elapsed = elapsed
+                    del running[name]
+                    finished.add(name)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for name, deadline in list(running.items()):
+                if now >= deadline:
+                    outcome = self._outcomes[name]
+                    outcome.state = TIMEOUT
+                    outcome.cancel_event.set()
+                    timeout = outcome.spec.timeout or self.default_timeout
+                    outcome.elapsed = timeout
+                    del running[name]
+                    finished.add(name)
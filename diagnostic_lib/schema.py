@@ -0,0 +1,256 @@
+"""
+AI File Sorter - Schema Manifest and Drift Detection
+
+The expected schema is not written by hand: it is generated from the SQL
+that DatabaseManager.cpp executes. The generator pulls every string literal
+out of the C++ source, replays the CREATE TABLE, ALTER TABLE ... ADD COLUMN
+and CREATE INDEX statements in file order on an in-memory database (so
+SQLite itself parses them, exactly as the app does) and writes the result
+to schema_manifest.py: tables with their columns, UNIQUE/PRIMARY KEY
+constraints and CHECK constraints, plus the explicitly created indexes.
+
+detect_drift() compares the manifest with a live database using one query
+over sqlite_master joined to pragma_table_info and one over
+pragma_index_list/pragma_index_info.
+
+Usage:
+    python3 -m diagnostic_lib.schema --generate   # rewrite schema_manifest.py
+    python3 -m diagnostic_lib.schema --check      # exit 1 if it is out of date
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SOURCE = "app/lib/DatabaseManager.cpp"
+MANIFEST_FILE = Path(__file__).with_name("schema_manifest.py")
+
+# C++ raw strings R"(...)" and ordinary "..." literals
+_STRING_LITERAL = re.compile(r'R"\((.*?)\)"|"((?:[^"\\\n]|\\.)*)"', re.S)
+_DDL = re.compile(r"^\s*(CREATE\s+TABLE|CREATE\s+(?:UNIQUE\s+)?INDEX|ALTER\s+TABLE\s+\w+\s+ADD\s+COLUMN)\b",
+                  re.I)
+_CHECK = re.compile(r"\bCHECK\s*\(", re.I)
+_INDEX_STATEMENT = re.compile(r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\b", re.I)
+
+_TABLE_COLUMNS = """
+    SELECT m.name, m.sql, c.name, c.type, c."notnull", c.pk
+    FROM sqlite_master m JOIN pragma_table_info(m.name) c
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+    ORDER BY m.name, c.cid
+"""
+
+_INDEX_COLUMNS = """
+    SELECT m.name, il.name, il."unique", il.origin, ii.name
+    FROM sqlite_master m
+    JOIN pragma_index_list(m.name) il
+    JOIN pragma_index_info(il.name) ii
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+    ORDER BY m.name, il.name, ii.seqno
+"""
+
+
+def source_statements(text: str) -> List[str]:
+    """Schema statements among the string literals of a C++ file, in source order"""
+    statements = []
+    for raw, plain in _STRING_LITERAL.findall(text):
+        sql = raw or bytes(plain, "utf-8").decode("unicode_escape")
+        if _DDL.match(sql):
+            statements.append(sql.strip())
+    return statements
+
+
+def check_constraints(sql: str) -> List[str]:
+    """CHECK(...) expressions of a CREATE TABLE statement, whitespace-normalized"""
+    checks = []
+    for match in _CHECK.finditer(sql or ""):
+        depth, start = 1, match.end()
+        i = start
+        while i < len(sql) and depth:
+            depth += {"(": 1, ")": -1}.get(sql[i], 0)
+            i += 1
+        checks.append(" ".join(sql[start:i - 1].split()))
+    return checks
+
+
+def read_schema(conn: sqlite3.Connection) -> Tuple[Dict[str, dict], Dict[str, tuple]]:
+    """(tables, explicit indexes) of a database in manifest form"""
+    tables: Dict[str, dict] = {}
+    for table, sql, column, ctype, notnull, pk in conn.execute(_TABLE_COLUMNS):
+        entry = tables.setdefault(table, {"columns": {}, "unique": [], "checks": check_constraints(sql)})
+        entry["columns"][column] = (ctype.upper(), bool(notnull), pk)
+    indexes: Dict[str, tuple] = {}
+    unique: Dict[Tuple[str, str], List[str]] = {}
+    for table, index, is_unique, origin, column in conn.execute(_INDEX_COLUMNS):
+        if origin == "c":  # CREATE INDEX
+            name, cols, flag = indexes.get(index, (table, (), bool(is_unique)))
+            indexes[index] = (name, cols + (column,), flag)
+        else:  # UNIQUE or PRIMARY KEY constraint
+            unique.setdefault((table, index), []).append(column)
+    for (table, _), cols in sorted(unique.items()):
+        tables[table]["unique"].append(tuple(cols))
+    for entry in tables.values():
+        entry["unique"] = sorted(entry["unique"])
+    return tables, indexes
+
+
+def is_index_statement(statement: str) -> bool:
+    return _INDEX_STATEMENT.match(statement) is not None
+
+
+def apply_statements(conn: sqlite3.Connection, statements: List[str]):
+    """Execute schema statements in order, skipping columns that already exist (as the app does)"""
+    for statement in statements:
+        try:
+            conn.executescript(statement)
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):
+                raise
+
+
+def build_manifest(source_text: str) -> Tuple[Dict[str, dict], Dict[str, tuple]]:
+    """Replay the source's schema statements on an in-memory database and read it back"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        apply_statements(conn, source_statements(source_text))
+        return read_schema(conn)
+    finally:
+        conn.close()
+
+
+def _literal(value) -> str:
+    """Python literal for manifest values, with double-quoted strings"""
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, tuple):
+        items = ", ".join(_literal(v) for v in value)
+        return f"({items},)" if len(value) == 1 else f"({items})"
+    return repr(value)
+
+
+def render_manifest(source_text: str) -> str:
+    tables, indexes = build_manifest(source_text)
+    digest = hashlib.sha256(source_text.encode("utf-8")).hexdigest()
+    lines = [
+        '"""',
+        "AI File Sorter - Schema Manifest",
+        "",
+        f"Generated from {SOURCE} by `python3 -m diagnostic_lib.schema --generate`.",
+        "Do not edit by hand.",
+        '"""',
+        "",
+        f"SOURCE = {_literal(SOURCE)}",
+        f"SOURCE_SHA256 = {_literal(digest)}",
+        "",
+        "# table -> columns {name: (declared type, NOT NULL, primary key position)},",
+        "# unique column sets (UNIQUE and PRIMARY KEY constraints) and CHECK expressions",
+        "TABLES = {",
+    ]
+    for table in sorted(tables):
+        entry = tables[table]
+        lines.append(f"    {_literal(table)}: {{")
+        lines.append('        "columns": {')
+        for column, spec in entry["columns"].items():
+            lines.append(f"            {_literal(column)}: {_literal(spec)},")
+        lines.append("        },")
+        lines.append(f'        "unique": {_literal(tuple(entry["unique"]))},')
+        lines.append(f'        "checks": {_literal(tuple(entry["checks"]))},')
+        lines.append("    },")
+    lines += ["}", "", "# index -> (table, columns, unique) for every CREATE INDEX", "INDEXES = {"]
+    for index in sorted(indexes):
+        lines.append(f"    {_literal(index)}: {_literal(indexes[index])},")
+    lines += ["}", ""]
+    return "\n".join(lines)
+
+
+def manifest_is_current(repo_root: Path) -> bool:
+    """False when the C++ source exists and differs from the one the manifest was built from"""
+    from diagnostic_lib import schema_manifest
+    source = Path(repo_root) / SOURCE
+    if not source.is_file():
+        return True  # Installed without sources: nothing to compare against
+    digest = hashlib.sha256(source.read_text(encoding="utf-8").encode("utf-8")).hexdigest()
+    return digest == schema_manifest.SOURCE_SHA256
+
+
+class SchemaDrift:
+    """Differences between the manifest and a database"""
+    def __init__(self):
+        self.missing_tables: List[str] = []
+        self.extra_tables: List[str] = []
+        self.missing_columns: List[str] = []  # "table.column"
+        self.column_mismatches: List[str] = []  # "table.column: expected ..., found ..."
+        self.missing_unique: List[str] = []  # "table(col, ...)"
+        self.missing_checks: List[str] = []  # "table: CHECK(...)"
+        self.missing_indexes: List[str] = []
+
+    @property
+    def has_errors(self) -> bool:
+        """Drift that makes the app's statements fail (not just slower)"""
+        return bool(self.missing_columns or self.missing_unique)
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def detect_drift(conn: sqlite3.Connection) -> SchemaDrift:
+    """Compare a database with the manifest"""
+    from diagnostic_lib.schema_manifest import INDEXES, TABLES
+    live_tables, live_indexes = read_schema(conn)
+    drift = SchemaDrift()
+    for table, expected in TABLES.items():
+        live = live_tables.get(table)
+        if live is None:
+            drift.missing_tables.append(table)
+            continue
+        for column, (ctype, notnull, _) in expected["columns"].items():
+            found = live["columns"].get(column)
+            if found is None:
+                drift.missing_columns.append(f"{table}.{column}")
+            elif (found[0], found[1]) != (ctype, notnull):
+                drift.column_mismatches.append(
+                    f"{table}.{column}: expected {ctype}{' NOT NULL' if notnull else ''}, "
+                    f"found {found[0]}{' NOT NULL' if found[1] else ''}")
+        for cols in expected["unique"]:
+            if tuple(cols) not in live["unique"]:
+                drift.missing_unique.append(f"{table}({', '.join(cols)})")
+        for check in expected["checks"]:
+            if check not in live["checks"]:
+                drift.missing_checks.append(f"{table}: CHECK({check})")
+    drift.extra_tables = sorted(t for t in live_tables if t not in TABLES)
+    live_index_shapes = {(t, cols) for t, cols, _ in live_indexes.values()}
+    for index, (table, cols, _) in INDEXES.items():
+        if index not in live_indexes and (table, cols) not in live_index_shapes and table in live_tables:
+            drift.missing_indexes.append(index)
+    return drift
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description=f"Schema manifest generated from {SOURCE}")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--generate", action="store_true", help="Rewrite schema_manifest.py")
+    mode.add_argument("--check", action="store_true", help="Exit 1 if schema_manifest.py is out of date")
+    parser.add_argument("--root", default=".", help="Repository root (default: current directory)")
+    args = parser.parse_args(argv)
+
+    source = Path(args.root) / SOURCE
+    rendered = render_manifest(source.read_text(encoding="utf-8"))
+    current = MANIFEST_FILE.read_text(encoding="utf-8") if MANIFEST_FILE.exists() else ""
+    if args.check:
+        if rendered != current:
+            print(f"✗ {MANIFEST_FILE.name} is out of date; run python3 -m diagnostic_lib.schema --generate")
+            return 1
+        print(f"✓ {MANIFEST_FILE.name} matches {SOURCE}")
+        return 0
+    MANIFEST_FILE.write_text(rendered, encoding="utf-8")
+    print(f"✓ Wrote {MANIFEST_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+AI File Sorter - Schema Manifest
+
+Generated from app/lib/DatabaseManager.cpp by `python3 -m diagnostic_lib.schema --generate`.
+Do not edit by hand.
+"""
+
+SOURCE = "app/lib/DatabaseManager.cpp"
+SOURCE_SHA256 = "13adce05d78c43fb42e63a1bcfc67c87d248e0f7f22792c004ec0d9ba8abf146"
+
+# table -> columns {name: (declared type, NOT NULL, primary key position)},
+# unique column sets (UNIQUE and PRIMARY KEY constraints) and CHECK expressions
+TABLES = {
+    "api_usage_tracking": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "provider": ("TEXT", True, 0),
+            "date": ("DATE", True, 0),
+            "tokens_used": ("INTEGER", False, 0),
+            "requests_made": ("INTEGER", False, 0),
+            "cost_estimate": ("REAL", False, 0),
+            "daily_limit": ("INTEGER", False, 0),
+            "remaining": ("INTEGER", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+        },
+        "unique": (("provider", "date"),),
+        "checks": (),
+    },
+    "categorization_sessions": {
+        "columns": {
+            "session_id": ("TEXT", False, 1),
+            "folder_path": ("TEXT", True, 0),
+            "started_at": ("DATETIME", True, 0),
+            "completed_at": ("DATETIME", False, 0),
+            "consistency_mode": ("TEXT", False, 0),
+            "consistency_strength": ("REAL", False, 0),
+            "files_processed": ("INTEGER", False, 0),
+        },
+        "unique": (("session_id",),),
+        "checks": ("consistency_mode IN ('refined', 'consistent', 'hybrid')",),
+    },
+    "category_alias": {
+        "columns": {
+            "alias_category_norm": ("TEXT", True, 1),
+            "alias_subcategory_norm": ("TEXT", True, 2),
+            "taxonomy_id": ("INTEGER", True, 0),
+        },
+        "unique": (("alias_category_norm", "alias_subcategory_norm"),),
+        "checks": (),
+    },
+    "category_taxonomy": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "canonical_category": ("TEXT", True, 0),
+            "canonical_subcategory": ("TEXT", True, 0),
+            "normalized_category": ("TEXT", True, 0),
+            "normalized_subcategory": ("TEXT", True, 0),
+            "frequency": ("INTEGER", False, 0),
+        },
+        "unique": (("normalized_category", "normalized_subcategory"),),
+        "checks": (),
+    },
+    "confidence_scores": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "file_name": ("TEXT", True, 0),
+            "file_type": ("TEXT", True, 0),
+            "dir_path": ("TEXT", True, 0),
+            "category_confidence": ("REAL", True, 0),
+            "subcategory_confidence": ("REAL", False, 0),
+            "confidence_factors": ("TEXT", False, 0),
+            "model_version": ("TEXT", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+        },
+        "unique": (("file_name", "file_type", "dir_path"),),
+        "checks": (),
+    },
+    "content_analysis_cache": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "file_path": ("TEXT", True, 0),
+            "content_hash": ("TEXT", True, 0),
+            "mime_type": ("TEXT", False, 0),
+            "keywords": ("TEXT", False, 0),
+            "detected_language": ("TEXT", False, 0),
+            "metadata": ("TEXT", False, 0),
+            "analysis_summary": ("TEXT", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+        },
+        "unique": (("file_path",),),
+        "checks": (),
+    },
+    "file_categorization": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "file_name": ("TEXT", True, 0),
+            "file_type": ("TEXT", True, 0),
+            "dir_path": ("TEXT", True, 0),
+            "category": ("TEXT", True, 0),
+            "subcategory": ("TEXT", False, 0),
+            "taxonomy_id": ("INTEGER", False, 0),
+            "categorization_style": ("INTEGER", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+            "user_provided": ("INTEGER", False, 0),
+        },
+        "unique": (("file_name", "file_type", "dir_path"),),
+        "checks": (),
+    },
+    "file_tinder_state": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "folder_path": ("TEXT", True, 0),
+            "file_path": ("TEXT", True, 0),
+            "decision": ("TEXT", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+        },
+        "unique": (("folder_path", "file_path"),),
+        "checks": ("decision IN ('keep', 'delete', 'ignore', 'pending')",),
+    },
+    "folder_insights": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "user_id": ("TEXT", True, 0),
+            "folder_path": ("TEXT", True, 0),
+            "description": ("TEXT", False, 0),
+            "dominant_categories": ("TEXT", False, 0),
+            "file_count": ("INTEGER", False, 0),
+            "last_analyzed": ("TEXT", True, 0),
+            "usage_pattern": ("TEXT", False, 0),
+        },
+        "unique": (("user_id", "folder_path"),),
+        "checks": (),
+    },
+    "folder_learning_settings": {
+        "columns": {
+            "folder_path": ("TEXT", False, 1),
+            "inclusion_level": ("TEXT", True, 0),
+        },
+        "unique": (("folder_path",),),
+        "checks": ("inclusion_level IN ('none', 'partial', 'full')",),
+    },
+    "organizational_templates": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "user_id": ("TEXT", True, 0),
+            "template_name": ("TEXT", True, 0),
+            "description": ("TEXT", False, 0),
+            "suggested_categories": ("TEXT", False, 0),
+            "suggested_subcategories": ("TEXT", False, 0),
+            "confidence": ("REAL", True, 0),
+            "based_on_folders": ("TEXT", False, 0),
+            "usage_count": ("INTEGER", False, 0),
+        },
+        "unique": (("user_id", "template_name"),),
+        "checks": (),
+    },
+    "undo_history": {
+        "columns": {
+            "undo_id": ("INTEGER", False, 1),
+            "plan_path": ("TEXT", True, 0),
+            "description": ("TEXT", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+            "is_undone": ("INTEGER", False, 0),
+        },
+        "unique": (),
+        "checks": ("is_undone IN (0, 1)",),
+    },
+    "user_characteristics": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "user_id": ("TEXT", True, 0),
+            "trait_name": ("TEXT", True, 0),
+            "value": ("TEXT", True, 0),
+            "confidence": ("REAL", True, 0),
+            "evidence": ("TEXT", False, 0),
+            "timestamp": ("TEXT", True, 0),
+        },
+        "unique": (("user_id", "trait_name", "value"),),
+        "checks": (),
+    },
+    "user_corrections": {
+        "columns": {
+            "id": ("INTEGER", False, 1),
+            "file_path": ("TEXT", True, 0),
+            "file_name": ("TEXT", True, 0),
+            "original_category": ("TEXT", True, 0),
+            "original_subcategory": ("TEXT", False, 0),
+            "corrected_category": ("TEXT", True, 0),
+            "corrected_subcategory": ("TEXT", False, 0),
+            "file_extension": ("TEXT", False, 0),
+            "timestamp": ("DATETIME", False, 0),
+            "profile_id": ("INTEGER", False, 0),
+        },
+        "unique": (),
+        "checks": (),
+    },
+    "user_profile": {
+        "columns": {
+            "user_id": ("TEXT", False, 1),
+            "created_at": ("TEXT", True, 0),
+            "last_updated": ("TEXT", True, 0),
+        },
+        "unique": (("user_id",),),
+        "checks": (),
+    },
+    "user_profiles": {
+        "columns": {
+            "profile_id": ("INTEGER", False, 1),
+            "profile_name": ("TEXT", True, 0),
+            "is_active": ("INTEGER", False, 0),
+            "created_at": ("DATETIME", True, 0),
+            "last_used": ("DATETIME", False, 0),
+        },
+        "unique": (("profile_name",),),
+        "checks": ("is_active IN (0, 1)",),
+    },
+}
+
+# index -> (table, columns, unique) for every CREATE INDEX
+INDEXES = {
+    "idx_api_usage_date": ("api_usage_tracking", ("provider", "date"), False),
+    "idx_category_alias_taxonomy": ("category_alias", ("taxonomy_id",), False),
+    "idx_confidence_scores_file": ("confidence_scores", ("file_name", "file_type", "dir_path"), False),
+    "idx_content_analysis_hash": ("content_analysis_cache", ("content_hash",), False),
+    "idx_file_categorization_taxonomy": ("file_categorization", ("taxonomy_id",), False),
+    "idx_folder_insights_user": ("folder_insights", ("user_id",), False),
+    "idx_organizational_templates_user": ("organizational_templates", ("user_id",), False),
+    "idx_sessions_folder": ("categorization_sessions", ("folder_path",), False),
+    "idx_user_characteristics_user": ("user_characteristics", ("user_id",), False),
+    "idx_user_corrections_profile": ("user_corrections", ("profile_id",), False),
+}
@@ -0,0 +1,31 @@
+"""
+AI File Sorter - Diagnostic Result Sinks
+
+Destinations that receive diagnostic records as they are produced rather
+than after the whole run has finished.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Union
+
+
+class JsonLinesSink:
+    """Writes one JSON object per line, flushed after every record"""
+
+    def __init__(self, path: Union[str, Path], mode: str = "a"):
+        self.path = Path(path)
+        self._file = open(self.path, mode, encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -0,0 +1,159 @@
+"""
+AI File Sorter - Online Database Snapshots
+
+Consistent copies of the live categorization database taken with SQLite's
+online backup API (sqlite3.Connection.backup):
+
+- backup_database() copies pages_per_step pages at a time and sleeps
+  between steps, so the source is only read-locked for one short step at a
+  time and a running sorter is never blocked for long. A write by another
+  connection restarts the copy (that is how the backup API keeps the result
+  consistent); a time budget stops it from chasing a constantly busy
+  database forever.
+- SnapshotStore keeps gzip-compressed, timestamped snapshots in a
+  directory and prunes them by count and age.
+
+The source is opened through a read-only URI, so taking a snapshot can
+never modify or create the live database.
+"""
+
+import datetime
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from diagnostic_lib.dbutil import PathLike, connect_readonly
+
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005  # Seconds between steps; lets the app take its write lock
+SNAPSHOT_PREFIX = "aifilesorter-"
+SNAPSHOT_SUFFIX = ".db.gz"
+
+
+class SnapshotTimeout(Exception):
+    """The backup did not complete within its time budget"""
+
+
+class SnapshotInfo:
+    """What one backup did"""
+    def __init__(self, source: PathLike, path: PathLike):
+        self.source = str(source)
+        self.path = str(path)
+        self.pages = 0
+        self.steps = 0
+        self.restarts = 0  # Times a concurrent write made the backup start over
+        self.elapsed_s = 0.0
+        self.bytes = 0
+        self.compressed_bytes: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "path": self.path,
+            "pages": self.pages,
+            "steps": self.steps,
+            "restarts": self.restarts,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "bytes": self.bytes,
+            "compressed_bytes": self.compressed_bytes,
+        }
+
+
+def backup_database(source: PathLike, destination: PathLike, pages_per_step: int = PAGES_PER_STEP,
+                    step_sleep: float = STEP_SLEEP, time_budget: Optional[float] = None,
+                    progress: Optional[Callable[[int, int], None]] = None) -> SnapshotInfo:
+    """Copy source to destination in steps; progress(copied_pages, total_pages) after each step"""
+    info = SnapshotInfo(source, destination)
+    started = time.perf_counter()
+    deadline = None if time_budget is None else started + time_budget
+    last_copied = None
+
+    def on_step(status: int, remaining: int, total: int):
+        nonlocal last_copied
+        info.steps += 1
+        info.pages = total
+        # Every step copies at least one page unless the copy started over
+        copied = total - remaining
+        if last_copied is not None and copied <= last_copied:
+            info.restarts += 1
+        last_copied = copied
+        if progress is not None:
+            progress(copied, total)
+        if remaining and deadline is not None and time.perf_counter() > deadline:
+            raise SnapshotTimeout(f"backup incomplete after {time_budget:g}s "
+                                  f"({remaining} of {total} pages left, {info.restarts} restarts)")
+        if remaining and step_sleep > 0:
+            time.sleep(step_sleep)
+
+    src = connect_readonly(source)
+    try:
+        dst = sqlite3.connect(str(destination))
+        try:
+            src.backup(dst, pages=pages_per_step, progress=on_step)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    info.elapsed_s = time.perf_counter() - started
+    info.bytes = os.path.getsize(destination)
+    return info
+
+
+def compress_file(source: PathLike, destination: PathLike, level: int = 6) -> int:
+    """gzip source into destination (written atomically); returns the compressed size"""
+    partial = f"{destination}.partial"
+    try:
+        with open(source, "rb") as src, gzip.open(partial, "wb", compresslevel=level) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(partial, destination)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return os.path.getsize(destination)
+
+
+class SnapshotStore:
+    """Compressed snapshots in one directory, pruned by count and age"""
+    def __init__(self, directory: PathLike, keep: int = 5, max_age_days: Optional[float] = None):
+        self.directory = Path(directory)
+        self.keep = keep
+        self.max_age_days = max_age_days
+
+    def snapshots(self) -> List[Path]:
+        """Stored snapshots, newest first"""
+        if not self.directory.is_dir():
+            return []
+        found = [p for p in self.directory.iterdir()
+                 if p.name.startswith(SNAPSHOT_PREFIX) and p.name.endswith(SNAPSHOT_SUFFIX)]
+        return sorted(found, key=lambda p: p.name, reverse=True)
+
+    def save(self, database: PathLike) -> SnapshotInfo:
+        """Compress an already taken (uncompressed) snapshot into the store and prune"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        target = self.directory / f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}"
+        info = SnapshotInfo(database, target)
+        info.bytes = os.path.getsize(database)
+        info.compressed_bytes = compress_file(database, target)
+        self.prune()
+        return info
+
+    def prune(self) -> List[Path]:
+        """Delete snapshots beyond keep or older than max_age_days; returns the removed paths"""
+        removed = []
+        cutoff = None
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+        for index, path in enumerate(self.snapshots()):
+            try:
+                expired = cutoff is not None and path.stat().st_mtime < cutoff
+                if index >= self.keep or expired:
+                    path.unlink()
+                    removed.append(path)
+            except OSError:
+                continue  # Removed concurrently or not ours to delete
+        return removed
@@ -0,0 +1,180 @@
+"""
+AI File Sorter - Startup Budget
+
+The diagnostic tools are launched from login hooks and launchers, so the
+time between process start and the first check matters. This module keeps
+the load path cheap and measures it:
+
+- system_name(): platform.system() without importing platform
+- mark_first_check(): called by the tools right before the first check;
+  prints a timestamp to stderr when DIAGNOSTIC_STARTUP_MARK is set
+- a benchmark (python3 -m diagnostic_lib.startup) that launches a tool
+  several times, reports the median time to first check plus the most
+  expensive imports (from -X importtime) and exits non-zero when the median
+  exceeds the budget
+- --check-imports, the deterministic variant the test suite runs: fails when
+  any of LAZY_IMPORTS was loaded before the first check, whatever the clock says
+
+Usage:
+    python3 -m diagnostic_lib.startup [--budget-ms MS] [--runs N] SCRIPT [TOOL ARGS...]
+    python3 -m diagnostic_lib.startup --check-imports SCRIPT [TOOL ARGS...]
+"""
+
+import os
+import sys
+import time
+
+MARK_ENV = "DIAGNOSTIC_STARTUP_MARK"
+MARK_PREFIX = "diagnostic-startup-mark "
+BUDGET_ENV = "DIAGNOSTIC_STARTUP_BUDGET_MS"
+DEFAULT_BUDGET_MS = 150.0
+
+# Modules only the checks and options that use them may import
+LAZY_IMPORTS = (
+    "sqlite3", "subprocess", "json", "platform", "asyncio", "cProfile", "pstats", "tracemalloc",
+    "diagnostic_lib.profiling", "diagnostic_lib.incremental", "diagnostic_lib.sinks",
+    "diagnostic_lib.watch",
+)
+
+_marked = False
+
+
+def system_name() -> str:
+    """Same value as platform.system() for the platforms the tools support"""
+    if sys.platform == "win32":
+        return "Windows"
+    return os.uname().sysname
+
+
+def mark_first_check():
+    """Report that the first check is about to start (once per process)"""
+    global _marked
+    if _marked or not os.environ.get(MARK_ENV):
+        return
+    _marked = True
+    sys.stderr.write(f"{MARK_PREFIX}{time.time():.6f}\n")
+    sys.stderr.flush()
+
+
+def _launch(argv, importtime: bool = False):
+    """Start a tool and return (ms until its first check, -X importtime lines)"""
+    import subprocess
+
+    env = dict(os.environ, **{MARK_ENV: "1"})
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + list(argv)
+    started = time.time()
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, env=env, text=True)
+    imports = []
+    elapsed_ms = None
+    try:
+        for line in proc.stderr:
+            if line.startswith(MARK_PREFIX):
+                elapsed_ms = (float(line[len(MARK_PREFIX):]) - started) * 1000
+                break
+            if line.startswith("import time:"):
+                imports.append(line.rstrip("\n"))
+    finally:
+        # The checks themselves are not part of the measurement
+        proc.kill()
+        proc.wait()
+        proc.stderr.close()
+    return elapsed_ms, imports
+
+
+def top_imports(lines, count: int = 10):
+    """Most expensive top-level imports as (cumulative us, module)"""
+    totals = []
+    for line in lines:
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        module = parts[2].rstrip()
+        if module.startswith("  ") or not module.strip() or not parts[1].strip().isdigit():
+            continue  # Nested import (already counted by its parent) or the header
+        totals.append((int(parts[1]), module.strip()))
+    return sorted(totals, reverse=True)[:count]
+
+
+def imported_modules(lines):
+    """Every module (nested ones included) named in -X importtime output"""
+    modules = set()
+    for line in lines:
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.add(parts[2].strip())
+    return modules
+
+
+def eager_imports(lines, lazy=LAZY_IMPORTS):
+    """The lazy modules (or their submodules) that were imported, sorted"""
+    return sorted(m for m in imported_modules(lines)
+                  if any(m == name or m.startswith(name + ".") for name in lazy))
+
+
+def check_imports(command) -> int:
+    """Fail when the tool imports a lazy module before its first check"""
+    elapsed_ms, imports = _launch(command, importtime=True)
+    if elapsed_ms is None:
+        print(f"✗ {' '.join(command)} exited before its first check", file=sys.stderr)
+        return 2
+    eager = eager_imports(imports)
+    if eager:
+        print(f"✗ {' '.join(command)} imports before its first check: {', '.join(eager)}")
+        return 1
+    print(f"✓ {' '.join(command)}: no lazy module imported before the first check")
+    return 0
+
+
+def main(argv=None) -> int:
+    import argparse
+    import statistics
+
+    parser = argparse.ArgumentParser(
+        description="Measure time to first check of a diagnostic tool against a budget"
+    )
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MS)),
+                        help=f"Fail when the median exceeds this (default: ${BUDGET_ENV} "
+                             f"or {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument("--runs", type=int, default=5, help="Timed launches (default: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Imports to list (default: 10)")
+    parser.add_argument("--check-imports", action="store_true",
+                        help="Only check that no lazy module is imported before the first check")
+    parser.add_argument("script", help="Tool to launch, e.g. thorough_diagnostic.py")
+    parser.add_argument("tool_args", nargs=argparse.REMAINDER, help="Arguments for the tool")
+    args = parser.parse_args(argv)
+
+    command = [args.script] + args.tool_args
+    if args.check_imports:
+        return check_imports(command)
+
+    timings = []
+    for _ in range(max(1, args.runs)):
+        elapsed_ms, _ = _launch(command)
+        if elapsed_ms is None:
+            print(f"✗ {' '.join(command)} exited before its first check", file=sys.stderr)
+            return 2
+        timings.append(elapsed_ms)
+
+    # One extra launch under -X importtime explains where the time goes
+    _, imports = _launch(command, importtime=True)
+    median = statistics.median(timings)
+
+    print(f"Time to first check: {' '.join(command)}")
+    print(f"  median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms "
+          f"({len(timings)} runs), budget {args.budget_ms:.0f} ms")
+    if imports:
+        print("  Slowest top-level imports (cumulative, under -X importtime):")
+        for micros, module in top_imports(imports, args.top):
+            print(f"    {micros / 1000:8.1f} ms  {module}")
+
+    if median > args.budget_ms:
+        print(f"✗ Over budget by {median - args.budget_ms:.1f} ms")
+        return 1
+    print("✓ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+AI File Sorter - Synthetic Databases for Scale Testing
+
+generate_database() builds a categorization database with the app's real
+schema (the DDL is replayed from app/lib/DatabaseManager.cpp, see schema.py)
+and a chosen number of file_categorization rows, with data shaped like a
+long-lived install:
+
+- category_taxonomy: a few hundred to 2,000 category/subcategory pairs,
+  used with a Zipf-like skew (a handful of categories cover most files)
+- file_categorization: files spread over directories of uneven size, with
+  extensions that fit their category, ~5% directories, timestamps over
+  two years and taxonomy_id set
+- category_alias for ~30% of the taxonomy, confidence_scores for ~1/3 of
+  the files, user_corrections for 0.5%, content_analysis_cache for 10%
+  (paths that do not exist on this machine), a year of api_usage_tracking
+
+Rows are written with executemany() in chunks inside one transaction per
+table, with journal_mode=OFF and synchronous=OFF; the explicit indexes are
+created after the data is loaded. A 1M-row database takes well under a
+minute, 10M rows a few minutes.
+
+bench_scaling() runs the tool's database checks against several sizes and
+reports how the time of each step grows with the row count.
+
+Usage:
+    python3 -m diagnostic_lib.synthdb generate --rows 1m OUT.db
+    python3 -m diagnostic_lib.synthdb bench --sizes 10k,1m,10m [--workdir DIR]
+"""
+
+import datetime
+import itertools
+import json
+import math
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from diagnostic_lib.schema import SOURCE, apply_statements, is_index_statement, source_statements
+
+CHUNK_ROWS = 50000
+FILES_PER_DIR = 100
+HISTORY_DAYS = 730
+
+DEFAULT_SIZES = ("10k", "1m", "10m")
+
+TAXONOMY = {
+    "Documents": ["Invoices", "Reports", "Letters", "Contracts", "Manuals", "Receipts", "Notes"],
+    "Images": ["Photos", "Screenshots", "Wallpapers", "Scans", "Diagrams", "Icons"],
+    "Music": ["Albums", "Podcasts", "Recordings", "Samples"],
+    "Videos": ["Movies", "Clips", "Tutorials", "Recordings"],
+    "Archives": ["Backups", "Downloads", "Projects"],
+    "Software": ["Installers", "Drivers", "Utilities", "Games"],
+    "Development": ["Source Code", "Scripts", "Configs", "Datasets", "Notebooks"],
+    "Spreadsheets": ["Budgets", "Inventories", "Schedules", "Data Exports"],
+    "Presentations": ["Slides", "Templates", "Talks"],
+    "E-books": ["Fiction", "Technical", "Comics", "Papers"],
+    "Fonts": ["Serif", "Sans Serif", "Display"],
+    "3D Models": ["Printing", "CAD", "Scenes"],
+}
+
+EXTENSIONS = {
+    "Documents": [".pdf", ".docx", ".txt", ".odt", ".rtf"],
+    "Images": [".jpg", ".png", ".heic", ".gif", ".svg", ".webp"],
+    "Music": [".mp3", ".flac", ".m4a", ".wav"],
+    "Videos": [".mp4", ".mkv", ".mov", ".avi"],
+    "Archives": [".zip", ".tar.gz", ".7z", ".rar"],
+    "Software": [".dmg", ".exe", ".msi", ".deb", ".AppImage"],
+    "Development": [".py", ".cpp", ".json", ".yaml", ".ipynb", ".csv"],
+    "Spreadsheets": [".xlsx", ".ods", ".csv"],
+    "Presentations": [".pptx", ".key", ".odp"],
+    "E-books": [".epub", ".mobi", ".pdf", ".cbz"],
+    "Fonts": [".ttf", ".otf", ".woff2"],
+    "3D Models": [".stl", ".obj", ".blend", ".step"],
+}
+
+MIME_TYPES = {".pdf": "application/pdf", ".txt": "text/plain", ".jpg": "image/jpeg", ".png": "image/png",
+              ".mp3": "audio/mpeg", ".mp4": "video/mp4", ".zip": "application/zip", ".json": "application/json",
+              ".csv": "text/csv", ".py": "text/x-python", ".epub": "application/epub+zip"}
+
+WORDS = ("report", "scan", "photo", "final", "draft", "backup", "notes", "invoice", "track", "clip",
+         "project", "setup", "data", "export", "summary", "holiday", "meeting", "budget", "copy", "v2")
+
+TOP_DIRS = ("Downloads", "Documents", "Desktop", "Pictures", "Music", "Videos", "Projects", "Archive")
+
+MODEL_VERSIONS = ("gpt-4o-mini", "gemini-1.5-flash", "llama-3.2-3b", "mistral-7b")
+
+_PROGRESS = Callable[[str, int, int], None]
+
+
+def parse_size(text: str) -> int:
+    """Row count from '10k', '1m', '2.5M' or a plain number"""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def size_label(rows: int) -> str:
+    for scale, suffix in ((1000000, "m"), (1000, "k")):
+        if rows >= scale and rows % scale == 0:
+            return f"{rows // scale}{suffix}"
+    return str(rows)
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative weights of ranks 1..count"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def _normalize(label: str) -> str:
+    """DatabaseManager::normalize_label(): lowercase alphanumerics, single spaces"""
+    return " ".join("".join(c.lower() if c.isalnum() else " " for c in label).split())
+
+
+def _taxonomy(size: int) -> List[tuple]:
+    """(category, subcategory) pairs, the common ones first"""
+    pairs = [(c, s) for c, subs in TAXONOMY.items() for s in subs]
+    extra = 2
+    while len(pairs) < size:
+        pairs += [(c, f"{s} {extra}") for c, s in pairs[:len(TAXONOMY) * 4]]
+        extra += 1
+    return pairs[:size]
+
+
+def _insert(conn: sqlite3.Connection, table: str, columns: Sequence[str], rows: Iterable[tuple],
+            total: int, progress: Optional[_PROGRESS]):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    done = 0
+    conn.execute("BEGIN")
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, CHUNK_ROWS))
+        if not chunk:
+            break
+        conn.executemany(sql, chunk)
+        done += len(chunk)
+        if progress is not None:
+            progress(table, done, total)
+    conn.execute("COMMIT")
+
+
+def generate_database(path, rows: int, source_text: str, seed: int = 0,
+                      progress: Optional[_PROGRESS] = None) -> Dict[str, int]:
+    """Create path with rows file_categorization rows; returns row counts per table"""
+    rng = random.Random(seed)
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    statements = source_statements(source_text)
+    conn = sqlite3.connect(str(path), isolation_level=None)
+    counts: Dict[str, int] = {}
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        apply_statements(conn, [s for s in statements if not is_index_statement(s)])
+
+        now = datetime.datetime.now().replace(microsecond=0)
+        days = [(now - datetime.timedelta(days=d)).strftime("%Y-%m-%d") for d in range(HISTORY_DAYS)]
+
+        def timestamp() -> str:
+            second = rng.randrange(86400)
+            return f"{rng.choice(days)} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+
+        # Taxonomy and aliases
+        pairs = _taxonomy(max(80, min(2000, rows // 500)))
+        _insert(conn, "category_taxonomy",
+                ("id", "canonical_category", "canonical_subcategory", "normalized_category",
+                 "normalized_subcategory", "frequency"),
+                ((i, c, s, _normalize(c), _normalize(s), 0) for i, (c, s) in enumerate(pairs, 1)),
+                len(pairs), progress)
+        counts["category_taxonomy"] = len(pairs)
+        aliases = {}
+        for i, (c, s) in enumerate(pairs, 1):
+            if rng.random() < 0.3:
+                for variant in (f"{c}s", f"my {c}", f"{c} files")[:rng.randint(1, 3)]:
+                    aliases.setdefault((_normalize(variant), _normalize(s)), i)
+        _insert(conn, "category_alias", ("alias_category_norm", "alias_subcategory_norm", "taxonomy_id"),
+                ((a, b, t) for (a, b), t in aliases.items()), len(aliases), progress)
+        counts["category_alias"] = len(aliases)
+
+        # Files: Zipf over taxonomy entries and over directories
+        taxonomy_weights = _zipf_weights(len(pairs))
+        dir_count = max(1, rows // FILES_PER_DIR)
+        dir_weights = _zipf_weights(dir_count, 0.8)
+        dirs = [f"/home/user/{TOP_DIRS[d % len(TOP_DIRS)]}/{rng.choice(WORDS)}_{d}" for d in range(dir_count)]
+
+        def files():
+            for i in range(rows):
+                t = rng.choices(range(len(pairs)), cum_weights=taxonomy_weights)[0]
+                category, subcategory = pairs[t]
+                is_dir = rng.random() < 0.05
+                name = f"{rng.choice(WORDS)}_{i}"
+                if not is_dir:
+                    name += rng.choice(EXTENSIONS[category])
+                directory = dirs[rng.choices(range(dir_count), cum_weights=dir_weights)[0]]
+                yield (name, "D" if is_dir else "F", directory, category, subcategory, t + 1,
+                       0, 0, timestamp())
+
+        file_columns = ("file_name", "file_type", "dir_path", "category", "subcategory", "taxonomy_id",
+                        "categorization_style", "user_provided", "timestamp")
+        _insert(conn, "file_categorization", file_columns, files(), rows, progress)
+        counts["file_categorization"] = rows
+
+        # Tables keyed by a sample of the files (read back in rowid order, one pass each)
+        def sample(share: float):
+            for row in conn.execute("SELECT file_name, file_type, dir_path, category, subcategory "
+                                    "FROM file_categorization"):
+                if rng.random() < share:
+                    yield row
+
+        confidence = [(n, t, d, round(rng.betavariate(8, 2), 3), round(rng.betavariate(6, 3), 3),
+                       "{}", rng.choice(MODEL_VERSIONS), timestamp())
+                      for n, t, d, _, _ in sample(1 / 3)]
+        _insert(conn, "confidence_scores",
+                ("file_name", "file_type", "dir_path", "category_confidence", "subcategory_confidence",
+                 "confidence_factors", "model_version", "timestamp"),
+                confidence, len(confidence), progress)
+
+        conn.execute("INSERT INTO user_profiles (profile_name, is_active, created_at) "
+                     "VALUES ('Default', 1, DATETIME('now', '-2 years'))")
+        corrections = []
+        for n, t, d, c, s in sample(0.005):
+            corrected = pairs[rng.randrange(len(pairs))]
+            corrections.append((f"{d}/{n}", n, c, s, corrected[0], corrected[1],
+                                os.path.splitext(n)[1].lower(), timestamp(), 1))
+        _insert(conn, "user_corrections",
+                ("file_path", "file_name", "original_category", "original_subcategory", "corrected_category",
+                 "corrected_subcategory", "file_extension", "timestamp", "profile_id"),
+                corrections, len(corrections), progress)
+
+        content = []
+        for n, t, d, c, s in sample(0.1):
+            if t != "F":
+                continue
+            ext = os.path.splitext(n)[1].lower()
+            content.append((f"{d}/{n}", f"{rng.getrandbits(256):064x}", MIME_TYPES.get(ext),
+                            f"{c.lower()},{s.lower()}", "en", "{}", f"{s} ({c})", timestamp()))
+        _insert(conn, "content_analysis_cache",
+                ("file_path", "content_hash", "mime_type", "keywords", "detected_language", "metadata",
+                 "analysis_summary", "timestamp"),
+                content, len(content), progress)
+
+        usage = []
+        for day in days[:365]:
+            requests = rng.randint(0, max(1, rows // 2000))
+            if requests:
+                tokens = requests * rng.randint(350, 650)
+                usage.append(("openai", day, tokens, requests, round(tokens / 1e6 * 0.6, 6)))
+                usage.append(("gemini", day, 0, min(1500, requests // 2), 0.0))
+        _insert(conn, "api_usage_tracking", ("provider", "date", "tokens_used", "requests_made", "cost_estimate"),
+                usage, len(usage), progress)
+
+        apply_statements(conn, [s for s in statements if is_index_statement(s)])
+        for table in ("confidence_scores", "user_corrections", "content_analysis_cache", "api_usage_tracking"):
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+    return counts
+
+
+# ==================== Scaling benchmark ====================
+
+def _run_tool(repo_root: Path, database: Path, state_dir: Path, extra_args: Sequence[str]) -> dict:
+    """Run the database checks on database; returns the JSON report plus wall time"""
+    config_root = database.parent.parent  # <root>/AIFileSorter/<file>
+    env = dict(os.environ, AI_FILE_SORTER_CONFIG_DIR=str(config_root), CATEGORIZATION_CACHE_FILE=database.name)
+    report_path = state_dir / "report.json"
+    command = [sys.executable, str(repo_root / "thorough_diagnostic.py"), "--only", "database",
+               "--state-dir", str(state_dir), "--output", str(report_path), *extra_args]
+    started = time.perf_counter()
+    completed = subprocess.run(command, env=env, cwd=str(repo_root), capture_output=True, text=True)
+    wall_s = time.perf_counter() - started
+    try:
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        raise RuntimeError(f"thorough_diagnostic.py failed ({completed.returncode}):\n{completed.stderr[-2000:]}")
+    return {"wall_s": round(wall_s, 3), "report": report}
+
+
+def _exponent(small: dict, large: dict, key: str) -> Optional[float]:
+    """Growth exponent between two sizes: ~1 linear, ~0 constant"""
+    a, b = small["steps_ms"].get(key), large["steps_ms"].get(key)
+    if not a or not b or large["rows"] == small["rows"] or a < 5:  # Too fast to compare
+        return None
+    return round(math.log(b / a) / math.log(large["rows"] / small["rows"]), 2)
+
+
+def bench_scaling(sizes: Sequence[int], workdir: Path, repo_root: Path, seed: int = 0,
+                  extra_args: Sequence[str] = (), progress: Optional[Callable[[str], None]] = None) -> dict:
+    """Generate (or reuse) a database per size, run the database checks on each and compare"""
+    source_text = (repo_root / SOURCE).read_text(encoding="utf-8")
+    say = progress or (lambda message: None)
+    results = []
+    for rows in sorted(sizes):
+        label = size_label(rows)
+        database = workdir / label / "AIFileSorter" / "categorization_results.db"
+        database.parent.mkdir(parents=True, exist_ok=True)
+        generated_s = None
+        if not database.exists():
+            say(f"Generating {label} rows → {database}")
+            started = time.perf_counter()
+            generate_database(database, rows, source_text, seed=seed)
+            generated_s = round(time.perf_counter() - started, 1)
+        say(f"Running database checks on {label} rows")
+        with tempfile.TemporaryDirectory(prefix="aifs-scale-") as state:
+            run = _run_tool(repo_root, database, Path(state), extra_args)
+        report = run["report"]
+        results.append({
+            "rows": rows,
+            "label": label,
+            "database_bytes": database.stat().st_size,
+            "generated_s": generated_s,
+            "wall_s": run["wall_s"],
+            "check_ms": next((t["wall_ms"] for t in report.get("check_timings", []) if t.get("check") == "database"),
+                             None),
+            "steps_ms": report.get("database_timings") or {},
+            "statuses": {r["name"]: r["status"] for r in report.get("results_by_category", {}).get("Database", [])},
+        })
+    for small, large in zip(results, results[1:]):
+        large["growth_exponent"] = {step: _exponent(small, large, step) for step in large["steps_ms"]}
+    return {"sizes": results}
+
+
+def _print_bench(result: dict):
+    runs = result["sizes"]
+    steps = list(dict.fromkeys(step for run in runs for step in run["steps_ms"]))
+    header = f"{'step':<28}" + "".join(f"{run['label']:>12}" for run in runs)
+    print(header)
+    print("-" * len(header))
+    for step in steps:
+        cells = "".join(f"{run['steps_ms'].get(step, 0) / 1000:>11.2f}s" for run in runs)
+        growth = runs[-1].get("growth_exponent", {}).get(step) if len(runs) > 1 else None
+        print(f"{step:<28}{cells}" + (f"   x^{growth}" if growth is not None else ""))
+    print(f"{'total (process)':<28}" + "".join(f"{run['wall_s']:>11.2f}s" for run in runs))
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Synthetic categorization databases for scale testing")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="Write one synthetic database")
+    gen.add_argument("output", help="Database file to create (overwritten)")
+    gen.add_argument("--rows", default="10k", help="file_categorization rows, e.g. 10k, 1m (default: 10k)")
+    gen.add_argument("--seed", type=int, default=0)
+    bench = sub.add_parser("bench", help="Run the database checks against several sizes")
+    bench.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                       help=f"Comma-separated sizes (default: {','.join(DEFAULT_SIZES)})")
+    bench.add_argument("--workdir", help="Where generated databases are kept and reused "
+                                         "(default: a temporary directory)")
+    bench.add_argument("--output", help="Also write the results as JSON")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--root", default=".", help="Repository root (default: current directory)")
+    bench.add_argument("tool_args", nargs="*", help="Extra thorough_diagnostic.py options (after --)")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        source_text = (Path(__file__).resolve().parents[1] / SOURCE).read_text(encoding="utf-8")
+        rows = parse_size(args.rows)
+        started = time.perf_counter()
+
+        def report(table: str, done: int, total: int):
+            print(f"\r  {table}: {done:,}/{total:,}", end="\n" if done >= total else "", flush=True)
+
+        counts = generate_database(args.output, rows, source_text, seed=args.seed, progress=report)
+        print(f"✓ Wrote {args.output} in {time.perf_counter() - started:.1f}s")
+        for table, count in counts.items():
+            print(f"  {table}: {count:,}")
+        return 0
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="aifs-synth-"))
+    result = bench_scaling(sizes, workdir, Path(args.root).resolve(), seed=args.seed,
+                           extra_args=args.tool_args, progress=lambda m: print(f"… {m}", flush=True))
+    _print_bench(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"✓ Results saved: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
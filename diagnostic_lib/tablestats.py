@@ -0,0 +1,145 @@
+"""
+AI File Sorter - Table Statistics
+
+Row counts and on-disk sizes per table and index without a COUNT(*) scan of
+every table:
+
+- rows come from sqlite_stat1 when ANALYZE has run (the app's
+  PRAGMA optimize keeps it fresh), otherwise from the rowid range
+  (MAX(rowid) - MIN(rowid) + 1, two B-tree seeks; an upper bound when rows
+  were deleted). Exact COUNT(*) is opt-in.
+- bytes come from the dbstat virtual table when SQLite was built with it.
+  dbstat visits every page once, so it runs under a time budget and is
+  abandoned (sizes reported as unavailable) when the budget runs out.
+- page_count, page_size and freelist_count give the file-level totals.
+"""
+
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from diagnostic_lib.dbutil import quote_identifier
+
+# Progress handler granularity (SQLite VM instructions between checks)
+_PROGRESS_STEPS = 10000
+
+
+class TableStats:
+    """Approximate (or exact) size of one table and its indexes"""
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: Optional[int] = None
+        self.rows_source: Optional[str] = None  # "exact", "sqlite_stat1" or "rowid_range"
+        self.table_bytes: Optional[int] = None
+        self.table_pages: Optional[int] = None
+        self.index_bytes: Dict[str, int] = {}
+
+    @property
+    def total_bytes(self) -> Optional[int]:
+        if self.table_bytes is None:
+            return None
+        return self.table_bytes + sum(self.index_bytes.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "table": self.name,
+            "rows": self.rows,
+            "rows_source": self.rows_source,
+            "table_bytes": self.table_bytes,
+            "table_pages": self.table_pages,
+            "index_bytes": dict(self.index_bytes),
+            "total_bytes": self.total_bytes,
+        }
+
+
+def _stat1_rows(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Row counts recorded by ANALYZE (the first number of each stat entry)"""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        return {}
+    rows: Dict[str, int] = {}
+    for table, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+        try:
+            count = int(str(stat).split()[0])
+        except (ValueError, IndexError):
+            continue
+        rows[table] = max(rows.get(table, 0), count)
+    return rows
+
+
+def _rowid_range(conn: sqlite3.Connection, table: str) -> Optional[int]:
+    try:
+        low, high = conn.execute(
+            f"SELECT MIN(rowid), MAX(rowid) FROM {quote_identifier(table)}"
+        ).fetchone()
+    except sqlite3.Error:  # WITHOUT ROWID table
+        return None
+    return 0 if low is None else high - low + 1
+
+
+def dbstat_sizes(conn: sqlite3.Connection,
+                 time_budget: float = 2.0) -> Tuple[Optional[Dict[str, Tuple[int, int]]], str]:
+    """Bytes and pages per B-tree from dbstat: ({name: (bytes, pages)} or None, status)
+
+    status is "dbstat", "unavailable" (SQLite built without it) or "timeout".
+    """
+    deadline = time.perf_counter() + time_budget
+    conn.set_progress_handler(lambda: 1 if time.perf_counter() > deadline else 0, _PROGRESS_STEPS)
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize), COUNT(*) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.OperationalError as e:
+        if "interrupt" in str(e):
+            return None, "timeout"
+        return None, "unavailable"
+    finally:
+        conn.set_progress_handler(None, 0)
+    return {name: (size, pages) for name, size, pages in rows}, "dbstat"
+
+
+def table_statistics(conn: sqlite3.Connection, exact: bool = False,
+                     time_budget: float = 2.0) -> Tuple[List[TableStats], dict]:
+    """Statistics for every user table, largest first, plus file-level metadata"""
+    objects = conn.execute(
+        "SELECT type, name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"
+    ).fetchall()
+    tables = {name: TableStats(name) for kind, name, _ in objects
+              if kind == "table" and not name.startswith("sqlite_")}
+
+    stat1 = {} if exact else _stat1_rows(conn)
+    for name, stats in tables.items():
+        if exact:
+            try:
+                stats.rows = conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(name)}").fetchone()[0]
+                stats.rows_source = "exact"
+            except sqlite3.Error:
+                pass
+        elif name in stat1:
+            stats.rows, stats.rows_source = stat1[name], "sqlite_stat1"
+        else:
+            stats.rows = _rowid_range(conn, name)
+            stats.rows_source = "rowid_range" if stats.rows is not None else None
+
+    sizes, sizes_source = dbstat_sizes(conn, time_budget)
+    if sizes is not None:
+        for kind, name, table in objects:
+            if table not in tables or name not in sizes:
+                continue
+            size, pages = sizes[name]
+            if kind == "table":
+                tables[table].table_bytes, tables[table].table_pages = size, pages
+            else:
+                tables[table].index_bytes[name] = size
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    meta = {
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "database_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist,
+        "sizes_source": sizes_source,
+        "exact_counts": exact,
+    }
+    ordered = sorted(tables.values(), key=lambda t: (t.total_bytes or 0, t.rows or 0), reverse=True)
+    return ordered, meta
@@ -0,0 +1,46 @@
+"""
+AI File Sorter - Polling Change Watcher
+
+Watches the inputs declared by each check (see diagnostic_lib.incremental)
+and reports which checks are affected whenever something changes. Polling
+keeps it dependency-free and portable: each poll is a handful of stat()
+calls plus a directory-only walk for tree inputs.
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from diagnostic_lib.incremental import fingerprint
+
+
+class ChangeWatcher:
+    """Maps filesystem changes to the checks whose inputs they touch"""
+
+    def __init__(self, inputs: Dict[str, Sequence[Tuple[str, object]]],
+                 interval: float = 5.0, context: str = ""):
+        self.inputs = {name: list(i) for name, i in inputs.items() if i is not None}
+        self.interval = interval
+        self.context = context
+        self._last: Dict[str, str] = self.snapshot()
+
+    def snapshot(self) -> Dict[str, str]:
+        """Current fingerprint of every watched check's inputs"""
+        return {name: fingerprint(i, self.context) for name, i in self.inputs.items()}
+
+    def poll(self) -> List[str]:
+        """Checks whose inputs changed since the previous poll (in declaration order)"""
+        current = self.snapshot()
+        changed = [name for name in self.inputs if current[name] != self._last.get(name)]
+        self._last = current
+        return changed
+
+    def wait(self, max_polls: Optional[int] = None) -> List[str]:
+        """Block until at least one check is affected by a change"""
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            time.sleep(self.interval)
+            polls += 1
+            changed = self.poll()
+            if changed:
+                return changed
+        return []
@@ -6,19 +6,26 @@ This tool performs a comprehensive health check of the AI File Sorter installati
 validates all features, and generates a detailed diagnostic report.
 
 Usage:
-    python3 diagnostic_tool.py [--verbose] [--output FILE]
+    python3 diagnostic_tool.py [--verbose] [--output FILE] [--no-probe-cache]
+                               [--profile [DIR]] [--profile-memory]
 """
 
+# json, platform, sqlite3 and the profiler are imported where they are used
+# to keep startup fast (see diagnostic_lib/startup.py)
 import os
 import sys
-import json
-import platform
-import subprocess
-import sqlite3
 import datetime
 import argparse
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+
+from diagnostic_lib.fswalk import TreeWalker
+from diagnostic_lib.apppaths import diagnostic_state_dir, legacy_data_dir
+from diagnostic_lib.probes import ProbeBatch, default_probe_cache
+from diagnostic_lib.startup import mark_first_check, system_name
+
+if TYPE_CHECKING:
+    from diagnostic_lib.profiling import CheckProfiler
 
 # ANSI color codes for terminal output
 class Colors:
@@ -44,10 +51,11 @@ class DiagnosticResult:
 class DiagnosticTool:
     """Main diagnostic tool class"""
     
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, profile_dir: Optional[str] = None,
+                 profile_memory: bool = False, probe_cache: bool = True):
         self.verbose = verbose
         self.results: List[DiagnosticResult] = []
-        self.platform = platform.system()
+        self.platform = system_name()
         self.start_time = datetime.datetime.now()
         
         # Determine base directory
@@ -59,6 +67,25 @@ class DiagnosticTool:
             self.app_dir = Path("app/bin")
             if not self.app_dir.exists():
                 self.app_dir = Path(".")
+        
+        # External commands are launched together the first time a check needs one;
+        # output is cached (shared with thorough_diagnostic.py) until the executables change
+        probes = {}
+        if self.platform != "Windows":
+            probes["pkg-config"] = ["pkg-config", "--modversion", "Qt6Widgets"]
+        if self.platform == "Darwin":
+            probes["sysctl"] = ["sysctl", "hw.memsize"]
+        cache = default_probe_cache(diagnostic_state_dir()) if probe_cache else None
+        self.probes = ProbeBatch(probes, cache=cache)
+        
+        # Directory walks are shared (and memoized) across all checks of this run
+        self.tree = TreeWalker()
+        
+        # Optional per-check cProfile/tracemalloc artifacts
+        self.profiler: Optional["CheckProfiler"] = None
+        if profile_dir:
+            from diagnostic_lib.profiling import CheckProfiler
+            self.profiler = CheckProfiler(profile_dir, trace_memory=profile_memory)
     
     def log(self, message: str, color: str = ""):
         """Print a log message"""
@@ -105,6 +132,7 @@ class DiagnosticTool:
         self.section_header("System Information")
         
         # Platform
+        import platform
         self.add_result(
             "Platform",
             "INFO",
@@ -182,7 +210,7 @@ class DiagnosticTool:
             try:
                 dir_path = Path(dir_path)
                 if dir_path.exists() and dir_path.is_dir():
-                    file_count = sum(1 for _ in dir_path.rglob('*') if _.is_file())
+                    file_count = self.tree.stats(dir_path).file_count
                     self.add_result(
                         f"Directory: {dir_path}",
                         "OK",
@@ -224,14 +252,25 @@ class DiagnosticTool:
             )
             
             try:
-                result = subprocess.run(
-                    ["pkg-config", "--modversion", "Qt6Widgets"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    version = result.stdout.strip()
+                probe = self.probes.get("pkg-config")
+                if probe.timed_out:
+                    self.add_result(
+                        "Qt6",
+                        "WARNING",
+                        "pkg-config timeout",
+                        "Command took too long to execute"
+                    )
+                elif probe.not_found:
+                    self.add_result(
+                        "Qt6",
+                        "WARNING",
+                        "pkg-config not available",
+                        "Cannot verify Qt installation"
+                    )
+                elif probe.error:
+                    raise RuntimeError(probe.error)
+                elif probe.ok:
+                    version = probe.stdout.strip()
                     self.add_result(
                         "Qt6Widgets",
                         "OK",
@@ -245,20 +284,6 @@ class DiagnosticTool:
                         "Not found via pkg-config",
                         "May still be available via system paths"
                     )
-            except subprocess.TimeoutExpired:
-                self.add_result(
-                    "Qt6",
-                    "WARNING",
-                    "pkg-config timeout",
-                    "Command took too long to execute"
-                )
-            except FileNotFoundError:
-                self.add_result(
-                    "Qt6",
-                    "WARNING",
-                    "pkg-config not available",
-                    "Cannot verify Qt installation"
-                )
             except Exception as e:
                 self.add_result(
                     "Qt6",
@@ -312,7 +337,9 @@ class DiagnosticTool:
                 ggml_path = Path(f"app/lib/ggml/{variant}")
             
             if ggml_path.exists():
-                dll_count = sum(1 for f in ggml_path.glob("*.dll" if self.platform == "Windows" else "*.so"))
+                dll_count, _ = self.tree.stats(ggml_path).direct_files(
+                    ".dll" if self.platform == "Windows" else ".so"
+                )
                 backend_type = {
                     "wocuda": "CPU (OpenBLAS)",
                     "wcuda": "CUDA (NVIDIA GPU)",
@@ -337,7 +364,7 @@ class DiagnosticTool:
         # Check for precompiled llama libraries
         precompiled_dir = Path("app/lib/precompiled")
         if precompiled_dir.exists():
-            variants = [d.name for d in precompiled_dir.iterdir() if d.is_dir()]
+            variants = self.tree.stats(precompiled_dir).subdirs
             self.add_result(
                 "Precompiled Libraries",
                 "OK",
@@ -358,17 +385,13 @@ class DiagnosticTool:
         """Check database connectivity and structure"""
         self.section_header("Database")
         
-        # Find database file
-        if self.platform == "Windows":
-            db_paths = [
-                Path(os.path.expandvars("%APPDATA%/aifilesorter/aifilesorter.db")),
-                Path("aifilesorter.db"),
-            ]
-        else:
-            db_paths = [
-                Path.home() / ".local/share/aifilesorter/aifilesorter.db",
-                Path("aifilesorter.db"),
-            ]
+        # Find database file (the app's own location first, honouring CATEGORIZATION_CACHE_FILE)
+        from diagnostic_lib.apppaths import LEGACY_DATABASE_FILE, app_database_path
+        db_paths = [
+            app_database_path(),
+            legacy_data_dir() / LEGACY_DATABASE_FILE,
+            Path("aifilesorter.db"),
+        ]
         
         db_path = None
         for path in db_paths:
@@ -411,6 +434,7 @@ class DiagnosticTool:
             return
         
         # Check database integrity
+        import sqlite3
         try:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
@@ -602,75 +626,77 @@ class DiagnosticTool:
     def check_logs(self):
         """Check log files"""
         self.section_header("Log Files")
+        from diagnostic_lib.apppaths import LOG_FILES, app_log_dir, log_sources, resolve_log_dir
+        from diagnostic_lib.logtail import recent_entries, summarize_levels
         
-        # Find log directory
-        if self.platform == "Windows":
-            log_dirs = [
-                Path(os.path.expandvars("%APPDATA%/aifilesorter/logs")),
-                Path("logs"),
-            ]
-        else:
-            log_dirs = [
-                Path.home() / ".local/share/aifilesorter/logs",
-                Path("logs"),
-            ]
+        # Where Logger.cpp writes (older builds used the data directory)
+        log_dir = resolve_log_dir(legacy_data_dir() / "logs")
         
-        log_dir = None
-        for path in log_dirs:
-            if path.exists():
-                log_dir = path
-                break
-        
-        if not log_dir:
+        if not log_dir.exists():
             self.add_result(
                 "Log Directory",
                 "INFO",
                 "Not found (will be created on first run)",
-                f"Expected locations: {', '.join(str(p) for p in log_dirs)}"
+                f"Expected location: {app_log_dir() or log_dir}"
             )
             return
         
-        # Count log files
-        log_files = list(log_dir.glob("*.log")) + list(log_dir.glob("*.txt"))
+        sources = log_sources(log_dir)
         
         self.add_result(
             "Log Directory",
             "OK",
-            f"Found ({len(log_files)} log files)",
+            f"Found ({len(sources)} log files)",
             f"Path: {log_dir}"
         )
+        if not sources:
+            return
         
-        # Check for error logs
-        error_logs = [f for f in log_files if "error" in f.name.lower()]
-        if error_logs:
+        # Classify entries by spdlog level, reading the end of each current (not rotated) file
+        current = [path for logger, path in sources if path.name in LOG_FILES or logger == "other"]
+        try:
+            summaries = [summarize_levels(path, max_scan_bytes=8 * 1024 * 1024) for path in current]
+        except OSError as e:
+            self.add_result(
+                "Error Log Read",
+                "WARNING",
+                "Could not read logs",
+                str(e)
+            )
+            return
+        errors = sum(summary.at_least("error") for summary in summaries)
+        if errors:
             self.add_result(
                 "Error Logs",
                 "WARNING",
-                f"{len(error_logs)} error log(s) found",
-                f"Files: {', '.join(f.name for f in error_logs)}"
+                f"{errors} error/critical entries",
+                '\n'.join(f"{Path(summary.path).name}: {summary.at_least('error')}" for summary in summaries
+                           if summary.at_least("error"))
             )
             
-            # Check the most recent error log
-            if error_logs:
-                latest_error = max(error_logs, key=lambda f: f.stat().st_mtime)
-                try:
-                    with open(latest_error, 'r') as f:
-                        lines = f.readlines()
-                        if lines:
-                            last_lines = lines[-5:]  # Last 5 lines
-                            self.add_result(
-                                "Recent Errors",
-                                "INFO",
-                                f"Last {len(last_lines)} lines from {latest_error.name}",
-                                '\n'.join(line.strip() for line in last_lines)
-                            )
-                except Exception as e:
+            # The most recent error entries across the files (read backwards from their ends)
+            try:
+                entries = recent_entries(current, 5, min_level="error", max_scan_bytes=8 * 1024 * 1024)
+                if entries:
                     self.add_result(
-                        "Error Log Read",
-                        "WARNING",
-                        "Could not read error log",
-                        str(e)
+                        "Recent Errors",
+                        "INFO",
+                        f"Last {len(entries)} error line(s)",
+                        '\n'.join(f"{Path(path).name}: {line.strip()}" for path, line in entries)
                     )
+            except Exception as e:
+                self.add_result(
+                    "Error Log Read",
+                    "WARNING",
+                    "Could not read error log",
+                    str(e)
+                )
+        else:
+            self.add_result(
+                "Error Logs",
+                "OK",
+                "No error entries"
+            )
     
     # ==================== Feature Tests ====================
     
@@ -714,11 +740,10 @@ class DiagnosticTool:
         
         # Check available disk space
         try:
+            import shutil
             if self.platform == "Windows":
-                import shutil
                 total, used, free = shutil.disk_usage("/")
             else:
-                import shutil
                 total, used, free = shutil.disk_usage(str(Path.home()))
             
             free_gb = free / (1024**3)
@@ -760,10 +785,9 @@ class DiagnosticTool:
             elif self.platform == "Darwin":
                 # macOS memory check
                 try:
-                    import subprocess
-                    result = subprocess.run(['sysctl', 'hw.memsize'], capture_output=True, text=True)
-                    if result.returncode == 0:
-                        mem_bytes = int(result.stdout.split()[1])
+                    probe = self.probes.get("sysctl")
+                    if probe.ok:
+                        mem_bytes = int(probe.stdout.split()[1])
                         total_gb = mem_bytes / (1024**3)
                         status = "OK" if total_gb > 4 else "WARNING"
                         self.add_result(
@@ -800,6 +824,8 @@ class DiagnosticTool:
     
     def generate_report(self, output_file: Optional[str] = None) -> str:
         """Generate a comprehensive diagnostic report"""
+        import json
+        import platform
         
         # Calculate statistics
         total = len(self.results)
@@ -852,6 +878,7 @@ class DiagnosticTool:
                 "info": info_count,
                 "health": health
             },
+            "probes": [p.to_dict() for p in self.probes.results],
             "results": [
                 {
                     "name": r.name,
@@ -900,9 +927,13 @@ class DiagnosticTool:
         ]
         
         # Run all checks, logging errors but continuing
+        mark_first_check()
         for check_name, check_method in check_methods:
             try:
-                check_method()
+                if self.profiler is not None:
+                    self.profiler.profile(check_name, check_method)
+                else:
+                    check_method()
             except KeyboardInterrupt:
                 self.log(f"\n{Colors.WARNING}Diagnostic interrupted by user{Colors.ENDC}")
                 self.add_result(
@@ -929,6 +960,11 @@ class DiagnosticTool:
                 if self.verbose:
                     self.log(f"{Colors.FAIL}Traceback:{Colors.ENDC}", Colors.FAIL)
                     self.log(error_details)
+        
+        if self.profiler is not None:
+            collapsed = self.profiler.write_collapsed()
+            self.log(f"{Colors.OKGREEN}✓ Profiles saved in {self.profiler.output_dir} "
+                     f"(per-check .pstats, {collapsed.name}){Colors.ENDC}")
 
 
 def main():
@@ -946,11 +982,34 @@ def main():
         type=str,
         help="Save diagnostic report to specified JSON file"
     )
+    parser.add_argument(
+        "--no-probe-cache",
+        action="store_true",
+        help="Run every external probe instead of reusing cached output"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help="Profile each check with cProfile; writes per-check .pstats and a merged "
+             "profile.collapsed to DIR (default: diagnostic_profile_<timestamp>)"
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile, also trace allocations and write a top-allocations table per check"
+    )
     
     args = parser.parse_args()
+    if args.profile == "":
+        args.profile = f"diagnostic_profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
     # Create and run diagnostic tool
-    tool = DiagnosticTool(verbose=args.verbose)
+    tool = DiagnosticTool(verbose=args.verbose, profile_dir=args.profile,
+                          profile_memory=args.profile_memory,
+                          probe_cache=not args.no_probe_cache)
     tool.run_all_checks()
     
     # Generate report
@@ -0,0 +1,48 @@
+"""Shared fixtures for the diagnostic tool tests"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+class IsolatedHomeTestCase(unittest.TestCase):
+    """Points HOME at a temporary directory so the app's real data is never touched"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory(prefix="aifs-test-")
+        self.addCleanup(tmp.cleanup)
+        self.home = Path(tmp.name)
+        env = {key: value for key, value in os.environ.items()
+               if not key.startswith("XDG_") and key != "AI_FILE_SORTER_CONFIG_DIR"}
+        env["HOME"] = str(self.home)
+        patcher = mock.patch.dict(os.environ, env, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def app_database(path=":memory:") -> "sqlite3.Connection":
+    """Empty database (in memory by default) with the schema DatabaseManager.cpp creates"""
+    import sqlite3
+    from diagnostic_lib.schema import SOURCE, apply_statements, source_statements
+    conn = sqlite3.connect(path)
+    apply_statements(conn, source_statements((REPO_ROOT / SOURCE).read_text(encoding="utf-8")))
+    return conn
+
+
+def synthetic_database(path: Path, rows: int = 2000, seed: int = 0) -> dict:
+    """Database file with the app's schema and generated rows; returns row counts per table"""
+    from diagnostic_lib.schema import SOURCE
+    from diagnostic_lib.synthdb import generate_database
+    return generate_database(path, rows, (REPO_ROOT / SOURCE).read_text(encoding="utf-8"), seed=seed)
+
+
+def age(*paths: Path, seconds: int = 3600):
+    """Move mtimes into the past so a later change always gets a different one"""
+    for path in paths:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 10**9))
@@ -0,0 +1,122 @@
+"""diagnostic_lib.apiusage: period comparison, regressions and quota forecast"""
+
+import datetime
+import unittest
+
+from diagnostic_lib.apiusage import _forecast, _regressions, analyze_api_usage
+
+from helpers import app_database
+
+MORNING = datetime.datetime(2025, 1, 31, 6, 0)
+
+
+class ForecastTest(unittest.TestCase):
+    def test_gemini_falls_back_to_the_free_tier_limit(self):
+        quota = _forecast("gemini", {"requests": 600, "daily_limit": None, "remaining": None}, 1200, MORNING)
+        self.assertEqual((quota["daily_limit"], quota["limit_source"]), (1500, "default"))
+        self.assertEqual(quota["remaining_today"], 900)
+        self.assertEqual(quota["requests_per_hour"], 100.0)
+        self.assertEqual(quota["exhausted_at_utc"], "2025-01-31 15:00")
+        self.assertEqual(quota["busiest_day_share"], 0.8)
+
+    def test_quota_lasting_past_midnight_is_not_exhausted(self):
+        quota = _forecast("gemini", {"requests": 300, "daily_limit": None, "remaining": None}, 300, MORNING)
+        self.assertIsNone(quota["exhausted_at_utc"])
+
+    def test_database_limit_and_remaining_win(self):
+        quota = _forecast("openai", {"requests": 10, "daily_limit": 100, "remaining": 0}, 10, MORNING)
+        self.assertEqual(quota["limit_source"], "database")
+        self.assertEqual(quota["exhausted_at_utc"], "2025-01-31 06:00")
+
+    def test_rate_ignores_the_first_minutes_of_the_day(self):
+        quota = _forecast("gemini", {"requests": 25, "daily_limit": None, "remaining": None}, 25,
+                          datetime.datetime(2025, 1, 31, 0, 1))
+        self.assertEqual(quota["requests_per_hour"], 100.0)  # 25 over 15 minutes, not 1
+
+    def test_no_limit_means_no_forecast(self):
+        self.assertIsNone(_forecast("openai", None, 0, MORNING))
+        self.assertEqual(_forecast("gemini", None, 0, MORNING)["used_today"], 0)
+
+
+class RegressionTest(unittest.TestCase):
+    def period(self, tokens_per_request=None, requests_per_1k=None, cost_per_1k=None):
+        return {"tokens_per_request": tokens_per_request, "requests_per_1k_files": requests_per_1k,
+                "cost_per_1k_files": cost_per_1k}
+
+    def test_only_changes_beyond_the_ratio_are_flagged(self):
+        self.assertEqual(_regressions(self.period(125.0), self.period(100.0)), [])
+        found = _regressions(self.period(126.0, 50.0), self.period(100.0, 40.0))
+        self.assertEqual(found, ["tokens per request: 100.00 -> 126.00 (+26%)"])
+
+    def test_missing_baseline_is_not_a_regression(self):
+        self.assertEqual(_regressions(self.period(500.0, 10.0, 1.0), self.period()), [])
+
+
+class AnalyzeTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = app_database()
+        self.addCleanup(self.conn.close)
+        self.conn.executemany(
+            "INSERT INTO api_usage_tracking (provider, date, tokens_used, requests_made, cost_estimate) "
+            "VALUES (?, DATE('now', ?), ?, ?, ?)", [
+                ("gemini", "+0 days", 50000, 100, 0.0),
+                ("gemini", "-10 days", 20000, 100, 0.0),
+                ("openai", "-20 days", 4000, 8, 0.4),
+            ])
+        self.conn.executemany(
+            "INSERT INTO file_categorization (file_name, file_type, dir_path, category, timestamp) "
+            "VALUES (?, 'F', '/in', 'Docs', DATETIME('now', ?))",
+            [(f"recent{i}", "+0 days") for i in range(10)] + [(f"old{i}", "-10 days") for i in range(10)])
+
+    def test_series_periods_and_regressions(self):
+        report = analyze_api_usage(self.conn)
+        gemini = report["providers"]["gemini"]
+        self.assertEqual((gemini["days"], gemini["requests"], gemini["tokens"]), (2, 200, 70000))
+        self.assertEqual(gemini["tokens_per_request"], 350.0)
+        self.assertEqual(gemini["today"]["files_categorized"], 10)
+        self.assertEqual(gemini["recent"]["tokens_per_request"], 500.0)
+        self.assertEqual(gemini["baseline"]["tokens_per_request"], 200.0)
+        self.assertEqual(gemini["recent"]["requests_per_1k_files"], 10000.0)
+        self.assertEqual(len(gemini["regressions"]), 1)
+        self.assertEqual(gemini["quota"]["used_today"], 100)
+
+        openai = report["providers"]["openai"]
+        self.assertIsNone(openai["today"])
+        self.assertIsNone(openai["quota"])
+        self.assertEqual(openai["recent"]["requests"], 0)
+        self.assertEqual(openai["regressions"], [])
+        self.assertEqual(sum(w["requests"] for w in openai["weekly"]), 8)
+
+    def test_periods_follow_the_given_now(self):
+        conn = app_database()
+        self.addCleanup(conn.close)
+        conn.executemany(
+            "INSERT INTO api_usage_tracking (provider, date, tokens_used, requests_made, cost_estimate) "
+            "VALUES ('gemini', ?, ?, ?, 0.0)", [
+                ("2025-01-31", 3000, 10),  # Today
+                ("2025-01-25", 2000, 10),  # First day of the recent window
+                ("2025-01-24", 1000, 10),  # Last day of the baseline
+                ("2024-12-28", 1000, 10),  # First day of the baseline
+                ("2024-12-27", 9000, 10),  # Before both windows
+                ("2025-02-01", 9000, 10),  # After `now`
+            ])
+        conn.executemany(
+            "INSERT INTO file_categorization (file_name, file_type, dir_path, category, timestamp) "
+            "VALUES (?, 'F', '/in', 'Docs', ?)",
+            [("a", "2025-01-25 00:00:00"), ("b", "2025-01-24 23:59:59"), ("c", "2025-02-01 08:00:00")])
+
+        gemini = analyze_api_usage(conn, now=MORNING)["providers"]["gemini"]
+        self.assertEqual((gemini["recent"]["requests"], gemini["recent"]["tokens"]), (20, 5000))
+        self.assertEqual((gemini["baseline"]["requests"], gemini["baseline"]["tokens"]), (20, 2000))
+        self.assertEqual((gemini["recent"]["files"], gemini["baseline"]["files"]), (1, 1))
+        self.assertEqual(gemini["today"]["requests"], 10)
+        self.assertEqual(len(gemini["regressions"]), 1)  # 250 tokens per request vs. 100
+
+    def test_empty_table(self):
+        conn = app_database()
+        self.addCleanup(conn.close)
+        self.assertEqual(analyze_api_usage(conn)["providers"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""diagnostic_lib.apppaths: the directories shared by both diagnostic tools"""
+
+import sys
+import unittest
+from unittest import mock
+
+import diagnostic_tool
+import thorough_diagnostic
+from diagnostic_lib.apppaths import diagnostic_state_dir, legacy_data_dir, resolve_log_dir
+from diagnostic_lib.probes import PROBE_CACHE_FILE, default_probe_cache
+
+from helpers import IsolatedHomeTestCase
+
+
+class StateDirTest(IsolatedHomeTestCase):
+    def test_state_dir_is_under_the_legacy_data_dir(self):
+        if sys.platform == "linux":
+            self.assertEqual(legacy_data_dir(), self.home / ".local" / "share" / "aifilesorter")
+        self.assertEqual(diagnostic_state_dir(), legacy_data_dir() / "diagnostics")
+        self.assertEqual(diagnostic_state_dir(str(self.home / "state")), self.home / "state")
+
+    def test_probe_cache_file(self):
+        cache = default_probe_cache(self.home)
+        self.assertEqual(cache.path, self.home / PROBE_CACHE_FILE)
+        self.assertEqual(cache.max_age, 7 * 24 * 3600)
+
+    def test_both_tools_share_one_probe_cache(self):
+        with mock.patch.object(thorough_diagnostic, "print", create=True):
+            thorough = thorough_diagnostic.ThoroughDiagnosticTool()
+        basic = diagnostic_tool.DiagnosticTool()
+        self.assertEqual(thorough.probe_cache.path, basic.probes.cache.path)
+        self.assertEqual(thorough.probe_cache.path, diagnostic_state_dir() / PROBE_CACHE_FILE)
+        self.assertEqual(thorough.state_dir, diagnostic_state_dir())
+
+    def test_legacy_logs_are_a_fallback(self):
+        legacy = legacy_data_dir() / "logs"
+        self.assertEqual(resolve_log_dir(legacy), self.home / ".cache" / "AIFileSorter" / "logs")
+        legacy.mkdir(parents=True)
+        self.assertEqual(resolve_log_dir(legacy), legacy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""diagnostic_lib.contentcache: stale-entry detection and resumable scans"""
+
+import hashlib
+import os
+import unittest
+from unittest import mock
+
+from diagnostic_lib import contentcache
+from diagnostic_lib.contentcache import (
+    CURRENT, MISSING, STALE, UNCHANGED, UNVERIFIED, CacheScan, digest_algorithm, hash_file,
+    scan_content_cache
+)
+
+from helpers import IsolatedHomeTestCase, app_database
+
+OLD = "2020-01-01 00:00:00"  # Entry recorded long before the files' mtimes
+FUTURE = "2999-01-01 00:00:00"  # Entry recorded after any mtime
+
+
+class HashTest(IsolatedHomeTestCase):
+    def test_digest_algorithm_by_length(self):
+        self.assertEqual(digest_algorithm(hashlib.md5(b"").hexdigest()), "md5")
+        self.assertEqual(digest_algorithm(hashlib.sha1(b"").hexdigest()), "sha1")
+        self.assertEqual(digest_algorithm(hashlib.sha256(b"").hexdigest().upper()), "sha256")
+        self.assertEqual(digest_algorithm(hashlib.sha512(b"").hexdigest()), "sha512")
+        self.assertIsNone(digest_algorithm("abc"))
+        self.assertIsNone(digest_algorithm("z" * 64))
+        self.assertIsNone(digest_algorithm(""))
+
+    def test_plain_and_mmap_reads_agree(self):
+        path = self.home / "data.bin"
+        data = os.urandom(300 * 1024)
+        path.write_bytes(data)
+        expected = hashlib.sha256(data).hexdigest()
+        self.assertEqual(hash_file(str(path), "sha256"), expected)
+        with mock.patch.object(contentcache, "MMAP_MIN_BYTES", 1), \
+                mock.patch.object(contentcache, "HASH_CHUNK", 64 * 1024 + 1):
+            self.assertEqual(hash_file(str(path), "sha256"), expected)
+
+
+class ScanTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conn = app_database()
+        self.addCleanup(self.conn.close)
+
+    def entry(self, name: str, recorded: str, content: bytes = b"", digest: str = None, create=True):
+        path = self.home / name
+        if create:
+            path.write_bytes(content)
+        digest = digest or hashlib.sha256(content).hexdigest()
+        self.conn.execute("INSERT INTO content_analysis_cache (file_path, content_hash, timestamp) "
+                          "VALUES (?, ?, ?)", (str(path), digest, recorded))
+        return str(path)
+
+    def add_one_of_each(self):
+        paths = {
+            CURRENT: self.entry("current.txt", FUTURE, b"current"),
+            UNCHANGED: self.entry("unchanged.txt", OLD, b"same"),
+            STALE: self.entry("stale.txt", OLD, b"edited", digest=hashlib.md5(b"original").hexdigest()),
+            MISSING: self.entry("missing.txt", OLD, create=False),
+            UNVERIFIED: self.entry("unknown.txt", OLD, b"x", digest="not-a-digest"),
+        }
+        self.conn.execute("INSERT INTO content_analysis_cache (file_path, content_hash, timestamp) "
+                          "VALUES ('relative/path.txt', ?, ?)", (hashlib.sha256(b"").hexdigest(), OLD))
+        return paths
+
+    def test_states(self):
+        paths = self.add_one_of_each()
+        scan = scan_content_cache(self.conn, workers=2)
+        self.assertTrue(scan.complete)
+        self.assertEqual(scan.rows, 6)
+        self.assertEqual(scan.counts, {CURRENT: 1, UNCHANGED: 1, STALE: 1, MISSING: 1, UNVERIFIED: 2})
+        self.assertEqual(scan.rehashed, 2)
+        self.assertEqual(scan.hashed_bytes, len(b"same") + len(b"edited"))
+        self.assertEqual(scan.samples, {STALE: [paths[STALE]], MISSING: [paths[MISSING]]})
+        self.assertGreater(scan.reclaimable_bytes, 0)
+        self.assertAlmostEqual(scan.stale_ratio, 2 / 6)
+
+    def test_keyset_resume_matches_a_single_pass(self):
+        self.add_one_of_each()
+        for i in range(7):
+            self.entry(f"gone-{i}.txt", OLD, create=False)
+        single = scan_content_cache(self.conn).to_dict()
+
+        scan, passes = None, 0
+        while True:
+            # Stop after every batch, then continue from the saved state
+            scan = scan_content_cache(self.conn, scan, batch_rows=3, cancelled=lambda: True)
+            passes += 1
+            if scan.complete:
+                break
+            scan = CacheScan.from_dict(scan.to_dict())
+        self.assertEqual(passes, 5)
+        resumed = scan.to_dict()
+        for key in ("rows", "counts", "rehashed", "hashed_bytes", "reclaimable_bytes", "samples"):
+            self.assertEqual(resumed[key], single[key], key)
+        self.assertEqual(resumed["last_id"], 13)
+
+    def test_time_budget_leaves_the_scan_resumable(self):
+        for i in range(10):
+            self.entry(f"gone-{i}.txt", OLD, create=False)
+        scan = scan_content_cache(self.conn, batch_rows=4, time_budget=0)
+        self.assertFalse(scan.complete)
+        self.assertEqual((scan.rows, scan.last_id), (4, 4))
+        scan = scan_content_cache(self.conn, scan, batch_rows=4)
+        self.assertTrue(scan.complete)
+        self.assertEqual(scan.counts[MISSING], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
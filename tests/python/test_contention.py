@@ -0,0 +1,141 @@
+"""diagnostic_lib.contention: WAL-index header, busy retries and the simulation"""
+
+import sqlite3
+import threading
+import unittest
+
+from diagnostic_lib.contention import RoleStats, _retry, journal_state, simulate_contention, wal_index_frames
+
+from helpers import IsolatedHomeTestCase, synthetic_database
+
+
+class WalIndexTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        self.conn = sqlite3.connect(self.db, isolation_level=None)
+        self.addCleanup(self.conn.close)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA wal_autocheckpoint=0")
+        self.conn.execute("CREATE TABLE t (v BLOB)")
+        for _ in range(20):
+            self.conn.execute("INSERT INTO t VALUES (randomblob(3000))")
+
+    def test_frames_match_wal_checkpoint(self):
+        before = wal_index_frames(self.db)
+        self.assertGreater(before["frames"], 20)
+        self.assertEqual(before["checkpointed"], 0)
+        self.assertEqual(before["pending"], before["frames"])
+
+        busy, log, done = self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        self.assertEqual(busy, 0)
+        self.assertEqual(log, before["frames"])
+        self.assertEqual(wal_index_frames(self.db),
+                         {"frames": log, "checkpointed": done, "pending": log - done})
+
+    def test_checkpoint_held_back_by_a_reader(self):
+        reader = sqlite3.connect(self.db)
+        self.addCleanup(reader.close)
+        reader.execute("BEGIN")
+        reader.execute("SELECT count(*) FROM t").fetchone()
+        for _ in range(5):
+            self.conn.execute("INSERT INTO t VALUES (randomblob(3000))")
+
+        _, log, done = self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        self.assertLess(done, log)
+        frames = wal_index_frames(self.db)
+        self.assertEqual((frames["frames"], frames["checkpointed"]), (log, done))
+        self.assertGreater(frames["pending"], 0)
+
+    def test_journal_state(self):
+        state = journal_state(self.db)
+        self.assertEqual(state["journal_mode"], "wal")
+        self.assertGreater(state["wal_bytes"], 0)
+        self.assertIsNone(state["journal_bytes"])
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        self.assertEqual(state["pending_checkpoint_bytes"], state["wal_index"]["pending"] * page_size)
+
+    def test_rollback_journal_has_no_wal_index(self):
+        rollback = self.home / "rollback.db"
+        sqlite3.connect(rollback).execute("CREATE TABLE t (v)").connection.close()
+        self.assertIsNone(wal_index_frames(rollback))
+        state = journal_state(rollback)
+        self.assertEqual(state["journal_mode"], "delete")
+        self.assertIsNone(state["wal_index"])
+        self.assertNotIn("pending_checkpoint_bytes", state)
+
+
+def locked_then_ok(failures: int, message: str = "database is locked"):
+    calls = []
+
+    def action():
+        calls.append(None)
+        if len(calls) <= failures:
+            raise sqlite3.OperationalError(message)
+    return action, calls
+
+
+class RetryTest(unittest.TestCase):
+    def test_busy_results_are_counted_and_retried(self):
+        stats = RoleStats("reader")
+        action, calls = locked_then_ok(2)
+        self.assertTrue(_retry(stats, threading.Event(), action))
+        self.assertEqual(len(calls), 3)
+        self.assertEqual((stats.busy, stats.busy_operations), (2, 1))
+
+        self.assertTrue(_retry(stats, threading.Event(), locked_then_ok(0)[0]))
+        self.assertEqual((stats.busy, stats.busy_operations), (2, 1))
+
+    def test_stop_ends_the_retries(self):
+        stats = RoleStats("writer")
+        stop = threading.Event()
+        stop.set()
+        action, calls = locked_then_ok(10, "database table is busy")
+        self.assertFalse(_retry(stats, stop, action))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((stats.busy, stats.busy_operations), (1, 0))
+
+    def test_other_errors_are_raised(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            _retry(RoleStats("reader"), threading.Event(), locked_then_ok(1, "no such table: t")[0])
+
+
+class SimulateContentionTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        synthetic_database(self.db)
+
+    def test_wal_and_rollback_journal(self):
+        before = self.db.read_bytes()
+        for mode in ("wal", "delete"):
+            with self.subTest(mode=mode):
+                result = simulate_contention(self.db, readers=2, duration=0.2, journal_mode=mode)
+                self.assertEqual(result["journal_mode"], mode)
+                self.assertEqual(result["readers"], 2)
+                self.assertGreater(result["sampled_keys"], 0)
+                self.assertGreater(result["reader"]["operations"], 0)
+                # Without a busy timeout a rollback-journal writer can starve behind the readers
+                self.assertGreater(result["writer"]["operations"] + result["writer"]["busy"], 0)
+                for role in ("reader", "writer"):
+                    summary = result[role]
+                    self.assertEqual(summary["errors"], [], role)
+                    self.assertLessEqual(summary["busy_operations"], summary["busy"])
+                    self.assertLessEqual(summary["p50_ms"], summary["max_ms"])
+                if mode == "wal":
+                    self.assertIsNotNone(result["checkpoints"])
+                else:
+                    self.assertIsNone(result["checkpoints"])
+        # Everything ran on a copy
+        self.assertEqual(self.db.read_bytes(), before)
+        self.assertEqual(journal_state(self.db)["journal_mode"], "delete")
+
+    def test_cancel_stops_early(self):
+        cancelled = threading.Event()
+        cancelled.set()
+        result = simulate_contention(self.db, readers=1, duration=30, cancelled=cancelled)
+        self.assertLess(result["duration_s"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""diagnostic_lib.dbbench: latency percentiles and the workload replay"""
+
+import unittest
+
+from diagnostic_lib.dbbench import READ_QUERIES, QueryClassResult, run_workload
+from diagnostic_lib.dbutil import percentile
+
+from helpers import IsolatedHomeTestCase, app_database, synthetic_database
+
+
+class PercentileTest(unittest.TestCase):
+    def test_nearest_rank(self):
+        values = [float(v) for v in range(1, 11)]
+        self.assertEqual(percentile(values, 50), 5.0)
+        self.assertEqual(percentile(values, 90), 9.0)
+        self.assertEqual(percentile(values, 95), 10.0)
+        self.assertEqual(percentile(values, 99), 10.0)
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile([7.5], 99), 7.5)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summary(self):
+        result = QueryClassResult("categorization_lookup")
+        result.latencies_ms = [float(v) for v in range(100, 0, -1)]
+        result.rows = 80
+        result.elapsed_s = 2.0
+        summary = result.summary()
+        self.assertEqual((summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]), (50.0, 95.0, 99.0))
+        self.assertEqual((summary["ops_per_sec"], summary["rows_per_sec"]), (50.0, 40.0))
+        self.assertEqual(QueryClassResult("empty").summary()["ops_per_sec"], 0.0)
+
+
+class RunWorkloadTest(IsolatedHomeTestCase):
+    def test_smoke(self):
+        db = self.home / "cache.db"
+        synthetic_database(db, rows=500)
+        before = db.read_bytes()
+
+        summaries, meta = run_workload(str(db), operations=50, batch_size=10, batches=3)
+        self.assertEqual([s["query_class"] for s in summaries],
+                         [name for name, _ in READ_QUERIES] + ["batched_upsert"])
+        for summary in summaries:
+            self.assertIsNone(summary["error"], summary["query_class"])
+            self.assertGreater(summary["operations"], 0, summary["query_class"])
+            self.assertLessEqual(summary["p50_ms"], summary["p99_ms"])
+        by_class = {s["query_class"]: s for s in summaries}
+        self.assertGreater(by_class["categorization_lookup"]["rows"], 0)  # Sampled keys hit
+        self.assertEqual(by_class["batched_upsert"]["operations"], 3)
+        self.assertEqual(by_class["batched_upsert"]["rows"], 30)
+        self.assertGreater(meta["sampled_keys"], 0)
+        self.assertIn("copy_seconds", meta)
+        self.assertEqual(db.read_bytes(), before)  # Ran on a copy
+
+    def test_empty_database_only_misses(self):
+        db = self.home / "empty.db"
+        app_database(str(db)).close()
+        summaries, meta = run_workload(str(db), operations=20, batch_size=5, batches=2)
+        self.assertEqual(meta["sampled_keys"], 0)
+        by_class = {s["query_class"]: s for s in summaries}
+        for name, _ in READ_QUERIES:
+            self.assertEqual((by_class[name]["operations"], by_class[name]["rows"]), (20, 0), name)
+            self.assertIsNone(by_class[name]["error"], name)
+        self.assertEqual(by_class["batched_upsert"]["rows"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
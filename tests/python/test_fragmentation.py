@@ -0,0 +1,106 @@
+"""diagnostic_lib.fragmentation: freelist and VACUUM estimates, statistics state"""
+
+import shutil
+import sqlite3
+import unittest
+
+from diagnostic_lib.fragmentation import (
+    RECLAIM_WARNING_BYTES, analyze_fragmentation, measure_maintenance, recommended_actions
+)
+
+from helpers import IsolatedHomeTestCase, synthetic_database
+
+
+class FragmentationTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        synthetic_database(self.db, rows=5000)
+        self.conn = sqlite3.connect(self.db)
+        self.addCleanup(self.conn.close)
+
+    def delete_most_rows(self):
+        self.conn.execute("DELETE FROM file_categorization WHERE id % 4 != 0")
+        self.conn.execute("DELETE FROM confidence_scores")
+        self.conn.commit()
+
+    def test_freelist_after_deletes(self):
+        before = analyze_fragmentation(self.conn)
+        self.assertEqual(before["freelist_count"], 0)
+
+        self.delete_most_rows()
+        report = analyze_fragmentation(self.conn)
+        self.assertGreater(report["freelist_count"], 0)
+        self.assertEqual(report["free_bytes"], report["freelist_count"] * report["page_size"])
+        self.assertEqual(report["page_count"], before["page_count"])
+        vacuum = report["vacuum"]
+        self.assertEqual(vacuum["estimated_from"], "dbstat")
+        # Free pages plus the repacking of half-empty pages
+        self.assertGreater(vacuum["reclaimable_bytes"], report["free_bytes"])
+        self.assertEqual(vacuum["bytes_after"] + vacuum["reclaimable_bytes"], report["database_bytes"])
+        files = next(t for t in vacuum["tables"] if t["table"] == "file_categorization")
+        self.assertGreater(files["scan_pages_saved"], 0)
+
+        # The estimate is close to what VACUUM really leaves
+        vacuumed = self.home / "vacuumed.db"
+        shutil.copy(self.db, vacuumed)
+        conn = sqlite3.connect(vacuumed, isolation_level=None)
+        conn.execute("VACUUM")
+        conn.close()
+        actual = vacuumed.stat().st_size
+        self.assertLess(abs(vacuum["bytes_after"] - actual), 0.15 * actual)
+
+    def test_freelist_only_estimate_without_dbstat(self):
+        self.delete_most_rows()
+        # A temp table that lacks dbstat's columns fails the same way as a build without it
+        self.conn.execute("CREATE TEMP TABLE dbstat (x)")
+        report = analyze_fragmentation(self.conn)
+        self.assertIsNone(report["btrees"])
+        self.assertEqual(report["vacuum"]["estimated_from"], "freelist")
+        self.assertEqual(report["vacuum"]["reclaimable_bytes"], report["free_bytes"])
+
+    def test_statistics_state_and_actions(self):
+        report = analyze_fragmentation(self.conn)
+        stats = report["statistics"]
+        self.assertFalse(stats["present"])
+        self.assertIn("file_categorization", stats["missing"])
+        self.assertNotIn("user_profile", stats["indexed_tables"])  # Empty tables get no stats
+        self.assertEqual(recommended_actions(report), ["analyze"])
+
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        report = analyze_fragmentation(self.conn)
+        self.assertEqual((report["statistics"]["missing"], report["statistics"]["stale"]), ([], []))
+        self.assertEqual(recommended_actions(report), [])
+
+        # Three times the recorded rows: stale, and PRAGMA optimize is enough to refresh it
+        self.conn.execute("INSERT INTO file_categorization (file_name, file_type, dir_path, category, "
+                          "subcategory) SELECT file_name || '.copy' || n, file_type, dir_path, category, "
+                          "subcategory FROM file_categorization, (SELECT 1 AS n UNION SELECT 2)")
+        self.conn.commit()
+        report = analyze_fragmentation(self.conn)
+        self.assertEqual(report["statistics"]["stale"], ["file_categorization"])
+        self.assertEqual(recommended_actions(report), ["optimize"])
+
+    def test_vacuum_recommended_above_both_thresholds(self):
+        report = analyze_fragmentation(self.conn)
+        report["statistics"] = {"present": True, "missing": [], "stale": []}
+        report["database_bytes"] = 4 * RECLAIM_WARNING_BYTES
+        report["vacuum"]["reclaimable_bytes"] = RECLAIM_WARNING_BYTES
+        self.assertEqual(recommended_actions(report), ["vacuum"])
+        report["database_bytes"] = 10 * RECLAIM_WARNING_BYTES
+        self.assertEqual(recommended_actions(report), [])
+
+    def test_measure_maintenance_on_a_snapshot(self):
+        self.delete_most_rows()
+        before = self.db.read_bytes()
+        result = measure_maintenance(self.db, ["vacuum", "analyze"], scan_tables=["file_categorization"],
+                                     operations=20, time_budget=0.2)
+        self.assertEqual(list(result["action_seconds"]), ["vacuum", "analyze"])
+        self.assertLess(result["after"]["bytes"], result["before"]["bytes"])
+        self.assertIn("file_categorization", result["after"]["scan_ms"])
+        self.assertEqual(self.db.read_bytes(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
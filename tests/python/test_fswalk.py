@@ -0,0 +1,144 @@
+"""diagnostic_lib.fswalk: single-pass totals and per-directory memoization"""
+
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+from diagnostic_lib import fswalk
+from diagnostic_lib.fswalk import TreeWalker
+
+from helpers import IsolatedHomeTestCase
+
+
+class TreeWalkerTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.home / "lib"
+        for rel, size in (("core.so", 100), ("README.TXT", 5), ("ggml/wcuda/ggml.so", 300),
+                          ("ggml/wcuda/ggml-cuda.so", 700), ("ggml/wocuda/ggml.so", 200)):
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        (self.root / "empty").mkdir()
+
+    def test_totals_cover_the_whole_tree(self):
+        stats = TreeWalker().stats(self.root)
+        self.assertTrue(stats.exists)
+        self.assertEqual((stats.file_count, stats.total_bytes), (5, 1305))
+        self.assertEqual(stats.by_extension, {".so": [4, 1300], ".txt": [1, 5]})
+        self.assertEqual(stats.direct_by_extension, {".so": [1, 100], ".txt": [1, 5]})
+        self.assertEqual(stats.direct_files(".so", ".dll"), (1, 100))
+        self.assertEqual(stats.subdirs, ["empty", "ggml"])
+
+    def test_every_directory_is_scanned_once(self):
+        walker = TreeWalker()
+        with mock.patch.object(fswalk.os, "scandir", wraps=os.scandir) as scandir:
+            root = walker.stats(self.root)
+            scanned = scandir.call_count
+            cuda = walker.stats(self.root / "ggml" / "wcuda")
+            again = walker.stats(str(self.root))
+        self.assertEqual(scanned, 5)  # lib, empty, ggml, wcuda, wocuda
+        self.assertEqual(scandir.call_count, scanned)
+        self.assertIs(again, root)
+        self.assertEqual((cuda.file_count, cuda.total_bytes), (2, 1000))
+
+    def test_relative_paths_share_the_cache(self):
+        walker = TreeWalker()
+        cwd = os.getcwd()
+        os.chdir(self.home)
+        try:
+            relative = walker.stats("lib")
+        finally:
+            os.chdir(cwd)
+        self.assertIs(walker.stats(self.root), relative)
+
+    def test_cache_lives_as_long_as_the_walker(self):
+        walker = TreeWalker()
+        walker.stats(self.root)
+        (self.root / "ggml" / "wocuda" / "extra.so").write_bytes(b"x")
+        self.assertEqual(walker.stats(self.root).file_count, 5)
+        self.assertEqual(TreeWalker().stats(self.root).file_count, 6)
+
+    def test_missing_directory(self):
+        stats = TreeWalker().stats(self.home / "missing")
+        self.assertFalse(stats.exists)
+        self.assertEqual((stats.file_count, stats.errors), (0, 0))
+
+    @staticmethod
+    def remove_chain(leaf: str, top: str):
+        """Remove a single-path tree bottom-up (shutil.rmtree() recurses per level too)"""
+        os.remove(os.path.join(leaf, "bottom.bin"))
+        while True:
+            os.rmdir(leaf)
+            if leaf == top:
+                return
+            leaf = os.path.dirname(leaf)
+
+    def test_deep_tree_does_not_recurse(self):
+        depth = sys.getrecursionlimit() + 100
+        deep = self.home / "deep"
+        leaf = str(deep)
+        for _ in range(depth + 1):  # os.makedirs() itself recurses per level
+            os.mkdir(leaf)
+            leaf = os.path.join(leaf, "d")
+        leaf = os.path.dirname(leaf)
+        with open(os.path.join(leaf, "bottom.bin"), "wb") as f:
+            f.write(b"x" * 7)
+        self.addCleanup(self.remove_chain, leaf, str(deep))
+        walker = TreeWalker()
+        stats = walker.stats(deep)
+        self.assertEqual((stats.file_count, stats.total_bytes), (1, 7))
+        self.assertEqual(walker.stats(leaf).by_extension, {".bin": [1, 7]})
+
+    def test_concurrent_requests_share_one_walk(self):
+        walker = TreeWalker()
+        results = []
+        start = threading.Barrier(8)
+
+        def worker():
+            start.wait()
+            results.append(walker.stats(self.root))
+
+        with mock.patch.object(fswalk.os, "scandir", wraps=os.scandir) as scandir:
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(scandir.call_count, 5)
+        self.assertEqual(len(results), 8)
+        for stats in results:
+            self.assertIs(stats, results[0])
+        self.assertEqual(results[0].file_count, 5)
+
+    def test_a_slow_walk_does_not_block_other_trees(self):
+        slow = self.home / "slow"
+        slow.mkdir()
+        entered, release = threading.Event(), threading.Event()
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if path == str(slow):
+                entered.set()
+                release.wait(10)
+            return real_scandir(path)
+
+        walker = TreeWalker()
+        with mock.patch.object(fswalk.os, "scandir", side_effect=scandir):
+            blocked = threading.Thread(target=walker.stats, args=(slow,))
+            blocked.start()
+            self.addCleanup(blocked.join)
+            self.addCleanup(release.set)
+            self.assertTrue(entered.wait(10))
+            # Answered while the other walk is still stuck in scandir()
+            self.assertEqual(walker.stats(self.root).file_count, 5)
+            self.assertTrue(blocked.is_alive())
+            release.set()
+            blocked.join()
+        self.assertTrue(walker.stats(slow).exists)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""diagnostic_lib.hitrate: FileScanner-style listing and cache hit-rate math"""
+
+import os
+import unittest
+
+from diagnostic_lib.hitrate import SECONDS_PER_CALL, estimate_hit_rate, folder_keys, list_folder
+
+from helpers import IsolatedHomeTestCase, app_database
+
+
+class ListFolderTest(IsolatedHomeTestCase):
+    def test_listing_matches_file_scanner(self):
+        folder = self.home / "Downloads"
+        (folder / "Photos").mkdir(parents=True)
+        (folder / "Tool.app").mkdir()
+        for name in ("a.jpg", ".hidden", ".DS_Store", "Thumbs.db", "report.pdf"):
+            (folder / name).write_text("")
+        self.assertEqual(sorted(list_folder(str(folder))),
+                         [("Tool.app", "F"), ("a.jpg", "F"), ("report.pdf", "F")])
+        self.assertEqual(sorted(list_folder(str(folder), files=False, directories=True)),
+                         [("Photos", "D")])
+        self.assertIn((".hidden", "F"), list_folder(str(folder), hidden=True))
+
+    def test_folder_keys_cover_trailing_slash_variants(self):
+        self.assertEqual(folder_keys("/data/in/"), ["/data/in/", "/data/in"])
+        self.assertEqual(folder_keys("rel"), ["rel", os.path.abspath("rel")])
+
+
+class HitRateTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = app_database()
+        self.addCleanup(self.conn.close)
+        self.conn.executemany(
+            "INSERT INTO file_categorization (file_name, file_type, dir_path, category, subcategory) "
+            "VALUES (?, ?, ?, ?, ?)", [
+                ("a.jpg", "F", "/in", "Images", "Photos"),     # Folder cache
+                ("b.pdf", "F", "/other", "Docs", "PDF"),       # Name cache (any directory)
+                ("c.txt", "F", "/in", "Text", ""),             # Empty label: no hit
+                ("d.bin", "D", "/other", "Data", "Binary"),    # Wrong type for the name cache
+            ])
+        self.entries = [("a.jpg", "F"), ("b.pdf", "F"), ("c.txt", "F"), ("d.bin", "F")]
+
+    def test_local_model(self):
+        estimate = estimate_hit_rate(self.conn, "/in/", self.entries, "Local_3b")
+        self.assertEqual((estimate["folder_cache_hits"], estimate["name_cache_hits"],
+                          estimate["llm_calls"]), (1, 1, 2))
+        self.assertEqual(estimate["hit_rate"], 0.5)
+        self.assertEqual(estimate["provider"], "local")
+        self.assertEqual(estimate["estimated_seconds"], 2 * SECONDS_PER_CALL[None])
+        self.assertEqual(estimate["estimated_cost"], 0.0)
+        self.assertIsNone(self.conn.execute(
+            "SELECT name FROM temp.sqlite_master WHERE name = 'hit_rate_listing'").fetchone())
+
+    def test_remote_cost_uses_recent_usage(self):
+        self.conn.executemany(
+            "INSERT INTO api_usage_tracking (provider, date, tokens_used, requests_made, cost_estimate) "
+            "VALUES (?, DATE('now', ?), ?, ?, ?)", [
+                ("openai", "-1 days", 3000, 10, 0.5),
+                ("openai", "-2 days", 1000, 10, 0.3),
+                ("openai", "-60 days", 99999, 1, 9.0),  # Outside the rate window
+            ])
+        estimate = estimate_hit_rate(self.conn, "/in", self.entries, "Remote")
+        self.assertEqual(estimate["rates"]["requests"], 20)
+        self.assertEqual(estimate["rates"]["tokens_per_request"], 200)
+        self.assertEqual(estimate["estimated_tokens"], 400)
+        self.assertEqual(estimate["estimated_cost"], 0.08)
+
+    def test_remote_without_usage_has_unknown_cost(self):
+        estimate = estimate_hit_rate(self.conn, "/in", self.entries, "Gemini")
+        self.assertIsNone(estimate["rates"])
+        self.assertIsNone(estimate["estimated_cost"])
+
+    def test_empty_folder(self):
+        estimate = estimate_hit_rate(self.conn, "/in", [], None)
+        self.assertEqual((estimate["entries"], estimate["llm_calls"]), (0, 0))
+        self.assertIsNone(estimate["hit_rate"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""diagnostic_lib.incremental: input fingerprints and stored state"""
+
+import datetime
+import json
+import os
+import unittest
+from unittest import mock
+
+import thorough_diagnostic
+from diagnostic_lib.incremental import DIR, FILE, TREE, IncrementalState, fingerprint
+from thorough_diagnostic import ThoroughDiagnosticTool
+
+from helpers import IsolatedHomeTestCase, age
+
+
+class FingerprintTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.home / "input"
+        (self.root / "sub" / "deep").mkdir(parents=True)
+        self.file = self.root / "config.ini"
+        self.file.write_text("a=1\n")
+        self.nested = self.root / "sub" / "deep" / "model.bin"
+        self.nested.write_bytes(b"x" * 10)
+        age(self.file, self.nested, self.root / "sub" / "deep", self.root / "sub", self.root)
+
+    def fp(self, kind, path, context=""):
+        return fingerprint([(kind, path)], context)
+
+    def test_unchanged_inputs_give_the_same_fingerprint(self):
+        inputs = [(FILE, self.file), (DIR, self.root), (TREE, self.root)]
+        self.assertEqual(fingerprint(inputs), fingerprint(inputs))
+
+    def test_context_is_part_of_the_fingerprint(self):
+        self.assertNotEqual(self.fp(FILE, self.file, "Linux|quick=False"),
+                            self.fp(FILE, self.file, "Linux|quick=True"))
+
+    def test_file_detects_mtime_and_size_changes(self):
+        before = self.fp(FILE, self.file)
+        os.utime(self.file)
+        touched = self.fp(FILE, self.file)
+        self.assertNotEqual(before, touched)
+        st = os.stat(self.file)
+        with open(self.file, "a") as f:
+            f.write("b=2\n")
+        os.utime(self.file, ns=(st.st_atime_ns, st.st_mtime_ns))  # Only the size differs
+        self.assertNotEqual(touched, self.fp(FILE, self.file))
+
+    def test_file_detects_creation_and_deletion(self):
+        missing = self.root / "later.db"
+        before = self.fp(FILE, missing)
+        missing.write_text("")
+        created = self.fp(FILE, missing)
+        self.assertNotEqual(before, created)
+        missing.unlink()
+        self.assertEqual(before, self.fp(FILE, missing))
+
+    def test_dir_detects_direct_entries_only(self):
+        before = self.fp(DIR, self.root)
+        # Rewriting a file two levels down changes no entry of the directory itself
+        self.nested.write_bytes(b"y" * 10)
+        age(self.nested)
+        self.assertEqual(before, self.fp(DIR, self.root))
+
+        os.utime(self.file)  # A direct entry changed
+        touched = self.fp(DIR, self.root)
+        self.assertNotEqual(before, touched)
+        (self.root / "new.txt").write_text("")
+        self.assertNotEqual(touched, self.fp(DIR, self.root))
+
+    def test_tree_detects_entries_added_anywhere_below(self):
+        before = self.fp(TREE, self.root)
+        (self.root / "sub" / "deep" / "added.bin").write_bytes(b"")
+        self.assertNotEqual(before, self.fp(TREE, self.root))
+
+    def test_tree_detects_renamed_directories(self):
+        before = self.fp(TREE, self.root)
+        os.rename(self.root / "sub" / "deep", self.root / "sub" / "renamed")
+        self.assertNotEqual(before, self.fp(TREE, self.root))
+
+    def test_tree_does_not_stat_files(self):
+        before = self.fp(TREE, self.root)
+        self.nested.write_bytes(b"changed content")
+        self.assertEqual(before, self.fp(TREE, self.root))
+
+
+class IncrementalStateTest(IsolatedHomeTestCase):
+    def test_round_trip_and_fingerprint_mismatch(self):
+        path = self.home / "state" / "incremental_state.json"
+        state = IncrementalState(path)
+        state.store("logs", "fp1", [("  ✓ ok", "green")], [{"name": "Log Directory"}])
+        state.save()
+
+        reloaded = IncrementalState(path)
+        entry = reloaded.lookup("logs", "fp1")
+        self.assertEqual(entry["lines"], [["  ✓ ok", "green"]])
+        self.assertEqual(entry["results"], [{"name": "Log Directory"}])
+        self.assertIsNone(reloaded.lookup("logs", "fp2"))
+        self.assertIsNone(reloaded.lookup("database", "fp1"))
+
+    def test_expired_entries_are_not_reused(self):
+        state = IncrementalState(self.home / "state.json", max_age=datetime.timedelta(hours=1))
+        state.store("logs", "fp", [], [])
+        self.assertIsNotNone(state.lookup("logs", "fp"))
+        state._checks["logs"]["recorded_at"] = (
+            datetime.datetime.now() - datetime.timedelta(hours=2)).isoformat()
+        self.assertIsNone(state.lookup("logs", "fp"))
+
+    def test_unreadable_or_outdated_state_starts_empty(self):
+        path = self.home / "state.json"
+        path.write_text("{not json")
+        self.assertIsNone(IncrementalState(path).lookup("logs", "fp"))
+        path.write_text(json.dumps({"version": 0, "checks": {"logs": {"fingerprint": "fp"}}}))
+        self.assertIsNone(IncrementalState(path).lookup("logs", "fp"))
+
+
+class ReplayTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.runs = []
+
+        def check_database(tool):
+            self.runs.append(tool.integrity_mode)
+            tool.integrity = {"mode": tool.integrity_mode, "ok": True}
+            tool.add_result("Database Integrity", "OK", tool.integrity_mode, category="Database")
+
+        for patcher in (mock.patch.object(ThoroughDiagnosticTool, "check_database", check_database),
+                        mock.patch.object(thorough_diagnostic, "print", create=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_database(self, **options):
+        tool = ThoroughDiagnosticTool(incremental=True, probe_cache=False,
+                                      state_dir=str(self.home / "state"), **options)
+        tool.run_all_checks(names=["database"])
+        return tool
+
+    def test_report_sections_are_replayed(self):
+        self.run_database()
+        tool = self.run_database()
+        self.assertEqual(self.runs, ["quick"])
+        self.assertEqual(tool.reused_checks, ["database"])
+        self.assertEqual(tool.integrity, {"mode": "quick", "ok": True})
+        self.assertEqual([r.message for r in tool.results], ["quick"])
+
+    def test_result_affecting_options_are_fingerprinted(self):
+        folder = self.home / "Downloads"
+        folder.mkdir()
+        self.run_database()
+        self.run_database(integrity_mode="full")
+        self.run_database(integrity_mode="full", exact_counts=True)
+        self.run_database(integrity_mode="full", exact_counts=True, hit_rate_folder=str(folder))
+        self.run_database(integrity_mode="full", exact_counts=True, hit_rate_folder=str(folder))
+        self.assertEqual(self.runs, ["quick", "full", "full", "full"])
+
+    def test_side_effects_always_run(self):
+        script = str(self.home / "cleanup.sql")
+        self.run_database(orphan_script=script)
+        tool = self.run_database(orphan_script=script)
+        self.assertEqual(len(self.runs), 2)
+        self.assertEqual(tool.reused_checks, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
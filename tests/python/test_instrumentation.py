@@ -0,0 +1,56 @@
+"""diagnostic_lib.instrumentation: wall time, CPU time and peak RSS per check"""
+
+import time
+import unittest
+from unittest import mock
+
+from diagnostic_lib import instrumentation
+from diagnostic_lib.instrumentation import CheckTimer, peak_rss_kb
+
+
+class CheckTimerTest(unittest.TestCase):
+    def test_wall_time_only_by_default(self):
+        with CheckTimer() as timer:
+            time.sleep(0.05)
+        self.assertGreaterEqual(timer.wall_ms, 45)
+        self.assertIsNone(timer.cpu_ms)
+        self.assertIsNone(timer.peak_rss_delta_kb)
+
+    def test_cpu_time_excludes_sleeping(self):
+        with CheckTimer(track_resources=True) as timer:
+            time.sleep(0.1)
+        self.assertGreaterEqual(timer.wall_ms, 95)
+        self.assertLess(timer.cpu_ms, 50)
+
+        with CheckTimer(track_resources=True) as busy:
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                pass
+        self.assertGreater(busy.cpu_ms, 25)
+
+    @unittest.skipIf(peak_rss_kb() is None, "no resource module")
+    def test_peak_rss_growth(self):
+        with CheckTimer(track_resources=True) as timer:
+            block = bytearray(64 * 1024 * 1024)
+            block[::4096] = b"x" * len(block[::4096])  # Touch every page
+            del block
+        # Freed memory still counts: the figure is a high-water mark
+        self.assertGreater(timer.peak_rss_delta_kb, 32 * 1024)
+
+    def test_rss_unavailable(self):
+        with mock.patch.object(instrumentation, "peak_rss_kb", return_value=None):
+            with CheckTimer(track_resources=True) as timer:
+                pass
+        self.assertIsNotNone(timer.cpu_ms)
+        self.assertIsNone(timer.peak_rss_delta_kb)
+
+    def test_fields_set_when_the_check_raises(self):
+        with self.assertRaises(ValueError):
+            with CheckTimer(track_resources=True) as timer:
+                raise ValueError("check failed")
+        self.assertIsNotNone(timer.wall_ms)
+        self.assertIsNotNone(timer.cpu_ms)
+
+
+if __name__ == "__main__":
+    unittest.main()
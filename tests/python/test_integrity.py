@@ -0,0 +1,148 @@
+"""diagnostic_lib.integrity: tiers, budgets and read-only access"""
+
+import io
+import os
+import sqlite3
+import unittest
+from unittest import mock
+
+from diagnostic_lib import snapshot
+from diagnostic_lib.integrity import MODES, IntegrityReport, check_integrity
+from thorough_diagnostic import CheckCapture, ThoroughDiagnosticTool
+
+from helpers import IsolatedHomeTestCase, synthetic_database
+
+
+class CheckIntegrityTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        synthetic_database(self.db)
+
+    def break_index(self):
+        """Point an index at another column: the table is intact, the index no longer matches"""
+        conn = sqlite3.connect(self.db)
+        conn.execute("PRAGMA writable_schema=ON")
+        conn.execute("UPDATE sqlite_master SET sql = 'CREATE INDEX idx_file_categorization_taxonomy "
+                     "ON file_categorization(file_name)' WHERE name = 'idx_file_categorization_taxonomy'")
+        conn.commit()
+        conn.close()
+
+    def break_page(self):
+        """Misreport a table leaf page's fragmented byte count, which every tier checks"""
+        conn = sqlite3.connect(self.db)
+        page = conn.execute("SELECT pageno FROM dbstat WHERE name = 'file_categorization' "
+                            "AND pagetype = 'leaf' LIMIT 1 OFFSET 3").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        conn.close()
+        with open(self.db, "r+b") as f:
+            f.seek((page - 1) * page_size + 7)
+            f.write(b"\x3c")
+        return page
+
+    def test_clean_database_passes_every_tier(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                report = check_integrity(self.db, mode)
+                self.assertTrue(report.ok)
+                self.assertEqual(report.problems, [])
+                self.assertIsNone(report.interrupted)
+                self.assertIsNone(report.error)
+                self.assertIsNone(report.snapshot_s)
+
+    def test_index_mismatch_needs_integrity_check(self):
+        self.break_index()
+        self.assertTrue(check_integrity(self.db, "quick").ok)
+
+        bounded = check_integrity(self.db, "bounded", max_errors=3)
+        self.assertFalse(bounded.ok)
+        self.assertEqual(len(bounded.problems), 3)
+
+        full = check_integrity(self.db, "full", max_errors=3)
+        self.assertFalse(full.ok)
+        self.assertGreater(len(full.problems), 3)
+        self.assertTrue(all("idx_file_categorization_taxonomy" in p for p in full.problems))
+
+    def test_page_corruption_found_by_every_tier(self):
+        page = self.break_page()
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                report = check_integrity(self.db, mode)
+                self.assertFalse(report.ok)
+                # The "*** in database main ***" header is dropped
+                self.assertEqual(report.problems,
+                                 [f"Fragmentation of 0 bytes reported as 60 on page {page}"])
+
+    def test_time_budget_stops_the_check(self):
+        report = check_integrity(self.db, "full", time_budget=0)
+        self.assertIsNone(report.ok)
+        self.assertEqual(report.interrupted, "time budget")
+        self.assertIsNone(report.error)
+
+    def test_progress_is_reported_and_can_cancel(self):
+        calls = []
+        report = check_integrity(self.db, "full", progress=lambda elapsed: calls.append(elapsed) or True,
+                                 progress_interval=0)
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(report.ok)
+        self.assertEqual(report.interrupted, "cancelled")
+
+        calls.clear()
+        self.assertTrue(check_integrity(self.db, "full", progress=calls.append, progress_interval=0).ok)
+        self.assertGreater(len(calls), 1)
+
+    def test_opens_read_only_next_to_a_writer(self):
+        writer = sqlite3.connect(self.db)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM api_usage_tracking")
+        before = self.db.read_bytes()
+
+        with mock.patch("diagnostic_lib.dbutil.sqlite3.connect", wraps=sqlite3.connect) as connect:
+            report = check_integrity(self.db, "full")
+        self.assertTrue(report.ok)
+        uri = connect.call_args.args[0]
+        self.assertTrue(uri.startswith("file:") and uri.endswith("?mode=ro"), uri)
+        self.assertTrue(connect.call_args.kwargs["uri"])
+        self.assertEqual(self.db.read_bytes(), before)
+        writer.rollback()
+
+    def test_snapshot_checks_a_copy(self):
+        self.break_page()
+        with mock.patch.object(snapshot, "backup_database", wraps=snapshot.backup_database) as backup:
+            report = check_integrity(self.db, "quick", snapshot=True)
+        self.assertEqual(backup.call_args.args[0], self.db)
+        copy = backup.call_args.args[1]
+        self.assertNotEqual(os.path.dirname(copy), str(self.home))
+        self.assertFalse(os.path.exists(copy))
+        self.assertIsNotNone(report.snapshot_s)
+        self.assertFalse(report.ok)
+        self.assertEqual(len(report.problems), 1)
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            check_integrity(self.db, "thorough")
+
+
+class ToolProgressTest(IsolatedHomeTestCase):
+    def test_progress_bypasses_the_check_capture(self):
+        def check_integrity(db_path, mode, time_budget, snapshot, progress):
+            self.assertFalse(progress(5.0))
+            report = IntegrityReport(mode)
+            report.ok = True
+            return report
+
+        tool = ThoroughDiagnosticTool(probe_cache=False, integrity_mode="full")
+        capture = tool._local.capture = CheckCapture("database")
+        self.addCleanup(setattr, tool._local, "capture", None)
+        with mock.patch("diagnostic_lib.integrity.check_integrity", check_integrity), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            tool.check_database_integrity(self.home / "cache.db", "Database")
+
+        self.assertIn("full integrity check running (5s)", stderr.getvalue())
+        self.assertFalse(any("running" in message for message, _ in capture.lines))
+        self.assertEqual([r.status for r in capture.results], ["OK"])
+
+
+if __name__ == "__main__":
+    unittest.main()
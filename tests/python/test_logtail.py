@@ -0,0 +1,128 @@
+"""diagnostic_lib.logtail: reverse reading, level filters and summaries"""
+
+import unittest
+from pathlib import Path
+
+from diagnostic_lib.logtail import (
+    iter_lines_reverse, line_level, line_timestamp, recent_entries, summarize_levels, tail_bytes,
+    tail_lines
+)
+
+from helpers import IsolatedHomeTestCase
+
+
+def expected_lines(data: bytes):
+    """What reading the file forwards gives, newest first"""
+    lines = data.split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+    return [line.rstrip(b"\r").decode("utf-8") for line in reversed(lines)]
+
+
+class ReverseReaderTest(IsolatedHomeTestCase):
+    def write(self, data: bytes, name: str = "core.log"):
+        path = self.home / name
+        path.write_bytes(data)
+        return path
+
+    def assertReadsBack(self, data: bytes):
+        path = self.write(data)
+        for block_size in (1, 2, 3, 5, 7, 64 * 1024):
+            with self.subTest(block_size=block_size):
+                self.assertEqual(list(iter_lines_reverse(path, block_size)), expected_lines(data))
+
+    def test_plain_and_edge_cases(self):
+        for data in (b"", b"\n", b"\n\n", b"one", b"one\n", b"one\ntwo\n", b"\nlead\n\nmid\n"):
+            with self.subTest(data=data):
+                self.assertReadsBack(data)
+
+    def test_crlf_line_endings(self):
+        self.assertReadsBack(b"first\r\nsecond\r\n\r\nlast\r\n")
+        self.assertReadsBack(b"first\r\nno newline at end")
+
+    def test_no_trailing_newline(self):
+        path = self.write(b"[2025-01-01 00:00:00.000] [info] a\n[2025-01-01 00:00:01.000] [error] b")
+        self.assertEqual(tail_lines(path, 1), ["[2025-01-01 00:00:01.000] [error] b"])
+
+    def test_multibyte_characters_split_across_blocks(self):
+        data = "é€😀\nçà ☃\n日本語のログ\n".encode("utf-8")
+        self.assertReadsBack(data)
+        # Every block boundary falls somewhere inside a character for some block size
+        path = self.write(data)
+        for block_size in range(1, 12):
+            lines = list(iter_lines_reverse(path, block_size))
+            self.assertFalse(any("�" in line for line in lines), block_size)
+
+    def test_long_lines_keep_their_end(self):
+        path = self.write(("x" * 50 + "€" * 10 + "\nshort\n").encode("utf-8"))
+        lines = list(iter_lines_reverse(path, block_size=8, max_line_bytes=16))
+        self.assertEqual(lines[0], "short")
+        self.assertTrue(lines[1].startswith("…"))
+        self.assertNotIn("�", lines[1])
+        self.assertTrue(lines[1].endswith("€€€€€"))
+
+    def test_max_scan_bytes_marks_the_cut_line(self):
+        path = self.write(b"aaaaaaaaaa\nbbbb\ncccc\n")
+        self.assertEqual(list(iter_lines_reverse(path, max_scan_bytes=8)), ["cccc", "…bb"])
+
+    def test_tail_bytes_drops_a_cut_character(self):
+        path = self.write("ab€\n".encode("utf-8"))
+        self.assertEqual(tail_bytes(path, 3), "\n")
+        self.assertEqual(tail_bytes(path, 4), "€\n")
+        self.assertEqual(tail_bytes(path, 100), "ab€\n")
+
+
+def message(line: str) -> str:
+    return line.rsplit("] ", 1)[1]
+
+
+LOG = """\
+[2025-01-31 12:00:00.000] [core_logger] [info] started
+[2025-01-31 12:00:01.000] [core_logger] [warning] slow disk
+[2025-01-31 12:00:02.000] [core_logger] [error] request failed
+    continuation of the error
+[2025-01-31 12:00:03.000] [core_logger] [info] retrying
+[2025-01-31 12:00:04.000] [core_logger] [critical] giving up
+"""
+
+
+class LevelTest(IsolatedHomeTestCase):
+    def test_line_level_and_timestamp(self):
+        self.assertEqual(line_level("[2025-01-31 12:00:00.000] [db_logger] [warn] x"), "warning")
+        self.assertEqual(line_level("[2025-01-31 12:00:00.000] [ERR] x"), "error")
+        self.assertIsNone(line_level("    continuation [error] far beyond the prefix".rjust(200)))
+        self.assertEqual(line_timestamp(LOG.splitlines()[1]), "2025-01-31 12:00:01.000")
+        self.assertIsNone(line_timestamp("continuation"))
+
+    def test_tail_lines_with_min_level(self):
+        path = self.home / "core.log"
+        path.write_text(LOG, encoding="utf-8")
+        self.assertEqual([message(line) for line in tail_lines(path, 2, min_level="error")],
+                         ["request failed", "giving up"])
+        self.assertEqual(len(tail_lines(path, 10, min_level="warn")), 3)
+        self.assertEqual(tail_lines(path, 0), [])
+
+    def test_summarize_levels(self):
+        path = self.home / "core.log"
+        path.write_text(LOG, encoding="utf-8")
+        summary = summarize_levels(path)
+        self.assertEqual(summary.counts["info"], 2)
+        self.assertEqual(summary.at_least("warning"), 3)
+        self.assertEqual(summary.newest["info"], "2025-01-31 12:00:03.000")
+        self.assertEqual(summary.newest_at_least("error"), "2025-01-31 12:00:04.000")
+        self.assertTrue(summary.complete)
+        self.assertFalse(summarize_levels(path, max_scan_bytes=100).complete)
+
+    def test_recent_entries_merge_files_by_timestamp(self):
+        core = self.home / "core.log"
+        core.write_text(LOG, encoding="utf-8")
+        errors = self.home / "errors.log"
+        errors.write_text("[2025-01-31 12:00:02.500] [error] reported\n", encoding="utf-8")
+        entries = recent_entries([core, errors], 3, min_level="error")
+        self.assertEqual([(Path(p).name, message(line)) for p, line in entries],
+                         [("core.log", "request failed"), ("errors.log", "reported"),
+                          ("core.log", "giving up")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""--ndjson writes each result from the check's worker as soon as it is added"""
+
+import json
+import time
+import unittest
+from unittest import mock
+
+import thorough_diagnostic
+from thorough_diagnostic import ThoroughDiagnosticTool
+
+from helpers import IsolatedHomeTestCase
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class NdjsonStreamTest(IsolatedHomeTestCase):
+    def test_results_are_streamed_before_release(self):
+        stream = self.home / "results.ndjson"
+        seen = []
+
+        def check_system_info(tool):
+            # Released first, but waits until the later check's result is on disk
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline:
+                if any(r.get("check") == "logs" for r in read_records(stream)):
+                    seen.append(True)
+                    break
+                time.sleep(0.01)
+            tool.add_result("System Probe", "OK", "released first", category="System")
+
+        def check_logs(tool):
+            tool.add_result("Log Probe", "INFO", "finished first", category="Logs")
+
+        with mock.patch.object(ThoroughDiagnosticTool, "check_system_info", check_system_info), \
+                mock.patch.object(ThoroughDiagnosticTool, "check_logs", check_logs), \
+                mock.patch.object(thorough_diagnostic, "print", create=True):
+            tool = ThoroughDiagnosticTool(jobs=2, probe_cache=False)
+            tool.begin_stream(str(stream))
+            tool.run_checks(["system_info", "logs"])
+            summary = tool.finish_stream()
+
+        self.assertEqual(seen, [True])
+        results = [r for r in read_records(stream) if r["event"] == "result"]
+        self.assertEqual([(r["check"], r["name"]) for r in results],
+                         [("logs", "Log Probe"), ("system_info", "System Probe")])
+        self.assertEqual(summary["summary"]["total_checks"], 2)
+        # The printed log still follows declaration order
+        self.assertEqual(list(tool.check_results), ["system_info", "logs"])
+
+
+if __name__ == "__main__":
+    unittest.main()
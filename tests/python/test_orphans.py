@@ -0,0 +1,64 @@
+"""diagnostic_lib.orphans: anti-join orphan counts and the cleanup script"""
+
+import sqlite3
+import unittest
+
+from diagnostic_lib.orphans import RELATIONSHIPS, cleanup_script, scan_orphans
+
+from helpers import app_database
+
+
+class OrphanScanTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = app_database()
+        self.addCleanup(self.conn.close)
+        self.conn.executescript("""
+            INSERT INTO category_taxonomy (id, canonical_category, canonical_subcategory,
+                                           normalized_category, normalized_subcategory)
+            VALUES (1, 'Images', 'Photos', 'images', 'photos');
+            INSERT INTO file_categorization (file_name, file_type, dir_path, category, subcategory, taxonomy_id)
+            VALUES ('a.jpg', 'F', '/p', 'Images', 'Photos', 1),
+                   ('b.jpg', 'F', '/p', 'Images', 'Photos', 99),
+                   ('c.jpg', 'F', '/p', 'Images', 'Photos', NULL);
+            INSERT INTO confidence_scores (file_name, file_type, dir_path, category_confidence)
+            VALUES ('a.jpg', 'F', '/p', 0.9), ('gone.jpg', 'F', '/p', 0.5), ('a.jpg', 'D', '/p', 0.1);
+            INSERT INTO category_alias (alias_category_norm, alias_subcategory_norm, taxonomy_id)
+            VALUES ('pics', 'photos', 1), ('docs', 'pdf', 7);
+        """)
+
+    def findings(self):
+        return {f.relationship.name: f for f in scan_orphans(self.conn)}
+
+    def test_counts_and_samples(self):
+        findings = self.findings()
+        self.assertEqual(len(findings), len(RELATIONSHIPS))
+        scores = findings["confidence_scores -> file_categorization"]
+        self.assertEqual(scores.orphans, 2)
+        self.assertEqual(sorted(scores.samples), [("a.jpg", "D", "/p"), ("gone.jpg", "F", "/p")])
+        # NULL references are not orphans
+        self.assertEqual(findings["file_categorization -> category_taxonomy"].orphans, 1)
+        self.assertEqual(findings["category_alias -> category_taxonomy"].samples, [(7,)])
+        self.assertTrue(all(f.skipped is None for f in findings.values()))
+
+    def test_missing_tables_are_skipped(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE category_alias (alias_category_norm TEXT, taxonomy_id INTEGER)")
+        findings = {f.relationship.name: f for f in scan_orphans(conn)}
+        self.assertIn("category_taxonomy.id", findings["category_alias -> category_taxonomy"].skipped)
+        self.assertEqual(findings["category_alias -> category_taxonomy"].orphans, 0)
+
+    def test_cleanup_script_removes_every_orphan(self):
+        script = cleanup_script(scan_orphans(self.conn), "/tmp/app.db")
+        self.assertIn("-- confidence_scores -> file_categorization: delete 2 row(s)", script)
+        self.assertIn("clear the reference of 1 row(s)", script)
+        self.conn.executescript(script)
+        self.assertTrue(all(f.orphans == 0 for f in scan_orphans(self.conn)))
+        # Nullified rows stay, deleted ones are gone
+        self.assertEqual(self.conn.execute(
+            "SELECT taxonomy_id FROM file_categorization WHERE file_name = 'b.jpg'").fetchone(), (None,))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM confidence_scores").fetchone(), (1,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""diagnostic_lib.probes: shared deadline, missing executables and the probe cache"""
+
+import sys
+import time
+import unittest
+from unittest import mock
+
+from diagnostic_lib import probes
+from diagnostic_lib.probes import PROBE_NOT_FOUND, PROBE_TIMEOUT, ProbeBatch, ProbeCache, run_probes
+
+from helpers import IsolatedHomeTestCase, age
+
+MISSING = "aifs-test-no-such-binary"
+
+
+def python(code: str) -> list:
+    return [sys.executable, "-c", code]
+
+
+class RunProbesTest(unittest.TestCase):
+    def test_results_and_errors(self):
+        results = run_probes({
+            "hello": python("print('hello')"),
+            "failing": python("import sys; sys.stderr.write('bad'); sys.exit(3)"),
+            "missing": [MISSING, "--version"],
+        })
+        self.assertTrue(results["hello"].ok)
+        self.assertEqual(results["hello"].stdout.strip(), "hello")
+        self.assertEqual((results["failing"].exit_code, results["failing"].stderr), (3, "bad"))
+        self.assertFalse(results["failing"].ok)
+        self.assertTrue(results["missing"].not_found)
+        self.assertIsNone(results["missing"].exit_code)
+
+    def test_one_deadline_for_the_whole_batch(self):
+        sleepers = {f"sleep-{i}": python("import time; time.sleep(30)") for i in range(3)}
+        start = time.perf_counter()
+        results = run_probes(dict(sleepers, quick=python("pass")), deadline=0.5, concurrency=4)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertTrue(results["quick"].ok)
+        for name in sleepers:
+            self.assertTrue(results[name].timed_out, name)
+            self.assertEqual(results[name].error, PROBE_TIMEOUT)
+            self.assertIsNone(results[name].exit_code)
+
+    def test_queued_probes_time_out_without_starting(self):
+        # With one slot, the second probe only gets it after the deadline has passed
+        results = run_probes({"first": python("import time; time.sleep(30)"), "second": python("pass")},
+                             deadline=0.3, concurrency=1)
+        self.assertTrue(results["first"].timed_out)
+        self.assertTrue(results["second"].timed_out)
+        self.assertEqual(results["second"].elapsed_ms, 0.0)
+
+
+class ProbeBatchTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.home / "state" / "probe_cache.json"
+
+    def batch(self, probe_set: dict, **kwargs) -> ProbeBatch:
+        return ProbeBatch(probe_set, cache=ProbeCache(self.cache_path), **kwargs)
+
+    def test_runs_once_on_first_demand(self):
+        batch = ProbeBatch({"a": python("print(1)"), "b": python("print(2)")})
+        self.assertEqual(batch.results, [])
+        with mock.patch.object(probes, "run_probes", wraps=run_probes) as run:
+            self.assertEqual(batch.get("b").stdout.strip(), "2")
+            self.assertEqual(batch.get("a").stdout.strip(), "1")
+        run.assert_called_once()
+        self.assertEqual([r.name for r in batch.results], ["a", "b"])
+
+    def test_missing_binary_is_not_run_or_cached(self):
+        with mock.patch.object(probes, "run_probes", wraps=run_probes) as run:
+            result = self.batch({"missing": [MISSING, "--version"]}).get("missing")
+        self.assertEqual(result.error, PROBE_NOT_FOUND)
+        run.assert_called_once_with({}, 10.0, 4)
+        self.assertFalse(self.cache_path.exists())
+
+    def test_completed_probes_replay_from_the_cache(self):
+        probe_set = {"hello": python("print('hello')"), "slow": python("import time; time.sleep(30)")}
+        first = self.batch(probe_set, deadline=0.5)
+        self.assertFalse(first.get("hello").cached)
+        self.assertTrue(first.get("slow").timed_out)
+
+        with mock.patch.object(probes, "run_probes", wraps=run_probes) as run:
+            second = self.batch(probe_set, deadline=0.5)
+            self.assertTrue(second.get("hello").cached)
+            self.assertEqual(second.get("hello").stdout.strip(), "hello")
+            self.assertTrue(second.get("slow").timed_out)
+        # Timeouts are never cached, so only the slow probe runs again
+        self.assertEqual(list(run.call_args.args[0]), ["slow"])
+
+    def test_changed_executable_invalidates_the_entry(self):
+        script = self.home / "tool"
+        script.write_text("#!/bin/sh\necho v1\n")
+        script.chmod(0o755)
+        age(script)
+        probe_set = {"tool": [str(script)]}
+        self.assertEqual(self.batch(probe_set).get("tool").stdout.strip(), "v1")
+        self.assertTrue(self.batch(probe_set).get("tool").cached)
+
+        script.write_text("#!/bin/sh\necho v2\n")
+        result = self.batch(probe_set).get("tool")
+        self.assertFalse(result.cached)
+        self.assertEqual(result.stdout.strip(), "v2")
+
+    def test_expired_entries_are_evicted(self):
+        probe_set = {"hello": python("print('hello')")}
+        self.batch(probe_set).get("hello")
+        with mock.patch.object(probes.time, "time", return_value=time.time() + 3600):
+            batch = ProbeBatch(probe_set, cache=ProbeCache(self.cache_path, max_age=60))
+            self.assertFalse(batch.get("hello").cached)
+
+
+if __name__ == "__main__":
+    unittest.main()
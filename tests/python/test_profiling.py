@@ -0,0 +1,79 @@
+"""diagnostic_lib.profiling: folded stacks rebuilt from cProfile's call graph"""
+
+import time
+import unittest
+
+from diagnostic_lib.profiling import collapsed_stacks
+
+
+class FakeStats:
+    """The part of pstats.Stats collapsed_stacks reads: func -> (cc, nc, tt, ct, callers)"""
+    def __init__(self):
+        self.stats = {}
+
+    def add(self, name, tt, ct, callers=None):
+        func = ("app.py", len(self.stats) + 1, name)
+        self.stats[func] = (1, 1, tt, ct, {c: (1, 1, edge, edge) for c, edge in (callers or {}).items()})
+        return func
+
+
+def label(func):
+    return f"{func[2]} (app.py:{func[1]})"
+
+
+class CollapsedStacksTest(unittest.TestCase):
+    def test_shared_callee_time_is_split_by_caller(self):
+        stats = FakeStats()
+        main = stats.add("main", 0.1, 1.0)
+        a = stats.add("a", 0.2, 0.5, {main: 0.5})
+        b = stats.add("b", 0.1, 0.4, {main: 0.4})
+        c = stats.add("c", 0.6, 0.6, {a: 0.3, b: 0.3})
+        folded = collapsed_stacks(stats, "check")
+        prefix = f"check;{label(main)}"
+        self.assertEqual(folded, {
+            prefix: 100000,
+            f"{prefix};{label(a)}": 200000,
+            f"{prefix};{label(a)};{label(c)}": 300000,
+            f"{prefix};{label(b)}": 100000,
+            f"{prefix};{label(b)};{label(c)}": 300000,
+        })
+
+    def test_recursion_is_not_followed(self):
+        stats = FakeStats()
+        main = stats.add("main", 0.5, 1.0)
+        loop = stats.add("loop", 0.5, 0.5, {main: 0.5})
+        stats.stats[loop][4][loop] = (1, 1, 0.1, 0.1)  # loop calls itself
+        self.assertEqual(sum(collapsed_stacks(stats, "check").values()), 1000000)
+
+    def layered(self, layers, fan_out, tt=0.01):
+        """Every function of a layer calls every function of the next: fan_out**layers paths"""
+        stats = FakeStats()
+        cts = [tt * (layers - i) for i in range(layers)]  # Each layer adds tt below it
+        main = stats.add("main", tt, tt + cts[0] * fan_out)
+        previous = [main]
+        for i in range(layers):
+            edge = cts[i] / len(previous)  # Callers share each function's time equally
+            previous = [stats.add(f"f{i}_{j}", tt, cts[i], {caller: edge for caller in previous})
+                        for j in range(fan_out)]
+        return stats, main
+
+    def test_node_cap_bounds_combinatorial_graphs(self):
+        stats, main = self.layered(layers=14, fan_out=4)  # 4**14 paths
+        started = time.perf_counter()
+        folded = collapsed_stacks(stats, "check", max_nodes=2000)
+        self.assertLess(time.perf_counter() - started, 5.0)
+        self.assertLess(len(folded), 4000)
+        self.assertTrue(any(key.endswith(";[truncated]") for key in folded))
+        # Time below the paths that were not expanded is kept, not dropped
+        total_us = stats.stats[main][3] * 1_000_000
+        self.assertAlmostEqual(sum(folded.values()) / total_us, 1.0, places=2)
+
+    def test_small_graphs_are_not_truncated(self):
+        stats, main = self.layered(layers=3, fan_out=3)
+        folded = collapsed_stacks(stats, "check")
+        self.assertFalse(any("[truncated]" in key for key in folded))
+        self.assertEqual(len(folded), 1 + 3 + 9 + 27)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""diagnostic_lib.queryplan: scans, missing indexes and weighted costs"""
+
+import sqlite3
+import unittest
+
+from diagnostic_lib.dbutil import connect_readonly
+from diagnostic_lib.queryplan import CALLS_PER_WORKLOAD, EXPECTED_INDEXES, analyze
+
+from helpers import IsolatedHomeTestCase, synthetic_database
+
+
+class AnalyzeTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        self.counts = synthetic_database(self.db)
+
+    def change(self, *statements):
+        conn = sqlite3.connect(self.db)
+        for sql in statements:
+            conn.execute(sql)
+        conn.commit()
+        conn.close()
+
+    def analyze(self):
+        conn = connect_readonly(self.db)
+        try:
+            findings, missing = analyze(conn)
+        finally:
+            conn.close()
+        return {f.statement.name: f for f in findings}, missing
+
+    def test_expected_indexes_are_used(self):
+        findings, missing = self.analyze()
+        self.assertEqual(missing, [])
+        for finding in findings.values():
+            self.assertIsNone(finding.error, finding.statement.name)
+            if finding.statement.index:
+                self.assertEqual(finding.scanned_tables, [], finding.statement.name)
+                self.assertTrue(finding.indexes_used, finding.statement.name)
+        self.assertEqual(findings["content_by_hash"].indexes_used, ["idx_content_analysis_hash"])
+        self.assertFalse(findings["categorization_lookup"].scanned_tables)
+        self.assertEqual(findings["file_names_in_dir"].scanned_tables, ["file_categorization"])
+
+    def test_dropped_index_turns_a_search_into_a_scan(self):
+        self.change("DROP INDEX idx_content_analysis_hash")
+        findings, missing = self.analyze()
+
+        by_hash = findings["content_by_hash"]
+        self.assertEqual(by_hash.plan, ["SCAN content_analysis_cache"])
+        self.assertEqual(by_hash.scanned_tables, ["content_analysis_cache"])
+        rows = self.counts["content_analysis_cache"]
+        self.assertEqual(by_hash.rows_per_call, rows)
+        self.assertEqual(by_hash.weighted_cost, rows * CALLS_PER_WORKLOAD["per_file"])
+        self.assertEqual(by_hash.suggested_index(),
+                         "CREATE INDEX idx_content_analysis_hash ON content_analysis_cache(content_hash);")
+
+        self.assertEqual(len(missing), 1)
+        self.assertEqual(missing[0]["index"], "idx_content_analysis_hash")
+        self.assertEqual(missing[0]["columns"], list(EXPECTED_INDEXES["idx_content_analysis_hash"][1]))
+        self.assertEqual(missing[0]["statements"], ["content_by_hash"])
+        self.assertEqual(missing[0]["covered_by"], [])
+        self.assertEqual(missing[0]["weighted_cost"], by_hash.weighted_cost)
+
+    def test_missing_index_covered_by_a_unique_constraint(self):
+        self.change("DROP INDEX idx_confidence_scores_file", "DROP INDEX idx_content_analysis_hash")
+        findings, missing = self.analyze()
+        self.assertFalse(findings["confidence_lookup"].scanned_tables)
+        self.assertIsNone(findings["confidence_lookup"].suggested_index())
+        # Costliest first; the constraint's autoindex still serves the lookup
+        self.assertEqual([m["index"] for m in missing],
+                         ["idx_content_analysis_hash", "idx_confidence_scores_file"])
+        self.assertEqual(missing[1]["covered_by"], ["sqlite_autoindex_confidence_scores_1"])
+
+    def test_missing_table_is_an_error_not_a_missing_index(self):
+        self.change("DROP TABLE file_tinder_state", "DROP TABLE user_corrections")
+        findings, missing = self.analyze()
+        self.assertIn("no such table", findings["file_tinder_by_folder"].error)
+        self.assertEqual(findings["file_tinder_by_folder"].table_rows, 0)
+        self.assertEqual(missing, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
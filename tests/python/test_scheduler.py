@@ -0,0 +1,139 @@
+"""CheckScheduler: ordered release, timeouts, cancellation and dependencies"""
+
+import threading
+import time
+import unittest
+
+from diagnostic_lib.scheduler import (
+    CANCELLED, DONE, ERROR, SKIPPED, TIMEOUT, CheckCancelled, CheckScheduler
+)
+
+
+def noop(cancel_event):
+    pass
+
+
+def fail(cancel_event):
+    raise RuntimeError("boom")
+
+
+class SchedulerTest(unittest.TestCase):
+    def run_all(self, scheduler):
+        return {outcome.name: outcome for outcome in scheduler.run()}
+
+    def test_release_follows_declaration_order(self):
+        finished = []
+        second_done = threading.Event()
+
+        def first(cancel_event):
+            second_done.wait(5)  # Finishes after "second"
+            finished.append("first")
+
+        def second(cancel_event):
+            finished.append("second")
+            second_done.set()
+
+        scheduler = CheckScheduler(max_workers=2)
+        scheduler.add("first", first)
+        scheduler.add("second", second)
+        released = [(outcome.name, outcome.state) for outcome in scheduler.run()]
+        self.assertEqual(finished, ["second", "first"])
+        self.assertEqual(released, [("first", DONE), ("second", DONE)])
+
+    def test_error_is_reported_with_traceback(self):
+        scheduler = CheckScheduler()
+        scheduler.add("broken", fail)
+        outcome = self.run_all(scheduler)["broken"]
+        self.assertEqual(outcome.state, ERROR)
+        self.assertIsInstance(outcome.error, RuntimeError)
+        self.assertIn("boom", outcome.traceback)
+
+    def test_timeout_abandons_and_cancels_the_check(self):
+        cancelled = threading.Event()
+
+        def hang(cancel_event):
+            cancel_event.wait(10)
+            cancelled.set()
+
+        scheduler = CheckScheduler(max_workers=2, default_timeout=0.1)
+        scheduler.add("hang", hang)
+        scheduler.add("quick", noop, timeout=5)
+        outcomes = self.run_all(scheduler)
+        self.assertEqual(outcomes["hang"].state, TIMEOUT)
+        self.assertEqual(outcomes["hang"].elapsed, 0.1)
+        self.assertEqual(outcomes["quick"].state, DONE)
+        self.assertTrue(cancelled.wait(5))
+
+    def test_cancel_stops_running_and_pending_checks(self):
+        started = threading.Event()
+
+        def running(cancel_event):
+            started.set()
+            cancel_event.wait(10)
+            raise CheckCancelled()
+
+        scheduler = CheckScheduler(max_workers=1)
+        scheduler.add("running", running)
+        scheduler.add("pending", noop)
+        # Cancel from another thread, as the Ctrl+C handler would while run() waits
+        canceller = threading.Thread(target=lambda: started.wait(5) and scheduler.cancel())
+        canceller.start()
+        outcomes = self.run_all(scheduler)
+        canceller.join()
+        self.assertTrue(started.is_set())
+        self.assertEqual(outcomes["running"].state, CANCELLED)
+        self.assertEqual(outcomes["pending"].state, CANCELLED)
+
+    def test_failed_dependency_skips_dependents(self):
+        ran = []
+        scheduler = CheckScheduler(max_workers=4)
+        scheduler.add("base", fail)
+        scheduler.add("child", lambda e: ran.append("child"), depends_on=["base"])
+        scheduler.add("grandchild", lambda e: ran.append("grandchild"), depends_on=["child"])
+        outcomes = self.run_all(scheduler)
+        self.assertEqual(outcomes["child"].state, SKIPPED)
+        self.assertEqual(outcomes["child"].blocked_by, "base")
+        self.assertEqual(outcomes["grandchild"].state, SKIPPED)
+        self.assertEqual(outcomes["grandchild"].blocked_by, "child")
+        self.assertEqual(ran, [])
+
+    def test_after_only_orders_and_never_skips(self):
+        order = []
+        hung_cancelled = threading.Event()
+
+        def slow_failure(cancel_event):
+            time.sleep(0.05)
+            order.append("slow")
+            raise RuntimeError("boom")
+
+        def hung(cancel_event):
+            cancel_event.wait(10)
+            hung_cancelled.set()
+
+        def bench(cancel_event):
+            order.append("bench")
+            self.assertTrue(hung_cancelled.wait(5))
+
+        scheduler = CheckScheduler(max_workers=4)
+        scheduler.add("slow", slow_failure)
+        scheduler.add("hung", hung, timeout=0.1)
+        scheduler.add("bench", bench, after=["slow", "hung"])
+        outcomes = self.run_all(scheduler)
+        self.assertEqual(outcomes["slow"].state, ERROR)
+        self.assertEqual(outcomes["hung"].state, TIMEOUT)
+        self.assertEqual(outcomes["bench"].state, DONE)
+        self.assertEqual(order, ["slow", "bench"])
+
+    def test_dependencies_must_be_declared_first(self):
+        scheduler = CheckScheduler()
+        scheduler.add("a", noop)
+        with self.assertRaises(ValueError):
+            scheduler.add("a", noop)
+        with self.assertRaises(ValueError):
+            scheduler.add("b", noop, depends_on=["missing"])
+        with self.assertRaises(ValueError):
+            scheduler.add("c", noop, after=["missing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""diagnostic_lib.schema: statement extraction and drift detection"""
+
+import unittest
+
+from diagnostic_lib.schema import (
+    SOURCE, check_constraints, detect_drift, manifest_is_current, source_statements
+)
+
+from helpers import REPO_ROOT, IsolatedHomeTestCase, app_database
+
+CPP = r'''
+const char* create = R"(
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY,
+        state TEXT CHECK(state IN ('a', 'b') AND length(state) > (0)),
+        name TEXT NOT NULL
+    );
+)";
+db_exec("ALTER TABLE items ADD COLUMN note TEXT DEFAULT \"\"");
+db_exec("SELECT * FROM items");
+const char* index = "CREATE INDEX IF NOT EXISTS idx_items_name ON items(name)";
+'''
+
+
+class SourceStatementsTest(unittest.TestCase):
+    def test_only_schema_statements_are_extracted(self):
+        statements = source_statements(CPP)
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(statements[0].startswith("CREATE TABLE IF NOT EXISTS items"))
+        self.assertEqual(statements[1], 'ALTER TABLE items ADD COLUMN note TEXT DEFAULT ""')
+        self.assertTrue(statements[2].startswith("CREATE INDEX"))
+
+    def test_check_constraints_keep_nested_parentheses(self):
+        self.assertEqual(check_constraints(source_statements(CPP)[0]),
+                         ["state IN ('a', 'b') AND length(state) > (0)"])
+        self.assertEqual(check_constraints(None), [])
+
+
+class DriftTest(unittest.TestCase):
+    def database(self):
+        conn = app_database()
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_app_schema_has_no_drift(self):
+        drift = detect_drift(self.database())
+        self.assertFalse(drift.has_errors)
+        self.assertTrue(all(not value for value in drift.to_dict().values()), drift.to_dict())
+
+    def test_missing_and_extra_objects(self):
+        conn = self.database()
+        conn.executescript("""
+            DROP INDEX idx_sessions_folder;
+            DROP TABLE content_analysis_cache;
+            ALTER TABLE user_profiles DROP COLUMN last_used;
+            CREATE TABLE scratch (x);
+        """)
+        drift = detect_drift(conn)
+        self.assertEqual(drift.missing_indexes, ["idx_sessions_folder"])
+        self.assertEqual(drift.missing_tables, ["content_analysis_cache"])
+        self.assertEqual(drift.missing_columns, ["user_profiles.last_used"])
+        self.assertEqual(drift.extra_tables, ["scratch"])
+        self.assertTrue(drift.has_errors)
+
+    def test_changed_constraints_and_types(self):
+        conn = self.database()
+        conn.executescript("""
+            DROP TABLE api_usage_tracking;
+            CREATE TABLE api_usage_tracking (
+                id INTEGER PRIMARY KEY, provider TEXT NOT NULL, date TEXT NOT NULL,
+                tokens_used INTEGER, requests_made INTEGER, cost_estimate REAL,
+                daily_limit INTEGER, remaining INTEGER, timestamp DATETIME);
+            CREATE INDEX idx_usage_shape ON api_usage_tracking(provider, date);
+        """)
+        drift = detect_drift(conn)
+        self.assertEqual(drift.column_mismatches,
+                         ["api_usage_tracking.date: expected DATE NOT NULL, found TEXT NOT NULL"])
+        self.assertEqual(drift.missing_unique, ["api_usage_tracking(provider, date)"])
+        # An index with the same shape under another name is good enough
+        self.assertEqual(drift.missing_indexes, [])
+        self.assertTrue(drift.has_errors)
+
+
+class ManifestTest(IsolatedHomeTestCase):
+    def test_manifest_matches_the_source(self):
+        self.assertTrue(manifest_is_current(REPO_ROOT))
+
+    def test_changed_or_missing_source(self):
+        self.assertTrue(manifest_is_current(self.home))  # No sources to compare against
+        source = self.home / SOURCE
+        source.parent.mkdir(parents=True)
+        source.write_text((REPO_ROOT / SOURCE).read_text(encoding="utf-8") + "\n// edited\n",
+                          encoding="utf-8")
+        self.assertFalse(manifest_is_current(self.home))
+
+
+if __name__ == "__main__":
+    unittest.main()
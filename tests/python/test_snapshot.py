@@ -0,0 +1,124 @@
+"""diagnostic_lib.snapshot: chunked online backups and the snapshot store"""
+
+import gzip
+import os
+import sqlite3
+import time
+import unittest
+
+from diagnostic_lib.snapshot import SnapshotStore, SnapshotTimeout, backup_database
+
+from helpers import IsolatedHomeTestCase, synthetic_database
+
+
+def row_count(path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM file_categorization").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class BackupTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        synthetic_database(self.db)
+        self.copy = self.home / "copy.db"
+        self.writer = sqlite3.connect(self.db, isolation_level=None)
+        self.addCleanup(self.writer.close)
+        self.writes = 0
+
+    def write(self):
+        """Commit an in-place update from another connection, between two backup steps"""
+        self.writes += 1
+        self.writer.execute("UPDATE file_categorization SET subcategory = ? WHERE id = 1",
+                            (f"written-{self.writes}",))
+
+    def subcategory(self, path) -> str:
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT subcategory FROM file_categorization WHERE id = 1").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_copies_in_steps(self):
+        progress = []
+        info = backup_database(self.db, self.copy, pages_per_step=16, step_sleep=0,
+                               progress=lambda copied, total: progress.append((copied, total)))
+        self.assertGreater(info.steps, 1)
+        self.assertEqual(info.steps, len(progress))
+        self.assertEqual(progress[-1], (info.pages, info.pages))
+        self.assertEqual(info.restarts, 0)
+        self.assertEqual(info.bytes, self.copy.stat().st_size)
+        self.assertEqual(row_count(self.copy), row_count(self.db))
+
+    def test_write_during_backup_restarts_it(self):
+        steps = []
+
+        def progress(copied, total):
+            steps.append(copied)
+            if len(steps) in (1, 5):
+                self.write()
+
+        info = backup_database(self.db, self.copy, pages_per_step=8, step_sleep=0, progress=progress)
+        self.assertEqual(info.restarts, 2)
+        # The copy is the database as of the last write, not a mix of before and after
+        self.assertEqual(self.subcategory(self.copy), "written-2")
+        self.assertEqual(row_count(self.copy), row_count(self.db))
+        conn = sqlite3.connect(self.copy)
+        self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+        conn.close()
+
+    def test_time_budget_stops_a_backup_that_keeps_restarting(self):
+        with self.assertRaises(SnapshotTimeout):
+            backup_database(self.db, self.copy, pages_per_step=8, step_sleep=0, time_budget=0.2,
+                            progress=lambda copied, total: self.write())
+        self.assertGreater(self.writes, 1)
+
+    def test_source_is_opened_read_only(self):
+        missing = self.home / "missing.db"
+        with self.assertRaises(sqlite3.OperationalError):
+            backup_database(missing, self.copy)
+        self.assertFalse(missing.exists())
+
+
+class SnapshotStoreTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        synthetic_database(self.db, rows=200)
+        self.store_dir = self.home / "snapshots"
+
+    def test_save_compresses_and_keeps_the_newest(self):
+        store = SnapshotStore(self.store_dir, keep=2)
+        saved = [store.save(self.db) for _ in range(4)]
+        self.assertEqual([str(p) for p in store.snapshots()], [saved[3].path, saved[2].path])
+        with gzip.open(saved[3].path, "rb") as f:
+            self.assertEqual(f.read(), self.db.read_bytes())
+        self.assertEqual(saved[3].bytes, self.db.stat().st_size)
+        self.assertEqual(saved[3].compressed_bytes, os.path.getsize(saved[3].path))
+        self.assertLess(saved[3].compressed_bytes, saved[3].bytes)
+
+    def test_prune_by_age_and_count(self):
+        self.store_dir.mkdir()
+        names = [f"aifilesorter-2026010{day}_000000_000000.db.gz" for day in range(1, 6)]
+        for name in names:
+            (self.store_dir / name).write_bytes(b"")
+        unrelated = self.store_dir / "notes.txt"
+        unrelated.write_text("kept")
+        old = time.time() - 10 * 86400
+        for name in names[:2]:
+            os.utime(self.store_dir / name, (old, old))
+
+        removed = SnapshotStore(self.store_dir, keep=4, max_age_days=7).prune()
+        self.assertEqual(sorted(p.name for p in removed), names[:2])
+        self.assertEqual([p.name for p in SnapshotStore(self.store_dir).snapshots()], names[:1:-1])
+
+        removed = SnapshotStore(self.store_dir, keep=1).prune()
+        self.assertEqual(sorted(p.name for p in removed), names[2:4])
+        self.assertTrue(unrelated.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
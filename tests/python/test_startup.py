@@ -0,0 +1,37 @@
+"""diagnostic_lib.startup: -X importtime parsing behind --check-imports"""
+
+import unittest
+
+from diagnostic_lib.startup import eager_imports, imported_modules, top_imports
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        900 | pathlib
+import time:        80 |         80 |     _sqlite3
+import time:       200 |        400 |   sqlite3.dbapi2
+import time:        50 |        450 | sqlite3
+import time:        40 |         40 | jsonschema_like
+import time:        60 |         60 |   diagnostic_lib.fswalk
+import time:        70 |        130 | diagnostic_lib
+""".splitlines()
+
+
+class StartupImportsTest(unittest.TestCase):
+    def test_imported_modules_include_nested_ones(self):
+        modules = imported_modules(IMPORTTIME)
+        self.assertIn("sqlite3.dbapi2", modules)
+        self.assertIn("_io", modules)
+        self.assertNotIn("imported package", modules)
+
+    def test_eager_imports_match_packages_not_prefixes(self):
+        self.assertEqual(eager_imports(IMPORTTIME), ["sqlite3", "sqlite3.dbapi2"])
+        self.assertEqual(eager_imports(IMPORTTIME, lazy=("json", "diagnostic_lib.fswalk")),
+                         ["diagnostic_lib.fswalk"])
+
+    def test_top_imports_skip_nested_modules(self):
+        self.assertEqual(top_imports(IMPORTTIME, 2), [(900, "pathlib"), (450, "sqlite3")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""diagnostic_lib.synthdb: generated databases match the app's schema"""
+
+import sqlite3
+import unittest
+
+from diagnostic_lib.schema import read_schema
+from diagnostic_lib.synthdb import parse_size, size_label
+
+from helpers import IsolatedHomeTestCase, app_database, synthetic_database
+
+
+class GenerateDatabaseTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "synthetic.db"
+        self.counts = synthetic_database(self.db, rows=3000, seed=7)
+        self.conn = sqlite3.connect(self.db)
+        self.addCleanup(self.conn.close)
+
+    def test_row_counts(self):
+        self.assertEqual(self.counts["file_categorization"], 3000)
+        for table, rows in self.counts.items():
+            actual = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            self.assertEqual(actual, rows, table)
+        # Roughly the shares the generator samples
+        self.assertAlmostEqual(self.counts["confidence_scores"] / 3000, 1 / 3, delta=0.05)
+        self.assertGreater(self.counts["content_analysis_cache"], 0)
+        self.assertGreater(self.counts["api_usage_tracking"], 0)
+
+    def test_schema_matches_the_source_statements(self):
+        expected = app_database()
+        self.addCleanup(expected.close)
+        self.assertEqual(read_schema(self.conn), read_schema(expected))
+
+    def test_rows_reference_their_taxonomy(self):
+        orphans = self.conn.execute(
+            "SELECT COUNT(*) FROM file_categorization f LEFT JOIN category_taxonomy t "
+            "ON t.id = f.taxonomy_id WHERE t.id IS NULL").fetchone()[0]
+        self.assertEqual(orphans, 0)
+        self.assertEqual(self.conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+
+    def test_same_seed_same_rows(self):
+        other = self.home / "again.db"
+        self.assertEqual(synthetic_database(other, rows=3000, seed=7), self.counts)
+        query = "SELECT file_name, file_type, dir_path, category, subcategory FROM file_categorization ORDER BY id"
+        conn = sqlite3.connect(other)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute(query).fetchall(), self.conn.execute(query).fetchall())
+
+
+class SizeTest(unittest.TestCase):
+    def test_parse_and_label(self):
+        self.assertEqual(parse_size("10k"), 10000)
+        self.assertEqual(parse_size("2.5M"), 2500000)
+        self.assertEqual(parse_size("1_000"), 1000)
+        self.assertEqual(size_label(10000), "10k")
+        self.assertEqual(size_label(1000000), "1m")
+        self.assertEqual(size_label(1500), "1500")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""diagnostic_lib.tablestats: row estimates and dbstat sizes"""
+
+import sqlite3
+import unittest
+
+from diagnostic_lib.tablestats import dbstat_sizes, table_statistics
+
+from helpers import IsolatedHomeTestCase, synthetic_database
+
+
+class TableStatisticsTest(IsolatedHomeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.home / "cache.db"
+        self.counts = synthetic_database(self.db)
+        self.conn = sqlite3.connect(self.db)
+        self.addCleanup(self.conn.close)
+
+    def by_name(self, **options):
+        tables, meta = table_statistics(self.conn, **options)
+        return {t.name: t for t in tables}, meta, tables
+
+    def test_exact_counts(self):
+        stats, meta, _ = self.by_name(exact=True)
+        self.assertTrue(meta["exact_counts"])
+        for table, rows in self.counts.items():
+            self.assertEqual((stats[table].rows, stats[table].rows_source), (rows, "exact"), table)
+        self.assertEqual(stats["user_profile"].rows, 0)
+
+    def test_dbstat_sizes(self):
+        stats, meta, tables = self.by_name()
+        self.assertEqual(meta["sizes_source"], "dbstat")
+        self.assertEqual(meta["database_bytes"], self.db.stat().st_size)
+
+        files = stats["file_categorization"]
+        self.assertGreater(files.table_pages, 1)
+        self.assertEqual(files.table_bytes, files.table_pages * meta["page_size"])
+        self.assertIn("idx_file_categorization_taxonomy", files.index_bytes)
+        self.assertIn("sqlite_autoindex_file_categorization_1", files.index_bytes)
+        self.assertEqual(files.total_bytes, files.table_bytes + sum(files.index_bytes.values()))
+        self.assertLessEqual(sum(t.total_bytes for t in tables), meta["database_bytes"])
+        self.assertEqual(tables[0].name, "file_categorization")  # Largest first
+
+    def test_rows_from_sqlite_stat1(self):
+        self.conn.execute("ANALYZE")
+        stats, _, _ = self.by_name()
+        files = stats["file_categorization"]
+        self.assertEqual((files.rows, files.rows_source),
+                         (self.counts["file_categorization"], "sqlite_stat1"))
+
+    def test_rowid_range_without_stat1_or_dbstat(self):
+        self.conn.execute("DELETE FROM file_categorization WHERE id % 2 = 0")
+        self.conn.execute("DELETE FROM api_usage_tracking")
+        self.conn.execute("CREATE TABLE keyed (k TEXT PRIMARY KEY, v) WITHOUT ROWID")
+        self.conn.commit()
+        # A temp table that lacks dbstat's columns fails the same way as a build without it
+        self.conn.execute("CREATE TEMP TABLE dbstat (x)")
+
+        stats, meta, _ = self.by_name()
+        self.assertEqual(meta["sizes_source"], "unavailable")
+        files = stats["file_categorization"]
+        self.assertEqual(files.rows_source, "rowid_range")
+        # An upper bound once rows were deleted
+        self.assertEqual(files.rows, self.counts["file_categorization"] - 1)
+        self.assertIsNone(files.table_bytes)
+        self.assertIsNone(files.total_bytes)
+        self.assertEqual(stats["api_usage_tracking"].rows, 0)
+        self.assertEqual((stats["keyed"].rows, stats["keyed"].rows_source), (None, None))
+
+    def test_dbstat_sizes_match_the_page_count(self):
+        sizes, status = dbstat_sizes(self.conn)
+        self.assertEqual(status, "dbstat")
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self.assertEqual(sum(pages for _, pages in sizes.values()), page_count - freelist)
+
+
+if __name__ == "__main__":
+    unittest.main()
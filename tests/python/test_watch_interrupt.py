@@ -0,0 +1,61 @@
+"""Ctrl+C during a --watch re-run stops watching but still writes the reports"""
+
+import _thread
+import json
+import sys
+import unittest
+from unittest import mock
+
+import thorough_diagnostic
+from thorough_diagnostic import ThoroughDiagnosticTool
+
+from helpers import IsolatedHomeTestCase
+
+
+class WatchInterruptTest(IsolatedHomeTestCase):
+    def run_main(self, *argv):
+        with mock.patch.object(sys, "argv", ["thorough_diagnostic.py", *argv]):
+            thorough_diagnostic.main()
+
+    def test_interrupted_rerun_still_writes_reports(self):
+        runs = []
+
+        def check_logs(tool):
+            runs.append(len(runs))
+            if len(runs) == 1:
+                tool.add_result("Log Probe", "OK", "first run", category="Logs")
+                return
+            tool.add_result("Log Probe", "WARNING", "interrupted run", category="Logs")
+            # Ctrl+C arrives in the main thread while this re-run is still going
+            _thread.interrupt_main()
+            tool._local.capture.cancel_event.wait(10)
+
+        report = self.home / "report.json"
+        with mock.patch.object(ThoroughDiagnosticTool, "check_logs", check_logs), \
+                mock.patch("diagnostic_lib.watch.ChangeWatcher.wait", return_value=["logs"]), \
+                mock.patch.object(thorough_diagnostic, "print", create=True):
+            self.run_main("--watch", "--only", "logs", "--no-probe-cache",
+                          "--output", str(report), "--markdown")
+
+        self.assertEqual(len(runs), 2)
+        self.assertTrue(report.is_file())
+        self.assertTrue(report.with_suffix(".md").is_file())
+        results = json.loads(report.read_text(encoding="utf-8"))["all_results"]
+        self.assertEqual([(r["name"], r["message"]) for r in results], [("Log Probe", "first run")])
+
+    def test_interrupt_without_watch_exits(self):
+        def check_logs(tool):
+            _thread.interrupt_main()
+            tool._local.capture.cancel_event.wait(10)
+
+        report = self.home / "report.json"
+        with mock.patch.object(ThoroughDiagnosticTool, "check_logs", check_logs), \
+                mock.patch.object(thorough_diagnostic, "print", create=True):
+            with self.assertRaises(SystemExit) as raised:
+                self.run_main("--only", "logs", "--no-probe-cache", "--output", str(report))
+        self.assertEqual(raised.exception.code, 1)
+        self.assertFalse(report.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
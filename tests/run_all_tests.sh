@@ -6,6 +6,9 @@ ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 declare -a TEST_SCRIPTS=(
     "$ROOT_DIR/tests/run_database_tests.sh"
     "$ROOT_DIR/tests/run_translation_tests.sh"
+    "$ROOT_DIR/tests/run_diagnostic_startup_tests.sh"
+    "$ROOT_DIR/tests/run_schema_manifest_tests.sh"
+    "$ROOT_DIR/tests/run_python_unit_tests.sh"
 )
 
 echo "Running AI File Sorter test suite"
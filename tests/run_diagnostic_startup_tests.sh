@@ -0,0 +1,15 @@
+#!/usr/bin/env bash
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+cd "$ROOT_DIR"
+
+PYTHON="${PYTHON:-python3}"
+# Deterministic: nothing slow may be imported before the first check
+"$PYTHON" -m diagnostic_lib.startup --check-imports thorough_diagnostic.py --quick
+"$PYTHON" -m diagnostic_lib.startup --check-imports diagnostic_tool.py
+
+# The wall-clock budget depends on the machine, so it only runs when asked for
+if [[ -n "${DIAGNOSTIC_STARTUP_BUDGET_MS:-}" ]]; then
+    "$PYTHON" -m diagnostic_lib.startup thorough_diagnostic.py --quick
+    "$PYTHON" -m diagnostic_lib.startup diagnostic_tool.py
+fi
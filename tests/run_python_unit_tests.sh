@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+cd "$ROOT_DIR"
+
+PYTHON="${PYTHON:-python3}"
+# Unit tests of the diagnostic tools (stdlib unittest, no extra packages)
+"$PYTHON" -m unittest discover -s tests/python -t tests/python
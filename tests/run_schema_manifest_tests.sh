@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+cd "$ROOT_DIR"
+
+PYTHON="${PYTHON:-python3}"
+# Fails when DatabaseManager.cpp changed without regenerating the manifest
+"$PYTHON" -m diagnostic_lib.schema --check
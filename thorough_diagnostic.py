@@ -26,25 +26,95 @@ Options:
     --html                 Generate HTML report
     --markdown             Generate Markdown summary
     --test-apis            Test API connectivity (requires keys)
-    --benchmark            Run performance benchmarks
+    --benchmark            Benchmark the app's database queries on a copy of the DB
+    --exact-counts         Exact row counts (COUNT(*)) instead of estimates
+    --integrity MODE       Integrity tier: quick, bounded or full (default: quick)
+    --integrity-budget S   Stop the integrity check after S seconds (0 = unlimited)
+    --integrity-snapshot   Check a backup-API snapshot instead of the live file
+    --snapshot             Analyze an online snapshot of the database
+    --save-snapshot [DIR]  Keep compressed, rotated snapshots in DIR
+    --measure-maintenance  Measure VACUUM/ANALYZE payoff on a snapshot
+    --orphan-script FILE   Write an SQL script that cleans up orphaned rows
+    --cache-scan-budget S  Time spent re-checking content_analysis_cache (0 = unlimited)
+    --hit-rate FOLDER      Estimate how much of FOLDER the categorization cache covers
+    --contention           Simulate concurrent readers and a writer on a copy of the DB
+    --contention-readers N       Reader threads in the contention simulation (default: 4)
+    --contention-busy-timeout MS Busy timeout for the simulation (default: 0, as the app)
     --quick                Skip slow tests (for rapid validation)
+    --only CHECKS          Run only the named checks (comma-separated)
+    --jobs, -j N           Run up to N independent checks concurrently
+    --check-timeout SECS   Abandon any single check after SECS seconds
+    --incremental          Reuse results of checks whose inputs are unchanged
+    --state-dir DIR        Where incremental state and the probe cache are kept
+    --no-probe-cache       Always run external probes instead of reusing cached output
+    --watch                Keep running and re-run checks affected by changes
+    --watch-interval SECS  Polling interval for --watch
+    --watch-output FILE    Append each updated result to FILE as JSON lines
+    --ndjson FILE          Stream results to FILE as NDJSON with a final summary
+    --resource-usage       Also record CPU time and peak RSS growth per check
+    --slowest N            List the N slowest checks in the console summary
+    --profile [DIR]        Profile every check (cProfile .pstats + collapsed stacks)
+    --profile-memory       With --profile, also record top allocations per check
 """
 
+# Only modules needed before the first check are imported here; the rest
+# (sqlite3, subprocess, json, platform, profiling, ...) are imported where
+# they are used so --quick and --only runs start fast. See
+# diagnostic_lib/startup.py for the startup-time benchmark.
 import os
 import sys
-import json
-import platform
-import subprocess
-import sqlite3
 import datetime
 import argparse
 import time
-import hashlib
 import re
+import threading
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Any
 from collections import defaultdict
 
+from diagnostic_lib.apppaths import (
+    diagnostic_state_dir, legacy_data_dir, resolve_database, resolve_log_dir
+)
+from diagnostic_lib.fswalk import TreeWalker
+from diagnostic_lib.instrumentation import CheckTimer
+from diagnostic_lib.probes import ProbeBatch, ProbeCache, default_probe_cache
+from diagnostic_lib.startup import mark_first_check, system_name
+from diagnostic_lib.scheduler import (
+    CheckScheduler, CheckCancelled, DONE, ERROR, TIMEOUT, SKIPPED, CANCELLED
+)
+
+if TYPE_CHECKING:
+    from diagnostic_lib.incremental import IncrementalState
+    from diagnostic_lib.profiling import CheckProfiler
+    from diagnostic_lib.sinks import JsonLinesSink
+    from diagnostic_lib.snapshot import SnapshotStore
+
+# Names accepted by --only, in plan order (see ThoroughDiagnosticTool.check_plan)
+CHECK_NAMES = (
+    "system_info", "file_structure", "dependencies", "llm_backends", "database",
+    "configuration", "features", "logs", "performance", "api_connectivity",
+)
+
+# Stored results older than this are recomputed even if their inputs look unchanged
+INCREMENTAL_MAX_AGE_HOURS = 24
+
+# Report sections a check fills in besides its results; stored and restored with them
+REPLAYED_REPORT_FIELDS = {
+    "database": ("database_timings", "journal", "snapshot_info", "integrity", "schema_drift",
+                 "table_statistics", "maintenance", "orphans", "content_cache", "api_usage",
+                 "cache_hit_rate", "query_plans"),
+    "logs": ("log_levels",),
+}
+
+# Give up on a snapshot the app keeps invalidating with writes after this long
+SNAPSHOT_BUDGET_SECONDS = 60
+
+# How far back from the end of a log the error-entry preview searches
+LOG_PREVIEW_SCAN_BYTES = 8 * 1024 * 1024
+
+# Log bytes classified by level per run, newest files first
+LOG_SCAN_BYTES = 64 * 1024 * 1024
+
 # ANSI color codes for terminal output
 class Colors:
     HEADER = '\033[95m'
@@ -68,18 +138,115 @@ class DiagnosticResult:
         self.recommendation = recommendation
         self.timestamp = datetime.datetime.now().isoformat()
         self.category = ""  # Will be set by diagnostic sections
+    
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "status": self.status,
+            "message": self.message,
+            "details": self.details,
+            "recommendation": self.recommendation,
+            "timestamp": self.timestamp
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "DiagnosticResult":
+        result = cls(data["name"], data["status"], data["message"],
+                     data.get("details"), data.get("recommendation"))
+        result.category = data.get("category", "")
+        result.timestamp = data.get("timestamp", result.timestamp)
+        return result
+
+class CheckCapture:
+    """Buffers the output and results of a check running on a worker thread"""
+    def __init__(self, name: str = ""):
+        self.name = name  # Check the results belong to
+        self.cancel_event = threading.Event()  # Replaced by the scheduler's event
+        self.lines: List[Tuple[str, str]] = []
+        self.results: List[DiagnosticResult] = []
+        self.lock = threading.Lock()
+        self.closed = False  # Set once flushed; later output is dropped
+        self.fingerprint: Optional[str] = None  # Input fingerprint (incremental mode)
+        self.reused = False  # Results replayed from an earlier run
+        self.timer: Optional[CheckTimer] = None
 
 class ThoroughDiagnosticTool:
     """Comprehensive diagnostic tool for AI File Sorter"""
     
-    def __init__(self, verbose: bool = False, quick: bool = False):
+    def __init__(self, verbose: bool = False, quick: bool = False,
+                 jobs: Optional[int] = None, check_timeout: Optional[float] = 120.0,
+                 incremental: bool = False, state_dir: Optional[str] = None,
+                 track_resources: bool = False, profile_dir: Optional[str] = None,
+                 profile_memory: bool = False, probe_cache: bool = True,
+                 benchmark: bool = False, exact_counts: bool = False,
+                 integrity_mode: str = "quick", integrity_budget: Optional[float] = 30.0,
+                 integrity_snapshot: bool = False, snapshot: bool = False,
+                 save_snapshot: Optional[str] = None, snapshot_keep: int = 5,
+                 measure_maintenance: bool = False, orphan_script: Optional[str] = None,
+                 cache_scan_budget: Optional[float] = 30.0, hit_rate_folder: Optional[str] = None,
+                 contention: bool = False, contention_readers: int = 4, contention_busy_timeout: int = 0):
         self.verbose = verbose
         self.quick = quick
+        self.benchmark = benchmark
+        self.db_benchmark: Optional[dict] = None
+        self.query_plans: Optional[dict] = None
+        self.exact_counts = exact_counts
+        self.table_statistics: Optional[dict] = None
+        self.integrity_mode = integrity_mode
+        self.integrity_budget = integrity_budget
+        self.integrity_snapshot = integrity_snapshot
+        self.integrity: Optional[dict] = None
+        self.measure_maintenance = measure_maintenance
+        self.maintenance: Optional[dict] = None
+        self.orphan_script = orphan_script
+        self.orphans: Optional[List[dict]] = None
+        self.schema_drift: Optional[dict] = None
+        self.cache_scan_budget = cache_scan_budget
+        self.content_cache: Optional[dict] = None
+        self.hit_rate_folder = hit_rate_folder
+        self.cache_hit_rate: Optional[dict] = None
+        self.api_usage: Optional[dict] = None
+        self.database_timings: Dict[str, float] = {}  # Database sub-step -> wall ms
+        self.journal: Optional[dict] = None
+        self.contention = contention
+        self.contention_readers = contention_readers
+        self.contention_busy_timeout = contention_busy_timeout
+        self.lock_contention: Optional[dict] = None
+        
+        # Optional working snapshot (backup API) that the database analyses run on
+        self.use_snapshot = snapshot or save_snapshot is not None
+        self.db_snapshot: Optional[Path] = None
+        self.snapshot_info: Optional[dict] = None
+        self._snapshot_tmp: Optional[str] = None
         self.results: List[DiagnosticResult] = []
-        self.platform = platform.system()
+        self.platform = system_name()
         self.start_time = datetime.datetime.now()
         self.categories: Dict[str, List[DiagnosticResult]] = defaultdict(list)
         
+        # Concurrency settings (checks are mostly I/O-bound)
+        self.jobs = jobs or min(8, (os.cpu_count() or 1) + 4)
+        self.check_timeout = check_timeout
+        self._local = threading.local()
+        self._captures: Dict[str, CheckCapture] = {}
+        self.check_results: Dict[str, List[DiagnosticResult]] = {}
+        self.result_sinks: List["JsonLinesSink"] = []  # Receive each result as it is recorded
+        self.retain_results = True  # False when streaming: only counters are kept
+        self.status_counts: Dict[str, int] = defaultdict(int)
+        self.category_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._stream: Optional["JsonLinesSink"] = None
+        
+        # Per-check timings (CPU time and peak RSS only when track_resources is set)
+        self.track_resources = track_resources
+        self.check_timings: Dict[str, dict] = {}
+        
+        # Profiling hooks into every check; profilers are process-wide, so run serially
+        self.profiler: Optional["CheckProfiler"] = None
+        if profile_dir:
+            from diagnostic_lib.profiling import CheckProfiler
+            self.profiler = CheckProfiler(profile_dir, trace_memory=profile_memory)
+            self.jobs = 1
+        
         # Determine base directories
         self.repo_root = Path.cwd()
         if self.platform == "Windows":
@@ -92,31 +259,93 @@ class ThoroughDiagnosticTool:
                 self.app_dir = self.repo_root
         
         # Platform-specific paths
-        if self.platform == "Windows":
-            self.config_dir = Path(os.path.expandvars("%APPDATA%")) / "aifilesorter"
-            self.data_dir = Path(os.path.expandvars("%APPDATA%")) / "aifilesorter"
-        elif self.platform == "Darwin":  # macOS
-            self.config_dir = Path.home() / "Library" / "Application Support" / "aifilesorter"
-            self.data_dir = Path.home() / "Library" / "Application Support" / "aifilesorter"
-        else:  # Linux
+        self.data_dir = legacy_data_dir()
+        if self.platform in ("Windows", "Darwin"):
+            self.config_dir = self.data_dir
+        else:
             self.config_dir = Path.home() / ".config" / "aifilesorter"
-            self.data_dir = Path.home() / ".local" / "share" / "aifilesorter"
+        
+        # Diagnostic state (incremental results, probe cache) lives here
+        self.state_dir = diagnostic_state_dir(state_dir)
+        
+        # The categorization database, where DatabaseManager puts it
+        self.db_path = resolve_database(self.data_dir)
+        self.log_dir = resolve_log_dir(self.data_dir / "logs")
+        self.log_levels: Optional[dict] = None
+        self.snapshot_store: Optional["SnapshotStore"] = None
+        if save_snapshot is not None:
+            from diagnostic_lib.snapshot import SnapshotStore
+            self.snapshot_store = SnapshotStore(save_snapshot or self.state_dir / "snapshots",
+                                                keep=snapshot_keep)
+        
+        # External commands are launched together the first time any check needs one;
+        # results are cached on disk until the executable (or its .pc files) change
+        self.probe_cache: Optional[ProbeCache] = None
+        if probe_cache:
+            self.probe_cache = default_probe_cache(self.state_dir)
+        self.probes = ProbeBatch(self.external_probes(), cache=self.probe_cache)
+        
+        # Directory walks are shared (and memoized) across all checks of this run
+        self.tree = TreeWalker()
+        
+        # Incremental mode reuses results of checks whose inputs are unchanged
+        self.incremental_state: Optional["IncrementalState"] = None
+        self.reused_checks: List[str] = []
+        if incremental:
+            from diagnostic_lib.incremental import IncrementalState
+            self.incremental_state = IncrementalState(
+                self.state_dir / "incremental_state.json",
+                max_age=datetime.timedelta(hours=INCREMENTAL_MAX_AGE_HOURS)
+            )
+    
+    def external_probes(self) -> Dict[str, List[str]]:
+        """External commands whose output the checks rely on"""
+        probes = {}
+        if self.platform != "Windows":
+            probes["Qt6 Framework"] = ["pkg-config", "--modversion", "Qt6Widgets"]
+        if self.platform in ("Linux", "Darwin"):
+            probes["libcurl"] = ["curl", "--version"]
+            probes["SQLite3"] = ["sqlite3", "--version"]
+        if self.platform == "Darwin":
+            probes["System Memory"] = ["sysctl", "hw.memsize"]
+        return probes
     
     def log(self, message: str, color: str = ""):
-        """Print a log message"""
+        """Print a log message (buffered while a check runs concurrently)"""
+        capture = getattr(self._local, "capture", None)
+        if capture is not None:
+            with capture.lock:
+                if not capture.closed:
+                    capture.lines.append((message, color))
+            return
+        
         if color:
             print(f"{color}{message}{Colors.ENDC}")
         else:
             print(message)
     
+    def progress(self, message: str):
+        """Show that a long check is still running (stderr, never buffered or replayed)"""
+        print(f"{Colors.OKCYAN}{message}{Colors.ENDC}", file=sys.stderr, flush=True)
+    
     def add_result(self, name: str, status: str, message: str, 
                    details: Optional[str] = None, recommendation: Optional[str] = None,
                    category: str = "General"):
         """Add a diagnostic result"""
         result = DiagnosticResult(name, status, message, details, recommendation)
         result.category = category
-        self.results.append(result)
-        self.categories[category].append(result)
+        
+        capture = getattr(self._local, "capture", None)
+        if capture is not None:
+            if capture.cancel_event.is_set():
+                raise CheckCancelled()
+            with capture.lock:
+                if not capture.closed:
+                    capture.results.append(result)
+                    # Sinks get it now; only the printed log waits for report order
+                    self.stream_result(result, capture.name)
+        else:
+            self.record_result(result, getattr(self._local, "check", None))
         
         # Print result
         status_color = {
@@ -143,6 +372,61 @@ class ThoroughDiagnosticTool:
         if recommendation and (status == "WARNING" or status == "FAIL"):
             self.log(f"    💡 Recommendation: {recommendation}", Colors.OKBLUE)
     
+    def record_result(self, result: DiagnosticResult, check: Optional[str] = None,
+                      stream: bool = True):
+        """Store a finished result in report order (stream=False: sinks already have it)"""
+        self.status_counts[result.status] += 1
+        self.category_counts[result.category][result.status] += 1
+        if self.retain_results:
+            self.results.append(result)
+            self.categories[result.category].append(result)
+        if stream:
+            self.stream_result(result, check)
+    
+    def stream_result(self, result: DiagnosticResult, check: Optional[str] = None):
+        """Write a result to the sinks (NDJSON, --watch-output), tagged with its check"""
+        record = None
+        for sink in self.result_sinks:
+            if record is None:
+                record = dict(result.to_dict(), event="result")
+                if check:
+                    record["check"] = check
+            sink.write(record)
+    
+    def recount_results(self):
+        """Rebuild the category index and counters from self.results"""
+        self.categories = defaultdict(list)
+        self.status_counts = defaultdict(int)
+        self.category_counts = defaultdict(lambda: defaultdict(int))
+        for result in self.results:
+            self.categories[result.category].append(result)
+            self.status_counts[result.status] += 1
+            self.category_counts[result.category][result.status] += 1
+    
+    def begin_stream(self, output_file: str):
+        """Stream results to an NDJSON file instead of keeping them in memory"""
+        from diagnostic_lib.sinks import JsonLinesSink
+        self._stream = JsonLinesSink(output_file, mode="w")
+        self._stream.write({
+            "event": "start",
+            "timestamp": self.start_time.isoformat(),
+            "tool_version": "2.0",
+            "platform": self.platform,
+            "quick_mode": self.quick,
+        })
+        self.result_sinks.append(self._stream)
+        self.retain_results = False
+    
+    def finish_stream(self) -> dict:
+        """Write the final summary record and close the NDJSON stream"""
+        summary = self.report_summary()
+        self._stream.write(dict(summary, event="summary"))
+        self._stream.close()
+        self.result_sinks.remove(self._stream)
+        self.log(f"\n{Colors.OKGREEN}✓ NDJSON stream saved: {self._stream.path}{Colors.ENDC}")
+        self._stream = None
+        return summary
+    
     def section_header(self, title: str):
         """Print a section header"""
         self.log(f"\n{'='*80}", Colors.HEADER)
@@ -157,6 +441,7 @@ class ThoroughDiagnosticTool:
         category = "System"
         
         # Platform details
+        import platform
         self.add_result(
             "Operating System",
             "INFO",
@@ -179,17 +464,14 @@ class ThoroughDiagnosticTool:
         )
         
         # CPU info
-        try:
-            import multiprocessing
-            cpu_count = multiprocessing.cpu_count()
+        cpu_count = os.cpu_count()
+        if cpu_count:
             self.add_result(
                 "CPU Cores",
                 "INFO",
                 f"{cpu_count} cores available",
                 category=category
             )
-        except:
-            pass
         
         # Memory info
         try:
@@ -210,10 +492,11 @@ class ThoroughDiagnosticTool:
                             )
                             break
             elif self.platform == "Darwin":
-                result = subprocess.run(['sysctl', 'hw.memsize'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    mem_bytes = int(result.stdout.split()[1])
+                probe = self.probes.get("System Memory")
+                if probe.error:
+                    raise RuntimeError(f"sysctl {probe.error}")
+                if probe.ok:
+                    mem_bytes = int(probe.stdout.split()[1])
                     mem_gb = mem_bytes / (1024**3)
                     status = "OK" if mem_gb >= 4 else "WARNING"
                     rec = "At least 4GB RAM recommended for LLM inference" if status == "WARNING" else None
@@ -323,14 +606,13 @@ class ThoroughDiagnosticTool:
         for name, dir_path in required_dirs:
             full_path = self.repo_root / dir_path
             if full_path.exists() and full_path.is_dir():
-                file_count = sum(1 for _ in full_path.rglob('*') if _.is_file())
-                dir_size = sum(f.stat().st_size for f in full_path.rglob('*') if f.is_file())
-                size_mb = dir_size / (1024 * 1024)
+                tree = self.tree.stats(full_path)
+                size_mb = tree.total_bytes / (1024 * 1024)
                 
                 self.add_result(
                     name,
                     "OK",
-                    f"Found ({file_count} files, {size_mb:.1f} MB)",
+                    f"Found ({tree.file_count} files, {size_mb:.1f} MB)",
                     f"Path: {full_path}",
                     category=category
                 )
@@ -351,8 +633,8 @@ class ThoroughDiagnosticTool:
             ("CMake Files", "app/CMakeLists.txt"),
         ]
         
+        from glob import glob
         for name, pattern in source_patterns:
-            from glob import glob
             files = glob(str(self.repo_root / pattern), recursive=True)
             if files:
                 self.add_result(
@@ -407,81 +689,63 @@ class ThoroughDiagnosticTool:
                     )
         else:
             # Check Qt via pkg-config
-            try:
-                result = subprocess.run(
-                    ["pkg-config", "--modversion", "Qt6Widgets"],
-                    capture_output=True, text=True, timeout=5
-                )
-                if result.returncode == 0:
-                    version = result.stdout.strip()
-                    status = "OK" if version >= "6.5" else "WARNING"
-                    rec = "Qt 6.5+ recommended" if status == "WARNING" else None
-                    self.add_result(
-                        "Qt6 Framework",
-                        status,
-                        f"Version {version}",
-                        recommendation=rec,
-                        category=category
-                    )
-                else:
-                    self.add_result(
-                        "Qt6 Framework",
-                        "WARNING",
-                        "Not found via pkg-config",
-                        "May still be available via system paths",
-                        category=category
-                    )
-            except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+            probe = self.probes.get("Qt6 Framework")
+            if probe.error:
                 self.add_result(
                     "Qt6 Framework",
                     "WARNING",
                     "Could not verify",
-                    str(e),
+                    f"pkg-config {probe.error}",
+                    category=category
+                )
+            elif probe.ok:
+                version = probe.stdout.strip()
+                status = "OK" if version >= "6.5" else "WARNING"
+                rec = "Qt 6.5+ recommended" if status == "WARNING" else None
+                self.add_result(
+                    "Qt6 Framework",
+                    status,
+                    f"Version {version}",
+                    recommendation=rec,
+                    category=category
+                )
+            else:
+                self.add_result(
+                    "Qt6 Framework",
+                    "WARNING",
+                    "Not found via pkg-config",
+                    "May still be available via system paths",
                     category=category
                 )
         
         # Check system libraries
-        system_libs = []
-        if self.platform == "Linux":
-            system_libs = [
-                ("libcurl", "curl --version"),
-                ("SQLite3", "sqlite3 --version"),
-            ]
-        elif self.platform == "Darwin":
-            system_libs = [
-                ("libcurl", "curl --version"),
-                ("SQLite3", "sqlite3 --version"),
-            ]
-        
-        for lib_name, check_cmd in system_libs:
-            try:
-                result = subprocess.run(
-                    check_cmd.split(),
-                    capture_output=True, text=True, timeout=5
+        for lib_name in ("libcurl", "SQLite3"):
+            if lib_name not in self.probes.probes:
+                continue
+            probe = self.probes.get(lib_name)
+            if probe.ok:
+                version = probe.stdout.split('\n')[0]
+                self.add_result(
+                    f"Library: {lib_name}",
+                    "OK",
+                    "Available",
+                    f"Version: {version}",
+                    category=category
                 )
-                if result.returncode == 0:
-                    version = result.stdout.split('\n')[0]
-                    self.add_result(
-                        f"Library: {lib_name}",
-                        "OK",
-                        "Available",
-                        f"Version: {version}",
-                        category=category
-                    )
-                else:
-                    self.add_result(
-                        f"Library: {lib_name}",
-                        "WARNING",
-                        "Not found",
-                        category=category
-                    )
-            except (subprocess.TimeoutExpired, FileNotFoundError):
+            elif probe.error:
                 self.add_result(
                     f"Library: {lib_name}",
                     "WARNING",
                     "Could not verify",
                     category=category
                 )
+            else:
+                self.add_result(
+                    f"Library: {lib_name}",
+                    "WARNING",
+                    "Not found",
+                    category=category
+                )
     
     # ==================== LLM Backends ====================
     
@@ -502,17 +766,18 @@ class ThoroughDiagnosticTool:
             variant_path = ggml_base / variant
             if variant_path.exists():
                 # Count library files
+                tree = self.tree.stats(variant_path)
                 if self.platform == "Windows":
-                    libs = list(variant_path.glob("*.dll"))
+                    lib_count, lib_bytes = tree.direct_files(".dll")
                 else:
-                    libs = list(variant_path.glob("*.so")) + list(variant_path.glob("*.dylib"))
+                    lib_count, lib_bytes = tree.direct_files(".so", ".dylib")
                 
-                total_size = sum(f.stat().st_size for f in libs) / (1024 * 1024)
+                total_size = lib_bytes / (1024 * 1024)
                 
                 self.add_result(
                     f"Backend: {info['name']}",
                     "OK",
-                    f"Available ({len(libs)} libraries, {total_size:.1f} MB)",
+                    f"Available ({lib_count} libraries, {total_size:.1f} MB)",
                     f"Path: {variant_path}",
                     category=category
                 )
@@ -533,11 +798,10 @@ class ThoroughDiagnosticTool:
         # Check precompiled libraries
         precompiled_dir = self.repo_root / "app" / "lib" / "precompiled"
         if precompiled_dir.exists():
-            precompiled_variants = [d.name for d in precompiled_dir.iterdir() if d.is_dir()]
+            precompiled_variants = self.tree.stats(precompiled_dir).subdirs
             total_size = sum(
-                f.stat().st_size 
-                for d in precompiled_dir.iterdir() if d.is_dir()
-                for f in d.rglob('*') if f.is_file()
+                self.tree.stats(precompiled_dir / d).total_bytes
+                for d in precompiled_variants
             ) / (1024 * 1024)
             
             self.add_result(
@@ -597,8 +861,8 @@ class ThoroughDiagnosticTool:
         self.section_header("Database & Data Storage")
         category = "Database"
         
-        # Find database file
-        db_path = self.data_dir / "aifilesorter.db"
+        # Find database file (the app's location, honouring CATEGORIZATION_CACHE_FILE)
+        db_path = self.db_path
         
         if not db_path.exists():
             self.add_result(
@@ -632,98 +896,25 @@ class ThoroughDiagnosticTool:
             )
             return
         
-        # Check database integrity
+        # Heavy analyses run on a consistent snapshot when one was requested
+        self.database_timings = {}
+        self._database_step("journal", self.check_journal_mode, db_path, category)
+        db_path = self._database_step("snapshot", self.take_database_snapshot, db_path, category)
+        self._database_step("integrity", self.check_database_integrity, db_path, category)
+        
+        import sqlite3
+        from diagnostic_lib.dbutil import connect_readonly
         try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Integrity check
-                try:
-                    cursor.execute("PRAGMA integrity_check")
-                    integrity = cursor.fetchone()[0]
-                    if integrity == "ok":
-                        self.add_result(
-                            "Database Integrity",
-                            "OK",
-                            "Passed integrity check",
-                            category=category
-                        )
-                    else:
-                        self.add_result(
-                            "Database Integrity",
-                            "FAIL",
-                            "Integrity check failed",
-                            integrity,
-                            recommendation="Database may be corrupted. Consider backup and repair.",
-                            category=category
-                        )
-                except sqlite3.Error as e:
-                    self.add_result(
-                        "Database Integrity",
-                        "FAIL",
-                        f"Error checking integrity: {str(e)}",
-                        category=category
-                    )
-            
-            # Check tables
+            conn = connect_readonly(db_path)
             try:
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
-                
-                expected_tables = [
-                    "categorization_cache",
-                    "taxonomy",
-                    "confidence_scores",
-                    "content_analysis_cache",
-                    "api_usage_tracking",
-                    "user_profiles",
-                    "user_corrections",
-                    "categorization_sessions",
-                    "undo_history",
-                    "file_tinder_state",
-                    "whitelists",
-                    "folder_learning_config"
-                ]
-                
-                found_tables = [t for t in expected_tables if t in tables]
-                missing_tables = [t for t in expected_tables if t not in tables]
-                
-                if len(found_tables) == len(expected_tables):
-                    self.add_result(
-                        "Database Schema",
-                        "OK",
-                        f"All {len(expected_tables)} required tables present",
-                        f"Tables: {', '.join(found_tables)}",
-                        category=category
-                    )
-                else:
-                    self.add_result(
-                        "Database Schema",
-                        "WARNING",
-                        f"Found {len(found_tables)}/{len(expected_tables)} tables",
-                        f"Missing: {', '.join(missing_tables)}",
-                        recommendation="Tables will be created on first use",
-                        category=category
-                    )
-                
-                # Check table statistics
-                stats = {}
-                for table in found_tables:
-                    try:
-                        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                        count = cursor.fetchone()[0]
-                        stats[table] = count
-                    except sqlite3.Error:
-                        stats[table] = "N/A"
-                
-                stats_str = "\n".join([f"{k}: {v} rows" for k, v in stats.items()])
-                self.add_result(
-                    "Database Statistics",
-                    "INFO",
-                    f"{len(stats)} tables analyzed",
-                    stats_str,
-                    category=category
-                )
+                self._database_step("schema_drift", self.check_schema_drift, conn, category)
+                self._database_step("table_statistics", self.report_table_statistics, conn, category)
+                self._database_step("maintenance", self.analyze_database_maintenance, conn, db_path, category)
+                self._database_step("orphans", self.check_referential_consistency, conn, category)
+                self._database_step("content_cache", self.check_content_cache, conn, category)
+                self._database_step("api_usage", self.analyze_api_usage, conn, category)
+                if self.hit_rate_folder:
+                    self._database_step("cache_hit_rate", self.estimate_cache_hit_rate, conn, category)
                 
             except sqlite3.Error as e:
                 self.add_result(
@@ -732,13 +923,811 @@ class ThoroughDiagnosticTool:
                     f"Error querying schema: {str(e)}",
                     category=category
                 )
+            finally:
+                conn.close()
             
         except sqlite3.Error as e:
             self.add_result(
-                "Database Connection",
-                "FAIL",
-                f"Cannot connect: {str(e)}",
-                f"Database at {db_path}",
+                "Database Connection",
+                "FAIL",
+                f"Cannot connect: {str(e)}",
+                f"Database at {db_path}",
+                category=category
+            )
+            return
+        
+        self._database_step("query_plans", self.analyze_query_plans, db_path, category)
+    
+    def check_journal_mode(self, db_path: Path, category: str):
+        """journal_mode, wal_autocheckpoint and journal files of the live database"""
+        import sqlite3
+        from diagnostic_lib.contention import journal_state
+        try:
+            state = journal_state(db_path)
+        except sqlite3.Error as e:
+            self.add_result(
+                "Journal Mode",
+                "WARNING",
+                f"Could not read: {str(e)}",
+                category=category
+            )
+            return
+        self.journal = state
+        
+        mode = state["journal_mode"]
+        details = [f"wal_autocheckpoint: {state['wal_autocheckpoint']} pages "
+                   f"({state['wal_autocheckpoint'] * state['page_size'] / (1024 * 1024):.1f} MB)",
+                   f"Busy timeout set by the app: {state['app_busy_timeout_ms']} ms"]
+        status, recommendation = "OK", None
+        if mode == "wal":
+            wal_mb = (state["wal_bytes"] or 0) / (1024 * 1024)
+            message = f"WAL, {wal_mb:.1f} MB log"
+            index = state["wal_index"]
+            if index:
+                pending_mb = state["pending_checkpoint_bytes"] / (1024 * 1024)
+                details.append(f"WAL index: {index['frames']:,} frames, {index['checkpointed']:,} checkpointed "
+                               f"({pending_mb:.1f} MB pending)")
+                if index["pending"] > 10 * max(1, state["wal_autocheckpoint"]):
+                    status = "WARNING"
+                    message += f", {pending_mb:.1f} MB not checkpointed"
+                    recommendation = ("Checkpoints are not keeping up - a long-lived reader may be pinning "
+                                      "the WAL; run with --contention to measure")
+        else:
+            message = f"{mode} (rollback journal)"
+            details.append("Readers and the writer block each other; with no busy timeout a blocked "
+                           "statement fails immediately")
+            if state["journal_bytes"]:
+                status = "WARNING"
+                message += f", -journal file present ({state['journal_bytes']:,} bytes)"
+                recommendation = ("A leftover journal is rolled back on the next open; if the app is not "
+                                  "running, it was interrupted mid-transaction")
+        if status == "OK" and not self.contention:
+            details.append("Run with --contention to measure reader/writer lock contention")
+        self.add_result(
+            "Journal Mode",
+            status,
+            message,
+            "\n".join(details),
+            recommendation=recommendation,
+            category=category
+        )
+    
+    def _database_step(self, name: str, func, *args):
+        """Run one database analysis and record its wall time (report: database_timings)"""
+        timer = CheckTimer()
+        try:
+            with timer:
+                return func(*args)
+        finally:
+            self.database_timings[name] = round(timer.wall_ms, 1)
+    
+    def take_database_snapshot(self, db_path: Path, category: str) -> Path:
+        """Snapshot the live database with the backup API; returns the path to analyze"""
+        self.discard_database_snapshot()
+        if not self.use_snapshot:
+            return db_path
+        import sqlite3
+        import tempfile
+        from diagnostic_lib.snapshot import SnapshotTimeout, backup_database
+        self._snapshot_tmp = tempfile.mkdtemp(prefix="aifs-snapshot-")
+        target = Path(self._snapshot_tmp) / db_path.name
+        try:
+            info = backup_database(db_path, target, time_budget=SNAPSHOT_BUDGET_SECONDS)
+        except (SnapshotTimeout, sqlite3.Error, OSError) as e:
+            self.discard_database_snapshot()
+            self.add_result(
+                "Database Snapshot",
+                "WARNING",
+                "Could not take a snapshot; analyzing the live file read-only",
+                str(e),
+                recommendation="The app may be writing continuously; retry when it is idle",
+                category=category
+            )
+            return db_path
+        self.db_snapshot = target
+        self.snapshot_info = info.to_dict()
+        self.add_result(
+            "Database Snapshot",
+            "OK",
+            f"Copied {info.bytes / (1024 * 1024):.2f} MB in {info.elapsed_s:.2f}s",
+            f"{info.pages:,} pages in {info.steps} steps, {info.restarts} restart(s) "
+            f"caused by concurrent writes",
+            category=category
+        )
+        
+        if self.snapshot_store is not None:
+            try:
+                saved = self.snapshot_store.save(target)
+            except OSError as e:
+                self.add_result(
+                    "Saved Snapshot",
+                    "WARNING",
+                    f"Could not save snapshot: {str(e)}",
+                    category=category
+                )
+            else:
+                self.snapshot_info["saved"] = saved.path
+                self.add_result(
+                    "Saved Snapshot",
+                    "OK",
+                    f"{saved.compressed_bytes / (1024 * 1024):.2f} MB compressed",
+                    f"Path: {saved.path}\nKeeping the newest {self.snapshot_store.keep} "
+                    f"in {self.snapshot_store.directory}",
+                    category=category
+                )
+        return target
+    
+    def discard_database_snapshot(self):
+        """Delete the working snapshot of this run, if any"""
+        if self._snapshot_tmp is not None:
+            import shutil
+            shutil.rmtree(self._snapshot_tmp, ignore_errors=True)
+        self._snapshot_tmp = None
+        self.db_snapshot = None
+    
+    def check_database_integrity(self, db_path: Path, category: str):
+        """Run the selected integrity tier read-only, under a time budget"""
+        from diagnostic_lib.integrity import check_integrity
+        capture = getattr(self._local, "capture", None)
+        
+        def progress(elapsed: float) -> bool:
+            self.progress(f"    … {self.integrity_mode} integrity check running ({elapsed:.0f}s)")
+            return capture is not None and capture.cancel_event.is_set()
+        
+        report = check_integrity(
+            db_path,
+            mode=self.integrity_mode,
+            time_budget=self.integrity_budget,
+            snapshot=self.integrity_snapshot and self.db_snapshot is None,
+            progress=progress
+        )
+        self.integrity = report.to_dict()
+        
+        label = {"quick": "quick_check", "bounded": "integrity_check (bounded)",
+                 "full": "full integrity_check"}[report.mode]
+        source = " on a snapshot" if report.snapshot_s is not None or self.db_snapshot else ""
+        if report.ok:
+            self.add_result(
+                "Database Integrity",
+                "OK",
+                f"Passed {label}{source} ({report.elapsed_s:.2f}s)",
+                None if report.mode == "full" else "Use --integrity full for the complete check",
+                category=category
+            )
+        elif report.ok is False:
+            self.add_result(
+                "Database Integrity",
+                "FAIL",
+                f"{label} found {len(report.problems)} problem(s)",
+                "\n".join(report.problems[:20]),
+                recommendation="Database may be corrupted. Consider backup and repair.",
+                category=category
+            )
+        elif report.interrupted:
+            self.add_result(
+                "Database Integrity",
+                "WARNING",
+                f"{label} stopped after {report.elapsed_s:.1f}s ({report.interrupted})",
+                f"Budget: {self.integrity_budget}s",
+                recommendation="Re-run with a larger --integrity-budget (0 = unlimited), "
+                               "ideally with --integrity-snapshot",
+                category=category
+            )
+        else:
+            self.add_result(
+                "Database Integrity",
+                "FAIL",
+                f"Error checking integrity: {report.error}",
+                recommendation="Database may be corrupted. Consider backup and repair.",
+                category=category
+            )
+    
+    def report_table_statistics(self, conn, category: str):
+        """Approximate rows and on-disk bytes per table and index (exact counts opt-in)"""
+        import sqlite3
+        from diagnostic_lib.tablestats import table_statistics
+        try:
+            tables, meta = table_statistics(conn, exact=self.exact_counts)
+        except sqlite3.Error as e:
+            self.add_result(
+                "Database Statistics",
+                "WARNING",
+                f"Could not collect statistics: {str(e)}",
+                category=category
+            )
+            return
+        self.table_statistics = {"metadata": meta, "tables": [t.to_dict() for t in tables]}
+        
+        mb = 1024 * 1024
+        lines = []
+        for t in tables:
+            rows = "? rows" if t.rows is None else (
+                f"{t.rows:,} rows" if t.rows_source == "exact" else f"~{t.rows:,} rows")
+            if t.table_bytes is None:
+                lines.append(f"{t.name}: {rows}")
+                continue
+            line = f"{t.name}: {rows}, {t.table_bytes / mb:.2f} MB"
+            if t.index_bytes:
+                line += f" + {sum(t.index_bytes.values()) / mb:.2f} MB in {len(t.index_bytes)} index(es)"
+            lines.append(line)
+        lines.append(f"File: {meta['database_bytes'] / mb:.2f} MB "
+                     f"({meta['page_count']:,} pages of {meta['page_size']} bytes, "
+                     f"{meta['free_bytes'] / mb:.2f} MB free)")
+        
+        if meta["sizes_source"] == "dbstat":
+            data_bytes = sum(t.table_bytes or 0 for t in tables)
+            index_bytes = sum(sum(t.index_bytes.values()) for t in tables)
+            message = (f"{len(tables)} tables: {data_bytes / mb:.2f} MB data, "
+                       f"{index_bytes / mb:.2f} MB indexes")
+        else:
+            reason = "dbstat not available" if meta["sizes_source"] == "unavailable" else "dbstat timed out"
+            message = f"{len(tables)} tables analyzed (per-table sizes unavailable: {reason})"
+        if not self.exact_counts:
+            lines.append("Row counts are estimates; use --exact-counts for COUNT(*)")
+        self.add_result(
+            "Database Statistics",
+            "INFO",
+            message,
+            "\n".join(lines),
+            category=category
+        )
+    
+    def analyze_database_maintenance(self, conn, db_path: Path, category: str):
+        """Free pages, fragmentation and what VACUUM / ANALYZE would buy"""
+        import sqlite3
+        from diagnostic_lib.fragmentation import (
+            MAINTENANCE_SQL, analyze_fragmentation, measure_maintenance, recommended_actions
+        )
+        try:
+            report = analyze_fragmentation(conn)
+        except sqlite3.Error as e:
+            self.add_result(
+                "Database Fragmentation",
+                "WARNING",
+                f"Could not analyze: {str(e)}",
+                category=category
+            )
+            return
+        actions = recommended_actions(report)
+        self.maintenance = {"analysis": report, "recommended": actions, "measurement": None}
+        
+        mb = 1024 * 1024
+        vacuum = report["vacuum"]
+        ratio = vacuum["reclaimable_bytes"] / report["database_bytes"] if report["database_bytes"] else 0.0
+        lines = [f"Free pages: {report['freelist_count']:,} ({report['free_bytes'] / mb:.2f} MB), "
+                 f"auto_vacuum: {report['auto_vacuum']}"]
+        for t in vacuum["tables"]:
+            line = f"{t['table']}: {t['pages']:,} pages, {t['fragmentation']:.0%} of leaf steps non-sequential"
+            if t["scan_pages_saved"] > 0:
+                line += f"; a full scan would read {t['scan_pages_saved']:.0%} fewer pages after VACUUM"
+            lines.append(line)
+        if vacuum["estimated_from"] == "freelist":
+            lines.append("dbstat unavailable: only free pages are counted as reclaimable")
+        self.add_result(
+            "Database Fragmentation",
+            "WARNING" if "vacuum" in actions else "OK",
+            f"~{vacuum['reclaimable_bytes'] / mb:.2f} MB of {report['database_bytes'] / mb:.2f} MB "
+            f"reclaimable by VACUUM ({ratio:.0%})",
+            "\n".join(lines),
+            recommendation=(
+                "With the app closed use Cache Manager > Optimize Database (VACUUM); while it runs, "
+                f"VACUUM INTO a new file (needs ~{vacuum['bytes_after'] / mb:.0f} MB free) and swap it in later"
+            ) if "vacuum" in actions else None,
+            category=category
+        )
+        
+        stats = report["statistics"]
+        if stats["stale"]:
+            self.add_result(
+                "Planner Statistics",
+                "WARNING",
+                f"sqlite_stat1 is stale for {len(stats['stale'])} table(s)",
+                f"Stale: {', '.join(stats['stale'])}",
+                recommendation="Run PRAGMA optimize so the planner sees the current table sizes",
+                category=category
+            )
+        elif stats["missing"]:
+            self.add_result(
+                "Planner Statistics",
+                "INFO",
+                f"No statistics for {len(stats['missing'])} indexed table(s); the planner uses defaults",
+                f"Tables: {', '.join(stats['missing'])}\n"
+                f"{'PRAGMA optimize' if stats['present'] else 'ANALYZE'} would record them",
+                category=category
+            )
+        else:
+            self.add_result(
+                "Planner Statistics",
+                "OK",
+                "sqlite_stat1 is present and current" if stats["indexed_tables"] else "No indexed data yet",
+                category=category
+            )
+        
+        if not self.measure_maintenance:
+            return
+        if not actions:
+            self.add_result(
+                "Maintenance Measurement",
+                "SKIP",
+                "No maintenance action is recommended",
+                category=category
+            )
+            return
+        scan_tables = [t["table"] for t in vacuum["tables"][:3]]
+        try:
+            measured = measure_maintenance(db_path, actions, scan_tables)
+        except (sqlite3.Error, OSError) as e:
+            self.add_result(
+                "Maintenance Measurement",
+                "WARNING",
+                f"Could not measure: {str(e)}",
+                category=category
+            )
+            return
+        self.maintenance["measurement"] = measured
+        before, after = measured["before"], measured["after"]
+        lines = [f"{MAINTENANCE_SQL[a]}: {measured['action_seconds'][a]:.2f}s" for a in actions]
+        for table in scan_tables:
+            lines.append(f"Full scan of {table}: {before['scan_ms'][table]:.1f} -> "
+                         f"{after['scan_ms'][table]:.1f} ms")
+        for b, a in zip(before["query_classes"], after["query_classes"]):
+            if b["error"] or a["error"]:
+                continue
+            lines.append(f"{b['query_class']}: p50 {b['p50_ms']:.3f} -> {a['p50_ms']:.3f} ms, "
+                         f"p95 {b['p95_ms']:.3f} -> {a['p95_ms']:.3f} ms")
+        self.add_result(
+            "Maintenance Measurement",
+            "INFO",
+            f"{' + '.join(MAINTENANCE_SQL[a] for a in actions)} on a snapshot: "
+            f"{before['bytes'] / mb:.2f} -> {after['bytes'] / mb:.2f} MB",
+            "\n".join(lines),
+            category=category
+        )
+    
+    def check_schema_drift(self, conn, category: str):
+        """Compare the database with the schema manifest generated from DatabaseManager.cpp"""
+        from diagnostic_lib.schema import detect_drift, manifest_is_current
+        from diagnostic_lib.schema_manifest import TABLES
+        drift = detect_drift(conn)
+        self.schema_drift = drift.to_dict()
+        
+        lines = []
+        if drift.missing_tables:
+            lines.append(f"Missing tables: {', '.join(drift.missing_tables)}")
+        if drift.missing_columns:
+            lines.append(f"Missing columns: {', '.join(drift.missing_columns)}")
+        if drift.missing_unique:
+            lines.append(f"Missing UNIQUE constraints: {', '.join(drift.missing_unique)}")
+        lines += [f"Column differs: {m}" for m in drift.column_mismatches]
+        lines += [f"Missing constraint: {c}" for c in drift.missing_checks]
+        if drift.missing_indexes:
+            # Reported with their query cost under "Missing Indexes"
+            lines.append(f"Missing indexes: {', '.join(drift.missing_indexes)} (see Missing Indexes)")
+        if drift.extra_tables:
+            lines.append(f"Not created by this version: {', '.join(drift.extra_tables)}")
+        if not manifest_is_current(self.repo_root):
+            lines.append("Note: schema_manifest.py is older than app/lib/DatabaseManager.cpp; "
+                         "regenerate it with python3 -m diagnostic_lib.schema --generate")
+        
+        present = len(TABLES) - len(drift.missing_tables)
+        if drift.has_errors:
+            self.add_result(
+                "Database Schema",
+                "FAIL",
+                "Schema is missing columns or constraints the app writes to",
+                "\n".join(lines),
+                recommendation="Start AI File Sorter once to migrate the database, or restore a backup",
+                category=category
+            )
+        elif drift.missing_tables or drift.column_mismatches or drift.missing_checks:
+            self.add_result(
+                "Database Schema",
+                "WARNING",
+                f"{present}/{len(TABLES)} tables present, schema differs from DatabaseManager.cpp",
+                "\n".join(lines),
+                recommendation="Missing tables are created on the next start of the app",
+                category=category
+            )
+        else:
+            self.add_result(
+                "Database Schema",
+                "OK",
+                f"All {len(TABLES)} tables match DatabaseManager.cpp",
+                "\n".join(lines) or None,
+                category=category
+            )
+    
+    def check_referential_consistency(self, conn, category: str):
+        """Rows whose parent row is gone (foreign keys are not enforced by the app)"""
+        import sqlite3
+        from diagnostic_lib.orphans import cleanup_script, scan_orphans
+        try:
+            findings = scan_orphans(conn)
+        except sqlite3.Error as e:
+            self.add_result(
+                "Referential Consistency",
+                "WARNING",
+                f"Could not scan for orphans: {str(e)}",
+                category=category
+            )
+            return
+        self.orphans = [f.to_dict() for f in findings]
+        
+        dangling = [f for f in findings if f.orphans]
+        lines = []
+        for f in findings:
+            if f.skipped:
+                lines.append(f"{f.relationship.name}: not checked ({f.skipped})")
+            elif f.orphans:
+                samples = "; ".join(", ".join(str(v) for v in key) for key in f.samples)
+                lines.append(f"{f.relationship.name}: {f.orphans:,} orphan(s), e.g. {samples}")
+        
+        script_note = None
+        if dangling and self.orphan_script:
+            try:
+                with open(self.orphan_script, "w", encoding="utf-8") as fh:
+                    fh.write(cleanup_script(findings, str(self.db_path), self.orphan_script))
+                script_note = f"Cleanup script written to {self.orphan_script}"
+            except OSError as e:
+                script_note = f"Could not write cleanup script: {e}"
+            lines.append(script_note)
+        
+        checked = sum(1 for f in findings if not f.skipped)
+        if dangling:
+            total = sum(f.orphans for f in dangling)
+            self.add_result(
+                "Referential Consistency",
+                "WARNING",
+                f"{total:,} orphaned row(s) in {len(dangling)} of {checked} relationships",
+                "\n".join(lines),
+                recommendation=(f"Close the app, back up the database, review and run {self.orphan_script}"
+                                if self.orphan_script and script_note.startswith("Cleanup")
+                                else "Re-run with --orphan-script FILE to generate a cleanup script"),
+                category=category
+            )
+        else:
+            self.add_result(
+                "Referential Consistency",
+                "OK",
+                f"No orphaned rows in {checked} relationships",
+                "\n".join(lines) or None,
+                category=category
+            )
+    
+    def check_content_cache(self, conn, category: str):
+        """content_analysis_cache entries whose file is gone or has changed since it was analyzed"""
+        import json
+        import sqlite3
+        from diagnostic_lib.contentcache import CURRENT, MISSING, STALE, UNCHANGED, UNVERIFIED, \
+            CacheScan, scan_content_cache
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                        "AND name = 'content_analysis_cache'").fetchone() is None:
+            return
+        
+        # A pass that ran out of budget is continued on the next run
+        cursor_path = self.state_dir / "content_cache_scan.json"
+        scan = None
+        try:
+            with open(cursor_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("database") == str(self.db_path):
+                scan = CacheScan.from_dict(saved["scan"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        resumed = scan is not None
+        capture = getattr(self._local, "capture", None)
+        try:
+            scan = scan_content_cache(
+                conn, scan,
+                time_budget=self.cache_scan_budget,
+                cancelled=lambda: capture is not None and capture.cancel_event.is_set()
+            )
+        except sqlite3.Error as e:
+            self.add_result(
+                "Content Analysis Cache",
+                "WARNING",
+                f"Could not scan: {str(e)}",
+                category=category
+            )
+            return
+        self.content_cache = scan.to_dict()
+        try:
+            if scan.complete:
+                cursor_path.unlink(missing_ok=True)
+            else:
+                cursor_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(cursor_path, "w", encoding="utf-8") as f:
+                    json.dump({"database": str(self.db_path), "scan": scan.to_dict()}, f)
+        except OSError:
+            pass
+        
+        if not scan.rows:
+            self.add_result(
+                "Content Analysis Cache",
+                "INFO",
+                "Empty",
+                category=category
+            )
+            return
+        
+        counts = scan.counts
+        coverage = "" if scan.complete else f" (first {scan.rows:,} entries, continued next run)"
+        details = [
+            f"Examined {scan.rows:,} entries{' over several runs' if resumed else ''} "
+            f"in {scan.elapsed_s:.1f}s; re-hashed {scan.rehashed:,} "
+            f"({scan.hashed_bytes / (1024 * 1024):.1f} MB)",
+            f"Current: {counts[CURRENT] + counts[UNCHANGED]:,} "
+            f"({counts[UNCHANGED]:,} modified on disk but same content)",
+            f"Changed content: {counts[STALE]:,}",
+            f"File missing: {counts[MISSING]:,}",
+        ]
+        if counts[UNVERIFIED]:
+            details.append(f"Not verifiable (relative path, unreadable or unknown hash): {counts[UNVERIFIED]:,}")
+        for label, state in (("Changed", STALE), ("Missing", MISSING)):
+            if scan.samples[state]:
+                details.append(f"{label}, e.g.: {', '.join(scan.samples[state][:3])}")
+        details.append(f"Reclaimable: ~{scan.reclaimable_bytes / 1024:.0f} KB of rows and index entries")
+        
+        message = (f"{scan.stale_ratio * 100:.1f}% stale or missing "
+                   f"({counts[STALE] + counts[MISSING]:,} of {scan.rows:,}){coverage}")
+        if counts[STALE] or scan.stale_ratio >= 0.1:
+            self.add_result(
+                "Content Analysis Cache",
+                "WARNING",
+                message,
+                "\n".join(details),
+                recommendation="The app neither refreshes nor removes these entries; they are a cache, "
+                               "so deleting them is safe (the JSON report lists samples under content_cache)",
+                category=category
+            )
+        else:
+            self.add_result(
+                "Content Analysis Cache",
+                "OK",
+                message,
+                "\n".join(details),
+                category=category
+            )
+    
+    def analyze_api_usage(self, conn, category: str):
+        """api_usage_tracking: usage per provider, efficiency regressions and today's quota"""
+        import sqlite3
+        from diagnostic_lib.apiusage import BASELINE_DAYS, QUOTA_WARNING_RATIO, RECENT_DAYS, analyze_api_usage
+        try:
+            analysis = analyze_api_usage(conn)
+        except sqlite3.OperationalError as e:  # Older database without the table
+            self.add_result(
+                "API Usage",
+                "INFO",
+                f"Not available: {str(e)}",
+                category=category
+            )
+            return
+        self.api_usage = analysis
+        providers = analysis["providers"]
+        if not providers:
+            self.add_result(
+                "API Usage",
+                "INFO",
+                "No remote API usage recorded",
+                category=category
+            )
+            return
+        
+        lines = []
+        for name, p in sorted(providers.items()):
+            tpr = f", {p['tokens_per_request']:,.0f} tokens/request" if p["tokens_per_request"] else ""
+            lines.append(f"{name}: {p['requests']:,} requests over {p['days']} day(s) "
+                         f"({p['first_day']} to {p['last_day']}), ${p['cost']:.2f}{tpr}")
+            recent = p["recent"]
+            if recent and recent["requests"]:
+                per_files = (f", ${recent['cost_per_1k_files']:.2f} per 1,000 files categorized"
+                             if recent["cost_per_1k_files"] is not None else "")
+                lines.append(f"  last {RECENT_DAYS} days: {recent['requests']:,} requests, "
+                             f"${recent['cost']:.2f}{per_files}")
+        total = sum(p["requests"] for p in providers.values())
+        self.add_result(
+            "API Usage",
+            "INFO",
+            f"{total:,} requests to {len(providers)} provider(s)",
+            "\n".join(lines),
+            category=category
+        )
+        
+        regressions = [f"{name}: {r}" for name, p in sorted(providers.items()) for r in p["regressions"]]
+        if regressions:
+            self.add_result(
+                "API Efficiency",
+                "WARNING",
+                f"{len(regressions)} metric(s) worse in the last {RECENT_DAYS} days "
+                f"than in the {BASELINE_DAYS} days before",
+                "\n".join(regressions),
+                recommendation="More tokens per request points at longer prompts (whitelists, user context, "
+                               "consistency hints); more requests per file points at retries or a colder cache",
+                category=category
+            )
+        elif any(p["baseline"] and p["baseline"]["requests"] for p in providers.values()):
+            self.add_result(
+                "API Efficiency",
+                "OK",
+                f"No regression in the last {RECENT_DAYS} days",
+                category=category
+            )
+        
+        for name, p in sorted(providers.items()):
+            quota = p["quota"]
+            if quota is None:
+                continue
+            source = "" if quota["limit_source"] == "database" else " (free tier default)"
+            details = (f"Today: {quota['used_today']:,} of {quota['daily_limit']:,}{source}, "
+                       f"{quota['requests_per_hour']:,.0f} requests/hour; busiest day: "
+                       f"{quota['busiest_day_requests']:,} requests")
+            if quota["exhausted_at_utc"]:
+                self.add_result(
+                    f"API Quota ({name})",
+                    "WARNING",
+                    f"Daily limit reached at {quota['exhausted_at_utc']} UTC at the current rate",
+                    details,
+                    recommendation="Sort large folders across several days or switch to a local model",
+                    category=category
+                )
+            elif quota["busiest_day_share"] >= QUOTA_WARNING_RATIO:
+                self.add_result(
+                    f"API Quota ({name})",
+                    "WARNING",
+                    f"Busiest day used {quota['busiest_day_share'] * 100:.0f}% of the daily limit",
+                    details,
+                    category=category
+                )
+            else:
+                self.add_result(
+                    f"API Quota ({name})",
+                    "OK",
+                    f"{quota['remaining_today']:,} requests left today",
+                    details,
+                    category=category
+                )
+    
+    def estimate_cache_hit_rate(self, conn, category: str):
+        """How much of --hit-rate FOLDER the categorization cache answers without an LLM call"""
+        import sqlite3
+        from diagnostic_lib.apppaths import read_app_settings, setting_enabled
+        from diagnostic_lib.hitrate import RATE_WINDOW_DAYS, estimate_hit_rate, list_folder
+        folder = self.hit_rate_folder
+        settings = read_app_settings()
+        files = setting_enabled(settings, "CategorizeFiles", True)
+        directories = setting_enabled(settings, "CategorizeDirectories", False)
+        try:
+            entries = list_folder(folder, files=files, directories=directories)
+            estimate = estimate_hit_rate(conn, folder, entries, settings.get("LLMChoice"))
+        except OSError as e:
+            self.add_result(
+                "Cache Hit Rate",
+                "WARNING",
+                f"Cannot list {folder}: {str(e)}",
+                category=category
+            )
+            return
+        except sqlite3.Error as e:
+            self.add_result(
+                "Cache Hit Rate",
+                "WARNING",
+                f"Could not query the cache: {str(e)}",
+                category=category
+            )
+            return
+        self.cache_hit_rate = estimate
+        
+        kinds = " and ".join(k for k, on in (("files", files), ("directories", directories)) if on) or "nothing"
+        if not estimate["entries"]:
+            self.add_result(
+                "Cache Hit Rate",
+                "INFO",
+                f"No {kinds} to sort in {folder}",
+                category=category
+            )
+            return
+        
+        calls = estimate["llm_calls"]
+        details = [
+            f"Entries: {estimate['entries']:,} ({kinds}, as configured)",
+            f"Cached for this folder: {estimate['folder_cache_hits']:,}",
+            f"Cached by name from other folders: {estimate['name_cache_hits']:,}",
+            f"Need an LLM call: {calls:,}",
+            f"Estimated LLM time: ~{estimate['estimated_seconds'] / 60:.1f} min "
+            f"at {estimate['seconds_per_call']:g}s per call ({estimate['provider']})",
+        ]
+        rates = estimate["rates"]
+        if estimate["provider"] == "local":
+            details.append("Estimated cost: none (local model)")
+        elif rates:
+            details.append(f"Estimated cost: ${estimate['estimated_cost']:.2f} "
+                           f"(~{estimate['estimated_tokens']:,} tokens; ${rates['cost_per_request']:.5f} and "
+                           f"{rates['tokens_per_request']:.0f} tokens per request over the last "
+                           f"{RATE_WINDOW_DAYS} days)")
+        else:
+            details.append(f"Estimated cost: unknown (no {estimate['provider']} usage "
+                           f"in the last {RATE_WINDOW_DAYS} days)")
+        self.add_result(
+            "Cache Hit Rate",
+            "INFO",
+            f"{estimate['hit_rate'] * 100:.1f}% of {folder} is cached; {calls:,} LLM call(s) needed",
+            "\n".join(details),
+            category=category
+        )
+    
+    def analyze_query_plans(self, db_path: Path, category: str):
+        """EXPLAIN QUERY PLAN for DatabaseManager's statements: full scans and missing indexes"""
+        import sqlite3
+        from diagnostic_lib.dbutil import connect_readonly
+        from diagnostic_lib.queryplan import WORKLOAD_FILES, analyze
+        try:
+            conn = connect_readonly(db_path)
+            try:
+                findings, missing = analyze(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.add_result(
+                "Query Plans",
+                "WARNING",
+                "Could not analyze query plans",
+                str(e),
+                category=category
+            )
+            return
+        self.query_plans = {
+            "statements": [f.to_dict() for f in findings],
+            "missing_indexes": missing,
+        }
+        
+        planned = [f for f in findings if f.error is None]
+        scans = sorted((f for f in planned if f.scanned_tables),
+                       key=lambda f: f.weighted_cost, reverse=True)
+        hot = [f for f in scans if f.statement.frequency != "per_run"]
+        details = [
+            f"{f.statement.name}: full scan of {', '.join(f.scanned_tables)} "
+            f"(~{f.rows_per_call:,} rows/call, ~{f.weighted_cost:,} rows per {WORKLOAD_FILES:,} files)"
+            + ("" if f in hot else " [maintenance]")
+            for f in scans
+        ]
+        skipped = [f.statement.name for f in findings if f.error is not None]
+        if skipped:
+            details.append(f"Not planned (tables missing): {', '.join(skipped)}")
+        suggestions = sorted({f.suggested_index() for f in hot if f.suggested_index()})
+        self.add_result(
+            "Query Plans",
+            "WARNING" if hot else "OK",
+            f"{len(hot)} hot-path statement(s) scan full tables" if hot
+            else f"{len(planned)} statements use indexes on hot tables",
+            "\n".join(details) or None,
+            recommendation=("Add indexes: " + " ".join(suggestions)) if suggestions else None,
+            category=category
+        )
+        
+        if missing:
+            uncovered = [m for m in missing if not m["covered_by"]]
+            lines = []
+            for m in missing:
+                line = (f"{m['index']} ON {m['table']}({', '.join(m['columns'])}): "
+                        f"{m['table_rows']:,} rows, ~{m['weighted_cost']:,} rows read per "
+                        f"{WORKLOAD_FILES:,} files")
+                if m["covered_by"]:
+                    line += f" (lookups still served by {', '.join(m['covered_by'])})"
+                lines.append(line)
+            self.add_result(
+                "Missing Indexes",
+                "WARNING" if uncovered else "INFO",
+                f"{len(missing)} index(es) created by DatabaseManager are missing",
+                "\n".join(lines),
+                recommendation="Recreate with: " + " ".join(m["create_sql"] for m in missing),
+                category=category
+            )
+        else:
+            self.add_result(
+                "Missing Indexes",
+                "OK",
+                "All indexes created by DatabaseManager are present",
                 category=category
             )
     
@@ -975,8 +1964,8 @@ class ThoroughDiagnosticTool:
         self.section_header("Log Files & Error Reporting")
         category = "Logs"
         
-        # Find log directory
-        log_dir = self.data_dir / "logs"
+        # The directory Logger.cpp writes to (legacy data-dir logs as a fallback)
+        log_dir = self.log_dir
         
         if not log_dir.exists():
             self.add_result(
@@ -988,17 +1977,17 @@ class ThoroughDiagnosticTool:
             )
             return
         
-        # Count log files
-        log_files = list(log_dir.glob("*.log")) + list(log_dir.glob("*.txt"))
+        from diagnostic_lib.apppaths import log_sources
+        sources = log_sources(log_dir)
         
-        if log_files:
-            total_size = sum(f.stat().st_size for f in log_files) / (1024 * 1024)
+        if sources:
+            total_size = sum(path.stat().st_size for _, path in sources) / (1024 * 1024)
             
             self.add_result(
                 "Log Directory",
                 "OK",
-                f"Found ({len(log_files)} log files, {total_size:.2f} MB)",
-                f"Path: {log_dir}",
+                f"Found ({len(sources)} log files, {total_size:.2f} MB)",
+                f"Path: {log_dir}\nFiles: {', '.join(path.name for _, path in sources)}",
                 category=category
             )
         else:
@@ -1011,39 +2000,76 @@ class ThoroughDiagnosticTool:
             )
             return
         
-        # Check for error logs
-        error_logs = [f for f in log_files if "error" in f.name.lower()]
-        if error_logs:
-            latest_error = max(error_logs, key=lambda f: f.stat().st_mtime)
-            age_seconds = time.time() - latest_error.stat().st_mtime
-            age_str = f"{age_seconds/3600:.1f} hours ago" if age_seconds > 3600 else f"{age_seconds/60:.0f} minutes ago"
-            
-            status = "WARNING" if age_seconds < 86400 else "INFO"  # Recent errors are warnings
+        # Classify entries by spdlog level, newest files first, reading each from its end
+        from diagnostic_lib.logtail import recent_entries, summarize_levels
+        by_age = sorted(sources, key=lambda source: source[1].stat().st_mtime, reverse=True)
+        budget = LOG_SCAN_BYTES
+        summaries = []
+        for logger, path in by_age:
+            if budget <= 0:
+                break
+            try:
+                summary = summarize_levels(path, max_scan_bytes=budget)
+            except OSError:
+                continue
+            budget -= path.stat().st_size
+            summaries.append((logger, summary))
+        self.log_levels = {
+            "directory": str(log_dir),
+            "scan_bytes": LOG_SCAN_BYTES,
+            "sources": [dict(summary.to_dict(), logger=logger) for logger, summary in summaries],
+        }
+        
+        errors = sum(summary.at_least("error") for _, summary in summaries)
+        warnings = sum(summary.counts["warning"] for _, summary in summaries)
+        per_file = [
+            f"{Path(summary.path).name}: {summary.counts['critical']} critical, {summary.counts['error']} error, "
+            f"{summary.counts['warning']} warning{'' if summary.complete else ' (end of file only)'}"
+            for _, summary in summaries
+        ]
+        if len(summaries) < len(sources):
+            per_file.append(f"{len(sources) - len(summaries)} older file(s) not scanned "
+                            f"({LOG_SCAN_BYTES // (1024 * 1024)} MB limit)")
+        
+        if errors:
+            newest = max(filter(None, (summary.newest_at_least("error") for _, summary in summaries)), default=None)
+            age_seconds = None
+            if newest:
+                try:
+                    logged = datetime.datetime.strptime(newest[:19], "%Y-%m-%d %H:%M:%S")
+                    age_seconds = max(0.0, (datetime.datetime.now() - logged).total_seconds())
+                except ValueError:
+                    pass
+            if age_seconds is None:
+                age_str, status = "unknown time", "WARNING"
+            else:
+                age_str = (f"{age_seconds/3600:.1f} hours ago" if age_seconds > 3600
+                           else f"{age_seconds/60:.0f} minutes ago")
+                status = "WARNING" if age_seconds < 86400 else "INFO"  # Recent errors are warnings
             
             self.add_result(
                 "Error Logs",
                 status,
-                f"{len(error_logs)} error log(s), most recent: {age_str}",
-                f"Latest: {latest_error.name}",
-                recommendation="Check error logs for issues" if status == "WARNING" else None,
+                f"{errors} error/critical entries, {warnings} warning(s); most recent error: {age_str}",
+                "\n".join(per_file),
+                recommendation="Check the log entries below for issues" if status == "WARNING" else None,
                 category=category
             )
             
-            # Try to read last few lines
+            # Preview the newest error entries across all files (read backwards, so size does not matter)
             if not self.quick:
                 try:
-                    with open(latest_error, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                        if lines:
-                            last_lines = lines[-5:]
-                            preview = '\n'.join(line.strip() for line in last_lines)
-                            self.add_result(
-                                "Recent Error Preview",
-                                "INFO",
-                                f"Last {len(last_lines)} lines from {latest_error.name}",
-                                preview,
-                                category=category
-                            )
+                    entries = recent_entries([summary.path for _, summary in summaries], 5, min_level="error",
+                                             max_scan_bytes=LOG_PREVIEW_SCAN_BYTES)
+                    if entries:
+                        files = sorted({Path(path).name for path, _ in entries})
+                        self.add_result(
+                            "Recent Error Preview",
+                            "INFO",
+                            f"Last {len(entries)} error line(s) from {', '.join(files)}",
+                            '\n'.join(f"{Path(path).name}: {line.strip()}" for path, line in entries),
+                            category=category
+                        )
                 except Exception as e:
                     self.add_result(
                         "Error Log Read",
@@ -1056,7 +2082,8 @@ class ThoroughDiagnosticTool:
             self.add_result(
                 "Error Logs",
                 "OK",
-                "No error logs found",
+                f"No error entries ({warnings} warning(s))",
+                "\n".join(per_file),
                 category=category
             )
         
@@ -1129,40 +2156,21 @@ class ThoroughDiagnosticTool:
                 category=category
             )
         
-        # Database query performance
-        db_path = self.data_dir / "aifilesorter.db"
+        # Database workload benchmark (replays DatabaseManager queries on a copy)
+        db_path = self.db_path
         if db_path.exists() and not self.quick:
-            try:
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                
-                # Simple query benchmark
-                start = time.time()
-                for _ in range(100):
-                    cursor.execute("SELECT COUNT(*) FROM sqlite_master")
-                    cursor.fetchone()
-                query_time = (time.time() - start) / 100 * 1000  # ms per query
-                
-                conn.close()
-                
-                status = "OK" if query_time < 10 else "WARNING"
-                rec = "Database performance may be slow" if status == "WARNING" else None
-                
-                self.add_result(
-                    "Database Query Performance",
-                    status,
-                    f"Average query: {query_time:.2f} ms",
-                    recommendation=rec,
-                    category=category
-                )
-            except Exception as e:
+            if self.benchmark:
+                # Copying the snapshot keeps it pristine and never touches the live file
+                self.benchmark_database(self.db_snapshot or db_path, category)
+            else:
                 self.add_result(
-                    "Database Query Performance",
-                    "WARNING",
-                    "Could not test",
-                    str(e),
+                    "Database Workload Benchmark",
+                    "SKIP",
+                    "Run with --benchmark to replay the app's queries on a copy of the database",
                     category=category
                 )
+            if self.contention:
+                self.measure_lock_contention(self.db_snapshot or db_path, category)
         
         # Check available disk space
         try:
@@ -1184,6 +2192,126 @@ class ThoroughDiagnosticTool:
         except:
             pass
     
+    def benchmark_database(self, db_path: Path, category: str):
+        """Replay DatabaseManager query classes on a copy and report latency percentiles"""
+        import sqlite3
+        from diagnostic_lib.dbbench import P95_WARNING_MS, run_workload
+        try:
+            summaries, meta = run_workload(str(db_path))
+        except (sqlite3.Error, OSError) as e:
+            self.add_result(
+                "Database Workload Benchmark",
+                "WARNING",
+                "Could not run",
+                str(e),
+                category=category
+            )
+            return
+        self.db_benchmark = {"metadata": meta, "query_classes": summaries}
+        
+        self.add_result(
+            "Database Workload Benchmark",
+            "INFO",
+            f"{len(summaries)} query classes on a {meta['database_bytes'] / (1024 * 1024):.1f} MB copy",
+            f"Copied in {meta['copy_seconds']:.2f} s; {meta['sampled_keys']} sampled keys, "
+            f"{meta['operations']} operations per class, upserts in batches of {meta['batch_size']}",
+            category=category
+        )
+        for summary in summaries:
+            name = summary["query_class"]
+            label = f"DB {name.replace('_', ' ').title()}"
+            if summary["error"]:
+                self.add_result(label, "SKIP", "Not measured", summary["error"], category=category)
+                continue
+            slow = summary["p95_ms"] > P95_WARNING_MS.get(name, float("inf"))
+            unit = "rows" if name == "batched_upsert" else "ops"
+            rate = summary["rows_per_sec"] if name == "batched_upsert" else summary["ops_per_sec"]
+            self.add_result(
+                label,
+                "WARNING" if slow else "OK",
+                f"p50 {summary['p50_ms']:.2f} ms, p95 {summary['p95_ms']:.2f} ms, "
+                f"p99 {summary['p99_ms']:.2f} ms, {rate:,.0f} {unit}/s",
+                f"{summary['operations']} operations, {summary['rows']} rows",
+                recommendation=(f"p95 above {P95_WARNING_MS[name]:g} ms - check indexes "
+                                "and fragmentation" if slow else None),
+                category=category
+            )
+    
+    def measure_lock_contention(self, db_path: Path, category: str):
+        """Concurrent readers and one upserting writer on a copy, with the app's lock settings"""
+        import sqlite3
+        from diagnostic_lib.contention import CHECKPOINT_STALL_MS, simulate_contention
+        capture = getattr(self._local, "capture", None)
+        try:
+            result = simulate_contention(
+                str(db_path),
+                readers=max(1, self.contention_readers),
+                busy_timeout_ms=max(0, self.contention_busy_timeout),
+                cancelled=capture.cancel_event if capture is not None else None
+            )
+        except (sqlite3.Error, OSError) as e:
+            self.add_result(
+                "Lock Contention",
+                "WARNING",
+                "Could not run",
+                str(e),
+                category=category
+            )
+            return
+        self.lock_contention = result
+        
+        reader, writer = result["reader"], result["writer"]
+        starved = writer["operations"] == 0 and writer["busy"] > 0
+        contended = starved or max(reader["busy_ratio"], writer["busy_ratio"]) > 0.05
+        if starved:
+            message = f"Writer never committed: {writer['busy']:,} SQLITE_BUSY in {result['duration_s']:.1f} s"
+        else:
+            message = (f"SQLITE_BUSY on {writer['busy_ratio'] * 100:.1f}% of commits and "
+                       f"{reader['busy_ratio'] * 100:.1f}% of reads")
+        details = [
+            f"{result['readers']} readers + 1 writer ({result['write_batch']} upserts per commit), "
+            f"{result['journal_mode']} journal, busy timeout {result['busy_timeout_ms']} ms, "
+            f"{result['duration_s']:.1f} s on a copy",
+        ]
+        for label, role in (("Readers", reader), ("Writer", writer)):
+            details.append(f"{label}: {role['operations']:,} ops ({role['ops_per_sec']:,.0f}/s), "
+                           f"p50 {role['p50_ms']:.2f} ms, p95 {role['p95_ms']:.2f} ms, "
+                           f"p99 {role['p99_ms']:.2f} ms, max {role['max_ms']:.2f} ms, "
+                           f"{role['busy']:,} busy results")
+        recommendation = None
+        if contended:
+            recommendation = ("The app would fail these statements; a busy timeout "
+                              "(sqlite3_busy_timeout) and journal_mode=WAL in DatabaseManager would let "
+                              "readers and the writer proceed concurrently")
+            if result["journal_mode"] == "wal":
+                recommendation = ("The app would fail these statements; a busy timeout "
+                                  "(sqlite3_busy_timeout) in DatabaseManager would make them wait instead")
+        self.add_result(
+            "Lock Contention",
+            "WARNING" if contended else "OK",
+            message,
+            "\n".join(details),
+            recommendation=recommendation,
+            category=category
+        )
+        
+        checkpoints = result["checkpoints"]
+        if checkpoints is None:
+            return
+        starving = checkpoints["checkpoints"] and checkpoints["incomplete"] == checkpoints["checkpoints"]
+        self.add_result(
+            "WAL Checkpoints",
+            "WARNING" if checkpoints["stalls"] or starving else "OK",
+            f"{checkpoints['checkpoints']} checkpoints, {checkpoints['stalls']} stalls over "
+            f"{CHECKPOINT_STALL_MS:g} ms, {checkpoints['incomplete']} incomplete",
+            f"p95 {checkpoints['p95_ms']:.2f} ms, max {checkpoints['max_ms']:.2f} ms, "
+            f"{checkpoints['stall_ms_total']:.0f} ms stalled in total; WAL peaked at "
+            f"{checkpoints['wal_peak_bytes'] / (1024 * 1024):.1f} MB",
+            recommendation=("Readers never let a checkpoint finish, so the WAL keeps growing; short "
+                            "read transactions give checkpoints a chance to reset it" if starving else None),
+            category=category
+        )
+    
     # ==================== API Tests ====================
     
     def check_api_connectivity(self, test_apis: bool = False):
@@ -1218,6 +2346,7 @@ class ThoroughDiagnosticTool:
             return
         
         # Test OpenAI API endpoint
+        import subprocess
         try:
             result = subprocess.run(
                 ["curl", "-I", "-s", "-m", "5", "https://api.openai.com"],
@@ -1277,22 +2406,14 @@ class ThoroughDiagnosticTool:
     
     # ==================== Report Generation ====================
     
-    def generate_json_report(self, output_file: str) -> dict:
-        """Generate comprehensive JSON report"""
+    def report_summary(self) -> dict:
+        """Report metadata and summary statistics (without individual results)"""
+        import platform
         duration = (datetime.datetime.now() - self.start_time).total_seconds()
         
-        # Calculate statistics
-        total = len(self.results)
-        stats_by_status = defaultdict(int)
-        stats_by_category = defaultdict(lambda: defaultdict(int))
-        
-        for result in self.results:
-            stats_by_status[result.status] += 1
-            stats_by_category[result.category][result.status] += 1
-        
         # Overall health
-        fail_count = stats_by_status["FAIL"]
-        warning_count = stats_by_status["WARNING"]
+        fail_count = self.status_counts["FAIL"]
+        warning_count = self.status_counts["WARNING"]
         
         if fail_count > 0:
             health = "CRITICAL"
@@ -1303,29 +2424,53 @@ class ThoroughDiagnosticTool:
         else:
             health = "EXCELLENT"
         
-        # Build report
-        report = {
+        return {
             "diagnostic_metadata": {
                 "tool_version": "2.0",
                 "timestamp": self.start_time.isoformat(),
                 "duration_seconds": duration,
                 "quick_mode": self.quick,
+                "parallel_jobs": self.jobs,
+                "incremental": self.incremental_state is not None,
+                "reused_checks": self.reused_checks,
+                "probe_cache": str(self.probe_cache.path) if self.probe_cache else None,
             },
+            "database_benchmark": self.db_benchmark,
+            "snapshot": self.snapshot_info,
+            "integrity": self.integrity,
+            "schema_drift": self.schema_drift,
+            "table_statistics": self.table_statistics,
+            "maintenance": self.maintenance,
+            "orphans": self.orphans,
+            "content_cache": self.content_cache,
+            "cache_hit_rate": self.cache_hit_rate,
+            "api_usage": self.api_usage,
+            "database_timings": self.database_timings or None,
+            "journal": self.journal,
+            "lock_contention": self.lock_contention,
+            "log_levels": self.log_levels,
+            "query_plans": self.query_plans,
+            "external_probes": [p.to_dict() for p in self.probes.results],
+            "check_timings": list(self.check_timings.values()),
             "system_info": {
-                "platform": platform.system(),
+                "platform": self.platform,
                 "release": platform.release(),
                 "machine": platform.machine(),
                 "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
             },
             "summary": {
-                "total_checks": total,
-                "by_status": dict(stats_by_status),
-                "by_category": {k: dict(v) for k, v in stats_by_category.items()},
+                "total_checks": sum(self.status_counts.values()),
+                "by_status": dict(self.status_counts),
+                "by_category": {k: dict(v) for k, v in self.category_counts.items()},
                 "overall_health": health,
             },
-            "results_by_category": {},
-            "all_results": []
         }
+    
+    def generate_json_report(self, output_file: str) -> dict:
+        """Generate comprehensive JSON report"""
+        report = self.report_summary()
+        report["results_by_category"] = {}
+        report["all_results"] = []
         
         # Group results by category
         for category, results in self.categories.items():
@@ -1356,6 +2501,7 @@ class ThoroughDiagnosticTool:
         ]
         
         # Save to file
+        import json
         try:
             with open(output_file, 'w') as f:
                 json.dump(report, f, indent=2)
@@ -1367,7 +2513,6 @@ class ThoroughDiagnosticTool:
     
     def generate_html_report(self, json_report: dict, output_file: str):
         """Generate HTML report"""
-        from pathlib import Path
         html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -1479,6 +2624,20 @@ class ThoroughDiagnosticTool:
         .recommendation::before {{
             content: "💡 ";
         }}
+        .timings table {{
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 14px;
+        }}
+        .timings th, .timings td {{
+            text-align: left;
+            padding: 6px 10px;
+            border-bottom: 1px solid #e5e7eb;
+        }}
+        .timings td.num {{
+            text-align: right;
+            font-family: monospace;
+        }}
         .timestamp {{
             text-align: center;
             color: #6b7280;
@@ -1545,6 +2704,24 @@ class ThoroughDiagnosticTool:
     </div>
 """
         
+        timings = json_report.get('check_timings') or []
+        if timings:
+            html += """
+    <div class="category timings">
+        <h2>Check Timings</h2>
+        <table>
+            <tr><th>Check</th><th>State</th><th>Wall (ms)</th><th>CPU (ms)</th><th>Peak RSS &Delta; (KB)</th></tr>
+"""
+            for t in timings:
+                cpu = f"{t['cpu_ms']:.1f}" if t.get('cpu_ms') is not None else "-"
+                rss = t['peak_rss_delta_kb'] if t.get('peak_rss_delta_kb') is not None else "-"
+                state = t['state'] + (" (reused)" if t.get('reused') else "")
+                html += f"""            <tr><td>{t['check']}</td><td>{state}</td><td class="num">{t['wall_ms']:.1f}</td><td class="num">{cpu}</td><td class="num">{rss}</td></tr>
+"""
+            html += """        </table>
+    </div>
+"""
+        
         html += f"""
     <div class="timestamp">
         <p>Platform: {json_report['system_info']['platform']} {json_report['system_info']['release']}</p>
@@ -1598,6 +2775,18 @@ class ThoroughDiagnosticTool:
             
             md += "\n"
         
+        timings = json_report.get('check_timings') or []
+        if timings:
+            md += "## Check Timings\n\n"
+            md += "| Check | State | Wall (ms) | CPU (ms) | Peak RSS Δ (KB) |\n"
+            md += "|-------|-------|-----------|----------|-----------------|\n"
+            for t in timings:
+                cpu = f"{t['cpu_ms']:.1f}" if t.get('cpu_ms') is not None else "-"
+                rss = t['peak_rss_delta_kb'] if t.get('peak_rss_delta_kb') is not None else "-"
+                state = t['state'] + (" (reused)" if t.get('reused') else "")
+                md += f"| {t['check']} | {state} | {t['wall_ms']:.1f} | {cpu} | {rss} |\n"
+            md += "\n"
+        
         md += "---\n"
         md += "*Generated by AI File Sorter Thorough Diagnostic Tool v2.0*\n"
         
@@ -1608,7 +2797,7 @@ class ThoroughDiagnosticTool:
         except Exception as e:
             self.log(f"{Colors.FAIL}✗ Failed to save Markdown summary: {e}{Colors.ENDC}")
     
-    def print_summary(self, json_report: dict):
+    def print_summary(self, json_report: dict, slowest: int = 0):
         """Print summary to console"""
         self.section_header("Summary")
         
@@ -1624,6 +2813,19 @@ class ThoroughDiagnosticTool:
         duration = json_report['diagnostic_metadata']['duration_seconds']
         self.log(f"\nDuration: {duration:.2f} seconds")
         
+        if slowest > 0 and json_report.get('check_timings'):
+            timings = sorted(json_report['check_timings'], key=lambda t: t['wall_ms'], reverse=True)
+            self.log("\nSlowest checks:")
+            for timing in timings[:slowest]:
+                extra = ""
+                if timing.get('cpu_ms') is not None:
+                    extra += f", CPU {timing['cpu_ms']:.0f} ms"
+                if timing.get('peak_rss_delta_kb') is not None:
+                    extra += f", peak RSS +{timing['peak_rss_delta_kb']} KB"
+                if timing.get('reused'):
+                    extra += ", reused"
+                self.log(f"  {timing['wall_ms']:9.1f} ms  {timing['check']} ({timing['state'].lower()}{extra})")
+        
         health = json_report['summary']['overall_health']
         health_color = {
             "EXCELLENT": Colors.OKGREEN,
@@ -1636,8 +2838,8 @@ class ThoroughDiagnosticTool:
     
     # ==================== Main Execution ====================
     
-    def run_all_checks(self, test_apis: bool = False):
-        """Run all diagnostic checks"""
+    def run_all_checks(self, test_apis: bool = False, names: Optional[List[str]] = None):
+        """Run all diagnostic checks (or only the named ones)"""
         self.log(f"{Colors.HEADER}{Colors.BOLD}")
         self.log("╔════════════════════════════════════════════════════════════════════════════╗")
         self.log("║          AI FILE SORTER - THOROUGH DIAGNOSTIC TOOL v2.0                    ║")
@@ -1648,32 +2850,283 @@ class ThoroughDiagnosticTool:
         if self.quick:
             self.log(f"{Colors.WARNING}⚡ Quick mode enabled - skipping slow tests{Colors.ENDC}\n")
         
-        # List of all check methods
-        check_methods = [
-            self.check_system_info,
-            self.check_file_structure,
-            self.check_dependencies,
-            self.check_llm_backends,
-            self.check_database,
-            self.check_configuration,
-            self.check_features,
-            self.check_logs,
-            self.check_performance,
-            lambda: self.check_api_connectivity(test_apis),
+        self.run_checks(names, test_apis=test_apis)
+    
+    def run_checks(self, names: Optional[List[str]] = None, test_apis: bool = False):
+        """Run the named checks (default: all) on the scheduler"""
+        plan = self.check_plan(test_apis)
+        if names is not None:
+            plan = [entry for entry in plan if entry[0] in names]
+        selected = {entry[0] for entry in plan}
+        
+        scheduler = CheckScheduler(max_workers=self.jobs, default_timeout=self.check_timeout)
+        categories = {}
+        for name, category, method, after in plan:
+            after = tuple(d for d in after if d in selected)
+            self._captures[name] = CheckCapture(name)
+            scheduler.add(name, self._capturing(name, self._captures[name], method), after=after)
+            categories[name] = category
+        
+        # Outcomes arrive in declaration order, so output and reports stay stable
+        mark_first_check()
+        try:
+            for outcome in scheduler.run():
+                self._local.check = outcome.name  # Tags the results added below
+                first = len(self.results)
+                counted = sum(self.status_counts.values())
+                capture = self._flush_capture(outcome)
+                category = categories[outcome.name]
+                if outcome.state == TIMEOUT:
+                    self.add_result(
+                        f"{category} Checks",
+                        "FAIL",
+                        f"Timed out after {outcome.elapsed:.0f} seconds",
+                        "Results gathered before the timeout are reported above",
+                        recommendation="Increase --check-timeout or investigate slow I/O",
+                        category=category
+                    )
+                elif outcome.state == SKIPPED:
+                    self.add_result(
+                        f"{category} Checks",
+                        "SKIP",
+                        f"Skipped because '{outcome.blocked_by}' did not complete",
+                        category=category
+                    )
+                elif outcome.state == ERROR:
+                    self.log(f"\n{Colors.FAIL}✗ Error in check: {outcome.error}{Colors.ENDC}")
+                    if self.verbose:
+                        self.log(outcome.traceback, Colors.FAIL)
+                elif outcome.state == CANCELLED:
+                    raise KeyboardInterrupt
+                self.check_results[outcome.name] = self.results[first:]
+                self._record_timing(outcome, category, capture,
+                                    sum(self.status_counts.values()) - counted)
+        except KeyboardInterrupt:
+            # The caller decides what an interrupt means (exit, or stop watching)
+            scheduler.cancel()
+            self.log(f"\n{Colors.WARNING}⚠ Diagnostic interrupted by user{Colors.ENDC}")
+            raise
+        finally:
+            self._local.check = None
+            self.discard_database_snapshot()
+        
+        if self.profiler is not None:
+            collapsed = self.profiler.write_collapsed()
+            self.log(f"{Colors.OKGREEN}✓ Profiles saved in {self.profiler.output_dir} "
+                     f"(per-check .pstats, {collapsed.name}){Colors.ENDC}")
+        
+        if self.incremental_state is not None:
+            try:
+                self.incremental_state.save()
+            except OSError as e:
+                self.log(f"{Colors.WARNING}⚠ Could not save incremental state: {e}{Colors.ENDC}")
+    
+    def check_plan(self, test_apis: bool = False) -> List[Tuple[str, str, Any, Tuple[str, ...]]]:
+        """Declare every check as (name, category, method, checks it runs after)"""
+        return [
+            ("system_info", "System", self.check_system_info, ()),
+            ("file_structure", "File Structure", self.check_file_structure, ()),
+            ("dependencies", "Dependencies", self.check_dependencies, ()),
+            ("llm_backends", "LLM Backends", self.check_llm_backends, ()),
+            ("database", "Database", self.check_database, ()),
+            ("configuration", "Configuration", self.check_configuration, ()),
+            ("features", "Features", self.check_features, ()),
+            ("logs", "Logs", self.check_logs, ()),
+            # Benchmarks wait for the I/O-heavy checks so they measure an idle disk,
+            # and still run when one of those fails
+            ("performance", "Performance", self.check_performance,
+             ("file_structure", "llm_backends", "database", "logs")),
+            ("api_connectivity", "API", lambda: self.check_api_connectivity(test_apis), ()),
         ]
+    
+    def check_inputs(self) -> Dict[str, Optional[List[Tuple[str, Path]]]]:
+        """Inputs each check reads; None means the check must always run"""
+        from diagnostic_lib.incremental import FILE, DIR, TREE
+        ggml_base = self.repo_root / "app" / "lib" / "ggml"
+        log_dir = self.log_dir
+        db_path = self.db_path
         
-        # Run all checks with error handling
-        for check_method in check_methods:
-            try:
-                check_method()
-            except KeyboardInterrupt:
-                self.log(f"\n{Colors.WARNING}⚠ Diagnostic interrupted by user{Colors.ENDC}")
-                sys.exit(1)
-            except Exception as e:
-                import traceback
-                self.log(f"\n{Colors.FAIL}✗ Error in check: {e}{Colors.ENDC}")
-                if self.verbose:
-                    self.log(traceback.format_exc(), Colors.FAIL)
+        if self.platform == "Windows":
+            executables = [self.repo_root / "StartAiFileSorter.exe", self.app_dir]
+            dependency_inputs = [(DIR, self.app_dir)]
+        else:
+            executables = [self.repo_root / "app" / "bin"]
+            dependency_inputs = []
+            import shutil
+            for argv in self.probes.probes.values():
+                binary = shutil.which(argv[0])
+                if binary:
+                    dependency_inputs.append((FILE, Path(binary)))
+        
+        database_inputs = [
+            (FILE, db_path), (FILE, Path(f"{db_path}-wal")),
+            # Written while a content cache scan is unfinished, so the next run resumes it
+            (FILE, self.state_dir / "content_cache_scan.json"),
+        ]
+        if self.hit_rate_folder:
+            database_inputs += [(DIR, Path(self.hit_rate_folder)), (FILE, self.config_dir / "config.ini")]
+        
+        return {
+            "system_info": None,  # Memory and disk space change constantly
+            "file_structure": [(DIR, p) for p in executables] + [
+                (TREE, self.repo_root / "app" / d) for d in ("include", "lib", "resources", "scripts")
+            ] + [(FILE, self.repo_root / "app" / "CMakeLists.txt")],
+            "dependencies": dependency_inputs,
+            "llm_backends": [
+                (DIR, ggml_base / v) for v in ("wocuda", "wcuda", "wvulkan")
+            ] + [
+                (TREE, self.repo_root / "app" / "lib" / "precompiled"),
+                (DIR, self.data_dir / "llms"),
+            ],
+            "database": database_inputs,
+            "configuration": [(FILE, self.config_dir / "config.ini"), (FILE, self.config_dir)],
+            "features": [
+                (DIR, self.repo_root / "app" / "lib"),
+                (DIR, self.repo_root / "app" / "resources" / "i18n"),
+            ],
+            "logs": [(DIR, log_dir)],
+            "performance": None,  # Benchmarks are meaningless when replayed
+            "api_connectivity": None,
+        }
+    
+    def replayable(self, name: str) -> bool:
+        """False when options make a check write files or take measurements a replay cannot repeat"""
+        if name == "database":
+            return not (self.orphan_script or self.measure_maintenance or self.snapshot_store)
+        return True
+    
+    def check_context(self, name: str) -> str:
+        """Options that change a check's results; part of its incremental fingerprint"""
+        context = f"{self.platform}|quick={self.quick}"
+        if name == "database":
+            context += (f"|integrity={self.integrity_mode},{self.integrity_budget},"
+                        f"{self.integrity_snapshot}|exact_counts={self.exact_counts}"
+                        f"|contention={bool(self.contention)}|cache_scan_budget={self.cache_scan_budget}"
+                        f"|snapshot={self.use_snapshot}|hit_rate={self.hit_rate_folder}")
+        return context
+    
+    def _capturing(self, name: str, capture: CheckCapture, method):
+        """Wrap a check so its output is buffered on the worker thread"""
+        inputs = None
+        if self.incremental_state is not None and self.replayable(name):
+            inputs = self.check_inputs().get(name)
+        
+        def run(cancel_event: threading.Event):
+            capture.cancel_event = cancel_event
+            with CheckTimer(self.track_resources) as capture.timer:
+                if inputs is not None and self._replay(name, capture, inputs):
+                    return
+                self._local.capture = capture
+                try:
+                    if self.profiler is not None:
+                        self.profiler.profile(name, method)
+                    else:
+                        method()
+                finally:
+                    self._local.capture = None
+        return run
+    
+    def _flush_capture(self, outcome) -> CheckCapture:
+        """Emit a finished check's buffered output and results"""
+        capture = self._captures.pop(outcome.name)
+        with capture.lock:
+            capture.closed = True
+            lines, results = capture.lines, capture.results
+        for message, color in lines:
+            self.log(message, color)
+        # Results of a check that ran were streamed from its worker already
+        for result in results:
+            self.record_result(result, outcome.name, stream=capture.reused)
+        
+        if capture.reused:
+            self.reused_checks.append(outcome.name)
+        elif capture.fingerprint and outcome.state == DONE:
+            report = {field: getattr(self, field)
+                      for field in REPLAYED_REPORT_FIELDS.get(outcome.name, ())}
+            self.incremental_state.store(
+                outcome.name, capture.fingerprint, lines, [r.to_dict() for r in results], report
+            )
+        return capture
+    
+    def _record_timing(self, outcome, category: str, capture: CheckCapture, result_count: int):
+        """Store (and stream) how long a check took"""
+        timer = capture.timer
+        finished = timer is not None and timer.wall_ms is not None
+        timing = {
+            "check": outcome.name,
+            "category": category,
+            "state": outcome.state,
+            "wall_ms": round(timer.wall_ms if finished else outcome.elapsed * 1000, 2),
+            "cpu_ms": round(timer.cpu_ms, 2) if finished and timer.cpu_ms is not None else None,
+            "peak_rss_delta_kb": timer.peak_rss_delta_kb if finished else None,
+            "reused": capture.reused,
+            "results": result_count,
+        }
+        self.check_timings[outcome.name] = timing
+        for sink in self.result_sinks:
+            sink.write(dict(timing, event="check"))
+    
+    def _replay(self, name: str, capture: CheckCapture, inputs) -> bool:
+        """Fill a capture from stored results if the check's inputs are unchanged"""
+        from diagnostic_lib.incremental import FILE, fingerprint
+        capture.fingerprint = fingerprint([(FILE, Path(__file__))] + inputs, self.check_context(name))
+        entry = self.incremental_state.lookup(name, capture.fingerprint)
+        if entry is None:
+            return False
+        
+        capture.reused = True
+        capture.lines = [tuple(line) for line in entry["lines"]]
+        capture.lines.append((
+            f"  ↺ Inputs unchanged since {entry['recorded_at']} - previous results reused",
+            Colors.OKCYAN
+        ))
+        capture.results = [DiagnosticResult.from_dict(r) for r in entry["results"]]
+        for field, value in entry.get("report", {}).items():
+            if field in REPLAYED_REPORT_FIELDS.get(name, ()):
+                setattr(self, field, value)
+        return True
+    
+    def watch(self, test_apis: bool = False, interval: float = 5.0,
+              names: Optional[List[str]] = None):
+        """Run all checks, then re-run only the checks affected by each change"""
+        from diagnostic_lib.watch import ChangeWatcher
+        
+        # Ctrl+C at any point stops watching; main() still writes the reports
+        try:
+            self.run_all_checks(test_apis, names)
+            
+            inputs = self.check_inputs()
+            if names is not None:
+                inputs = {name: i for name, i in inputs.items() if name in names}
+            watcher = ChangeWatcher(inputs, interval, context=self.platform)
+            watched = ", ".join(str(p) for p in (self.data_dir, self.config_dir, self.db_path.parent,
+                                                  self.repo_root / "app" / "lib"))
+            self.log(f"\n{Colors.OKCYAN}👁 Watching {watched} every {interval:g}s "
+                     f"(Ctrl+C to stop){Colors.ENDC}")
+            
+            while True:
+                changed = watcher.wait()
+                self.log(f"\n{Colors.OKCYAN}↻ Change detected - re-running: "
+                         f"{', '.join(changed)}{Colors.ENDC}")
+                
+                # Fresh walk and probe caches so the re-run sees the new state
+                self.tree = TreeWalker()
+                self.probes = ProbeBatch(self.external_probes(), cache=self.probe_cache)
+                try:
+                    self.run_checks(changed, test_apis)
+                finally:
+                    self.keep_latest_results(test_apis)
+        except KeyboardInterrupt:
+            self.log(f"\n{Colors.WARNING}⚠ Watch stopped{Colors.ENDC}")
+    
+    def keep_latest_results(self, test_apis: bool = False):
+        """Drop superseded (and interrupted) results, keeping the latest complete ones per check"""
+        if self.retain_results:
+            self.results = [
+                r for name, *_ in self.check_plan(test_apis)
+                for r in self.check_results.get(name, [])
+            ]
+            self.recount_results()
 
 
 def main():
@@ -1689,6 +3142,11 @@ Examples:
   %(prog)s --html --markdown        # Generate all report formats
   %(prog)s --test-apis              # Test API connectivity (requires internet)
   %(prog)s --quick                  # Fast scan, skip slow tests
+  %(prog)s --only database,logs     # Run only the named checks
+  %(prog)s --jobs 1                 # Run checks one at a time
+  %(prog)s --incremental            # Only redo checks whose inputs changed
+  %(prog)s --watch --watch-output results.jsonl  # Long-running health probe
+  %(prog)s --ndjson results.ndjson  # Stream results as they are produced
   %(prog)s -v --html --markdown     # Full verbose with all reports
         """
     )
@@ -1729,11 +3187,279 @@ Examples:
         help="Quick mode - skip slow tests for rapid validation"
     )
     
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Number of checks to run concurrently (default: CPU count + 4, max 8; 1 = serial)"
+    )
+    
+    parser.add_argument(
+        "--check-timeout",
+        type=float,
+        default=120.0,
+        metavar="SECONDS",
+        help="Abandon a single check after this many seconds (default: 120, 0 = no limit)"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse previous results of checks whose inputs (files, directories) are unchanged"
+    )
+    
+    parser.add_argument(
+        "--state-dir",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="Directory for diagnostic state (default: <data dir>/diagnostics)"
+    )
+    
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running; re-run only the checks affected by file changes (Ctrl+C to stop)"
+    )
+    
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=5.0,
+        metavar="SECONDS",
+        help="Polling interval for --watch (default: 5)"
+    )
+    
+    parser.add_argument(
+        "--watch-output",
+        type=str,
+        metavar="FILE",
+        help="Append every result to FILE as JSON lines as soon as it is produced"
+    )
+    
+    parser.add_argument(
+        "--ndjson",
+        type=str,
+        metavar="FILE",
+        help="Stream results to FILE as NDJSON while running, ending with a summary record "
+             "(constant memory; replaces the JSON/HTML/Markdown reports)"
+    )
+    
+    parser.add_argument(
+        "--resource-usage",
+        action="store_true",
+        help="Record CPU time and peak RSS growth per check (RSS is only exact with --jobs 1)"
+    )
+    
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Show the N slowest checks in the console summary"
+    )
+    
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Benchmark the app's SQLite query classes on a copy of the database"
+    )
+    
+    parser.add_argument(
+        "--exact-counts",
+        action="store_true",
+        help="Count table rows with COUNT(*) instead of estimating them (slow on large databases)"
+    )
+    
+    parser.add_argument(
+        "--integrity",
+        choices=("quick", "bounded", "full"),
+        default="quick",
+        help="Database integrity tier: quick_check, integrity_check stopping after 100 problems, "
+             "or the full integrity_check (default: quick)"
+    )
+    
+    parser.add_argument(
+        "--integrity-budget",
+        type=float,
+        default=30.0,
+        metavar="SECS",
+        help="Stop the integrity check after SECS seconds, 0 = unlimited (default: 30)"
+    )
+    
+    parser.add_argument(
+        "--integrity-snapshot",
+        action="store_true",
+        help="Run the integrity check on a backup-API snapshot instead of the live file"
+    )
+    
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Run the database analyses on an online snapshot taken with the backup API"
+    )
+    
+    parser.add_argument(
+        "--save-snapshot",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help="Also keep the snapshot, gzip-compressed, in DIR (default: <state dir>/snapshots)"
+    )
+    
+    parser.add_argument(
+        "--snapshot-keep",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Number of saved snapshots to retain (default: 5)"
+    )
+    
+    parser.add_argument(
+        "--measure-maintenance",
+        action="store_true",
+        help="Apply the recommended VACUUM/ANALYZE to a snapshot and measure query latency before and after"
+    )
+    
+    parser.add_argument(
+        "--orphan-script",
+        metavar="FILE",
+        help="Write an SQL script that removes the orphaned rows found (review before running)"
+    )
+    
+    parser.add_argument(
+        "--cache-scan-budget",
+        type=float,
+        default=30.0,
+        metavar="SECS",
+        help="Re-check content_analysis_cache entries for at most SECS seconds per run, resuming "
+             "where the last run stopped; 0 = unlimited (default: 30)"
+    )
+    
+    parser.add_argument(
+        "--hit-rate",
+        metavar="FOLDER",
+        help="Estimate the categorization cache hit rate, LLM calls, time and cost of sorting FOLDER"
+    )
+    
+    parser.add_argument(
+        "--contention",
+        action="store_true",
+        help="Run reader threads and an upserting writer against a copy of the database and report "
+             "SQLITE_BUSY results, latencies and WAL checkpoint stalls"
+    )
+    
+    parser.add_argument(
+        "--contention-readers",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Reader threads in the contention simulation (default: 4)"
+    )
+    
+    parser.add_argument(
+        "--contention-busy-timeout",
+        type=int,
+        default=0,
+        metavar="MS",
+        help="Busy timeout used in the contention simulation; the app sets none (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--no-probe-cache",
+        action="store_true",
+        help="Run every external probe (pkg-config, curl, ...) instead of reusing cached output"
+    )
+    
+    parser.add_argument(
+        "--only",
+        action="append",
+        metavar="CHECKS",
+        help="Run only these checks (comma-separated, repeatable): " + ", ".join(CHECK_NAMES)
+    )
+    
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help="Profile each check with cProfile; writes per-check .pstats and a merged "
+             "profile.collapsed to DIR (default: diagnostic_profile_<timestamp>). Runs checks serially"
+    )
+    
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile, also trace allocations and write a top-allocations table per check"
+    )
+    
     args = parser.parse_args()
+    if args.profile == "":
+        args.profile = f"diagnostic_profile_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    only = None
+    if args.only:
+        only = [name.strip() for value in args.only for name in value.split(",") if name.strip()]
+        unknown = sorted(set(only) - set(CHECK_NAMES))
+        if unknown:
+            parser.error(f"unknown check(s) for --only: {', '.join(unknown)}")
     
     # Create and run diagnostic tool
-    tool = ThoroughDiagnosticTool(verbose=args.verbose, quick=args.quick)
-    tool.run_all_checks(test_apis=args.test_apis)
+    tool = ThoroughDiagnosticTool(
+        verbose=args.verbose,
+        quick=args.quick,
+        jobs=args.jobs,
+        check_timeout=args.check_timeout or None,
+        incremental=args.incremental,
+        state_dir=args.state_dir,
+        track_resources=args.resource_usage,
+        profile_dir=args.profile,
+        profile_memory=args.profile_memory,
+        probe_cache=not args.no_probe_cache,
+        benchmark=args.benchmark,
+        exact_counts=args.exact_counts,
+        integrity_mode=args.integrity,
+        integrity_budget=args.integrity_budget or None,
+        integrity_snapshot=args.integrity_snapshot,
+        snapshot=args.snapshot,
+        save_snapshot=args.save_snapshot,
+        snapshot_keep=max(1, args.snapshot_keep),
+        measure_maintenance=args.measure_maintenance,
+        orphan_script=args.orphan_script,
+        cache_scan_budget=args.cache_scan_budget or None,
+        hit_rate_folder=args.hit_rate,
+        contention=args.contention,
+        contention_readers=args.contention_readers,
+        contention_busy_timeout=args.contention_busy_timeout
+    )
+    watch_sink = None
+    if args.watch_output:
+        from diagnostic_lib.sinks import JsonLinesSink
+        watch_sink = JsonLinesSink(args.watch_output)
+    if watch_sink is not None:
+        tool.result_sinks.append(watch_sink)
+    if args.ndjson:
+        tool.begin_stream(args.ndjson)
+        # Watch mode keeps only the latest result per check, so memory stays bounded
+        tool.retain_results = args.watch
+    
+    try:
+        if args.watch:
+            tool.watch(test_apis=args.test_apis, interval=args.watch_interval, names=only)
+        else:
+            tool.run_all_checks(test_apis=args.test_apis, names=only)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    finally:
+        if watch_sink is not None:
+            watch_sink.close()
+    
+    if args.ndjson:
+        if args.output or args.html or args.markdown:
+            tool.log(f"{Colors.WARNING}⚠ --output/--html/--markdown are ignored with --ndjson{Colors.ENDC}")
+        tool.print_summary(tool.finish_stream(), slowest=args.slowest)
+        return
     
     # Generate reports
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1752,7 +3478,7 @@ Examples:
         tool.generate_markdown_summary(json_report, md_file)
     
     # Print summary
-    tool.print_summary(json_report)
+    tool.print_summary(json_report, slowest=args.slowest)
 
 
 if __name__ == "__main__":